@@ -7,8 +7,11 @@ from .models import (
     get_default_llm_model,
     create_chat_model,
     get_chat_model,
+    clear_chat_model_cache,
     create_embeddings_model,
     get_embeddings_model,
+    get_embeddings_model_id,
 )
-from .rag import RagService, LangchainEmbeddingProvider, create_rag_service
+from .embedding_cache import EmbeddingCache, get_embedding_cache, close_embedding_cache
+from .rag import FILTERABLE_FIELDS, RagService, LangchainEmbeddingProvider, CachedEmbeddingProvider, create_rag_service
 
@@ -0,0 +1,238 @@
+"""Content-addressed cache for embedding vectors.
+
+Vectors are keyed by the sha256 of their text within a namespace that
+names the embeddings provider and model, so switching models never serves
+a vector from another embedding space. Lookups go to an in-memory LRU
+first and then, when a path is configured, to a SQLite file holding
+float32 blobs that survives restarts and is shared by workers on one host.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from collections.abc import Sequence
+
+from core.cache import CacheStats
+from core.config import settings
+
+
+def text_key(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class _SqliteVectorStore:
+    """float32 vectors in SQLite, trimmed to *maxsize* rows by least recent use."""
+
+    def __init__(self, path: str, maxsize: int):
+        self.maxsize = maxsize
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " namespace TEXT NOT NULL, key TEXT NOT NULL, vector BLOB NOT NULL,"
+            " used_at REAL NOT NULL, PRIMARY KEY (namespace, key))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_used_at ON embeddings (used_at)")
+        self._lock = threading.Lock()
+        self.evictions = 0
+        # Running row count, so writes only run COUNT(*) when eviction is due
+        self._rows = self._count()
+
+    def get_many(self, namespace: str, keys: Sequence[str]) -> dict[str, list[float]]:
+        if not keys:
+            return {}
+        found: dict[str, list[float]] = {}
+        with self._lock:
+            # Stay under SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE namespace = ? AND key IN ({placeholders})",
+                    (namespace, *chunk),
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = array("f", blob).tolist()
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET used_at = ? WHERE namespace = ? AND key = ?",
+                    [(now, namespace, key) for key in found],
+                )
+        return found
+
+    def set_many(self, namespace: str, items: dict[str, list[float]]) -> None:
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                existing = self._existing_keys(namespace, list(items))
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (namespace, key, vector, used_at) VALUES (?, ?, ?, ?)",
+                    [(namespace, key, array("f", vector).tobytes(), now) for key, vector in items.items()],
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._rows += len(items) - len(existing)
+            if self._rows > self.maxsize:
+                self._evict()
+
+    def _existing_keys(self, namespace: str, keys: list[str]) -> set[str]:
+        found: set[str] = set()
+        # Stay under SQLite's bound-parameter limit
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            found.update(key for (key,) in self._conn.execute(
+                f"SELECT key FROM embeddings WHERE namespace = ? AND key IN ({placeholders})",
+                (namespace, *chunk),
+            ))
+        return found
+
+    def _evict(self) -> None:
+        """Trim to maxsize. Recounts first, since other processes may share the file."""
+        self._rows = self._count()
+        excess = self._rows - self.maxsize
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM embeddings WHERE rowid IN"
+                " (SELECT rowid FROM embeddings ORDER BY used_at LIMIT ?)",
+                (excess,),
+            )
+            self._rows -= excess
+            self.evictions += excess
+
+    def _count(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def size(self) -> int:
+        with self._lock:
+            return self._count()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings")
+            self._rows = 0
+            self.evictions = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class EmbeddingCache:
+    """Two-tier (memory LRU, optional SQLite) cache of embedding vectors.
+
+    One instance can serve several namespaces; hit and miss counters are
+    kept per tier and reported by stats().
+    """
+
+    def __init__(self, maxsize: int, path: str | None = None, disk_maxsize: int = 0):
+        self.maxsize = maxsize
+        self._memory: OrderedDict[tuple[str, str], list[float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk = _SqliteVectorStore(path, disk_maxsize) if path else None
+        self._counts = {"memory_hits": 0, "memory_misses": 0, "memory_evictions": 0, "disk_hits": 0, "disk_misses": 0}
+
+    def get_many(self, namespace: str, texts: Sequence[str]) -> dict[str, list[float]]:
+        """Cached vectors for *texts*, keyed by text. Missing texts are left out."""
+        keys = {text: text_key(text) for text in texts}
+        found: dict[str, list[float]] = {}
+        missing: dict[str, str] = {}
+        with self._lock:
+            for text, key in keys.items():
+                vector = self._memory.get((namespace, key))
+                if vector is None:
+                    missing[key] = text
+                else:
+                    self._memory.move_to_end((namespace, key))
+                    found[text] = vector
+            self._counts["memory_hits"] += len(found)
+            self._counts["memory_misses"] += len(missing)
+
+        if missing and self._disk is not None:
+            from_disk = self._disk.get_many(namespace, list(missing))
+            with self._lock:
+                self._counts["disk_hits"] += len(from_disk)
+                self._counts["disk_misses"] += len(missing) - len(from_disk)
+                for key, vector in from_disk.items():
+                    self._remember((namespace, key), vector)
+            for key, vector in from_disk.items():
+                found[missing[key]] = vector
+        return found
+
+    def set_many(self, namespace: str, vectors: dict[str, list[float]]) -> None:
+        """Store vectors keyed by the text they embed."""
+        items = {text_key(text): vector for text, vector in vectors.items()}
+        with self._lock:
+            for key, vector in items.items():
+                self._remember((namespace, key), vector)
+        if self._disk is not None:
+            self._disk.set_many(namespace, items)
+
+    def _remember(self, key: tuple[str, str], vector: list[float]) -> None:
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+            self._counts["memory_evictions"] += 1
+
+    def stats(self) -> dict[str, CacheStats]:
+        with self._lock:
+            counts = dict(self._counts)
+            memory_size = len(self._memory)
+        stats = {
+            "memory": CacheStats(
+                counts["memory_hits"], counts["memory_misses"], counts["memory_evictions"], memory_size,
+            ),
+        }
+        if self._disk is not None:
+            stats["disk"] = CacheStats(
+                counts["disk_hits"], counts["disk_misses"], self._disk.evictions, self._disk.size(),
+            )
+        return stats
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            for name in self._counts:
+                self._counts[name] = 0
+        if self._disk is not None:
+            self._disk.clear()
+
+    def close(self) -> None:
+        if self._disk is not None:
+            self._disk.close()
+
+
+_cache: EmbeddingCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Process-wide cache configured from settings."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = EmbeddingCache(
+                maxsize=settings.embedding_cache_size,
+                path=settings.embedding_cache_path,
+                disk_maxsize=settings.embedding_cache_disk_size,
+            )
+        return _cache
+
+
+def close_embedding_cache() -> None:
+    global _cache
+    with _cache_lock:
+        cache, _cache = _cache, None
+    if cache is not None:
+        cache.close()
@@ -0,0 +1,188 @@
+"""Streaming document indexing: chunk, embed in batches, upsert to Qdrant.
+
+Documents are read once, as they are produced. Chunks are grouped into
+embedding batches that run on a small thread pool, and each batch is
+upserted (``wait=False``) as soon as its vectors arrive. At most
+``max_in_flight`` batches exist at a time; when that many are pending the
+producer waits for the oldest, so memory stays bounded however large the
+input is.
+"""
+
+import json
+import logging
+import random
+import time
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from uuid import NAMESPACE_URL, uuid5
+
+from qdrant_client.models import PointStruct, SparseVector
+
+from ai.vector_store.qdrant_client import DENSE_VECTOR, SPARSE_VECTOR
+
+logger = logging.getLogger(__name__)
+
+
+def chunk_text(text: str, size: int, overlap: int) -> list[str]:
+    """Split *text* into chunks of at most *size* characters.
+
+    Consecutive chunks share up to *overlap* characters. Cuts are moved back
+    to the last whitespace in the second half of a chunk, and overlaps start
+    after a whitespace, so words are not split where that can be avoided.
+    """
+    if size <= 0:
+        raise ValueError("chunk size must be positive")
+    overlap = max(0, min(overlap, size // 2))
+    text = text.strip()
+    if len(text) <= size:
+        return [text] if text else []
+
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + size, len(text))
+        if end < len(text):
+            cut = text.rfind(" ", start + size // 2, end)
+            if cut != -1:
+                end = cut
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+        if end >= len(text):
+            break
+        next_start = end - overlap
+        space = text.find(" ", next_start, end)
+        if space != -1:
+            next_start = space + 1
+        start = max(next_start, start + 1)
+    return chunks
+
+
+def point_id(payload: dict) -> str:
+    """Deterministic point id, so re-indexing the same chunk overwrites it."""
+    return str(uuid5(NAMESPACE_URL, json.dumps(payload, sort_keys=True, default=str)))
+
+
+def is_rate_limited(exc: Exception) -> bool:
+    """Best-effort detection of provider rate-limit errors (HTTP 429)."""
+    if getattr(exc, "status_code", None) == 429:
+        return True
+    response = getattr(exc, "response", None)
+    if getattr(response, "status_code", None) == 429:
+        return True
+    return "RateLimit" in type(exc).__name__
+
+
+def _retry_after(exc: Exception) -> float | None:
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass(frozen=True)
+class IndexingProgress:
+    documents: int = 0
+    chunks: int = 0
+    indexed: int = 0  # chunks embedded and sent to Qdrant
+
+
+class IndexingPipeline:
+    """Indexes (text, metadata) documents into one workspace collection.
+
+    *embed* turns a list of texts into vectors and *upsert* writes a list of
+    points; both are called from worker threads. With *sparse_encoder* each
+    point also gets a sparse vector of its text for hybrid search. *on_progress* is called
+    from the caller's thread after every completed batch.
+    """
+
+    def __init__(
+        self,
+        embed: Callable[[list[str]], list[list[float]]],
+        upsert: Callable[[list[PointStruct]], None],
+        chunk_size: int,
+        chunk_overlap: int,
+        batch_size: int,
+        concurrency: int,
+        max_retries: int = 5,
+        retry_backoff: float = 1.0,
+        on_progress: Callable[[IndexingProgress], None] | None = None,
+        sparse_encoder: Callable[[str], SparseVector] | None = None,
+    ):
+        self.embed = embed
+        self.upsert = upsert
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.batch_size = max(1, batch_size)
+        self.concurrency = max(1, concurrency)
+        self.max_in_flight = self.concurrency * 2
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.on_progress = on_progress
+        self.sparse_encoder = sparse_encoder
+        self.progress = IndexingProgress()
+
+    def _chunks(self, documents: Iterable[tuple[str, dict]]) -> Iterator[tuple[str, dict]]:
+        for text, metadata in documents:
+            self.progress = replace(self.progress, documents=self.progress.documents + 1)
+            for index, chunk in enumerate(chunk_text(text, self.chunk_size, self.chunk_overlap)):
+                yield chunk, {**metadata, "chunk_index": index}
+
+    def _batches(self, documents: Iterable[tuple[str, dict]]) -> Iterator[list[tuple[str, dict]]]:
+        batch: list[tuple[str, dict]] = []
+        for chunk in self._chunks(documents):
+            batch.append(chunk)
+            if len(batch) == self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _embed_with_retry(self, texts: list[str]) -> list[list[float]]:
+        attempt = 0
+        while True:
+            try:
+                return self.embed(texts)
+            except Exception as exc:
+                if not is_rate_limited(exc) or attempt >= self.max_retries:
+                    raise
+                delay = _retry_after(exc) or random.uniform(0, self.retry_backoff * 2 ** attempt)
+                attempt += 1
+                logger.info("Embeddings rate limited; retry %d in %.1fs", attempt, delay)
+                time.sleep(delay)
+
+    def _process(self, batch: list[tuple[str, dict]]) -> int:
+        vectors = self._embed_with_retry([text for text, _ in batch])
+        points = []
+        for (text, metadata), vector in zip(batch, vectors, strict=True):
+            payload = {"text": text, **metadata}
+            if self.sparse_encoder is not None:
+                vector = {DENSE_VECTOR: vector, SPARSE_VECTOR: self.sparse_encoder(text)}
+            points.append(PointStruct(id=point_id(payload), vector=vector, payload=payload))
+        self.upsert(points)
+        return len(points)
+
+    def _complete(self, future: Future) -> None:
+        count = future.result()
+        self.progress = replace(self.progress, indexed=self.progress.indexed + count)
+        if self.on_progress is not None:
+            self.on_progress(self.progress)
+
+    def run(self, documents: Iterable[tuple[str, dict]]) -> IndexingProgress:
+        pending: deque[Future] = deque()
+        pool = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="rag-index")
+        try:
+            for batch in self._batches(documents):
+                self.progress = replace(self.progress, chunks=self.progress.chunks + len(batch))
+                # Back-pressure: don't read further ahead than max_in_flight batches
+                while len(pending) >= self.max_in_flight:
+                    self._complete(pending.popleft())
+                pending.append(pool.submit(self._process, batch))
+            while pending:
+                self._complete(pending.popleft())
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+        return self.progress
@@ -1,10 +1,14 @@
+import hashlib
+from collections.abc import Hashable, Sequence
 from dataclasses import dataclass
 from enum import Enum
-from typing import Literal
+from typing import Any, Literal
 
 from langchain_core.embeddings import Embeddings
 from langchain_core.language_models import BaseChatModel
+from langchain_core.runnables import Runnable
 
+from core.cache import TTLCache
 from core.config import settings
 
 
@@ -62,6 +66,26 @@ EMBEDDING_MODELS: dict[Provider, list[str]] = {
 }
 
 
+# Settings attributes holding (api key, base url) per provider
+_PROVIDER_CREDENTIALS: dict[Provider, tuple[str, str | None]] = {
+    Provider.OPENAI: ("openai_api_key", "openai_base_url"),
+    Provider.ANTHROPIC: ("anthropic_api_key", None),
+    Provider.GEMINI: ("gemini_api_key", None),
+    Provider.GROK: ("grok_api_key", "grok_base_url"),
+    Provider.DEEPSEEK: ("deepseek_api_key", "deepseek_base_url"),
+}
+
+# Model instances are reused so their HTTP connection pools (and TLS
+# sessions) outlive a single request. Tool-bound variants are cached
+# separately, keyed by the caller's tool-set key.
+_chat_models: TTLCache[tuple, BaseChatModel] = TTLCache(
+    maxsize=settings.chat_model_cache_size, ttl=settings.chat_model_cache_ttl,
+)
+_bound_chat_models: TTLCache[tuple, Runnable] = TTLCache(
+    maxsize=settings.chat_model_tools_cache_size, ttl=settings.chat_model_cache_ttl,
+)
+
+
 @dataclass
 class AgentModelConfig:
     mode: ModelSelectionMode = ModelSelectionMode.AUTO
@@ -144,18 +168,59 @@ def create_chat_model(provider: Provider, model_name: str | None = None) -> Base
     raise ValueError(f"Unsupported provider {provider}")
 
 
-def get_chat_model(config: AgentModelConfig | None = None) -> BaseChatModel:
+def _chat_model_cache_key(provider: Provider, model_name: str | None) -> tuple:
+    key_attr, url_attr = _PROVIDER_CREDENTIALS[provider]
+    api_key = getattr(settings, key_attr) or ""
+    base_url = getattr(settings, url_attr) if url_attr else None
+    key_fingerprint = hashlib.sha256(api_key.encode()).hexdigest()[:16]
+    name = model_name or get_default_llm_model(provider).name
+    return (provider.value, name, base_url, key_fingerprint)
+
+
+def get_chat_model(
+    config: AgentModelConfig | None = None,
+    tools: Sequence[Any] | None = None,
+    tools_key: Hashable | None = None,
+) -> BaseChatModel | Runnable:
+    """Return a shared chat model for *config*, optionally with *tools* bound.
+
+    Pass *tools_key* (any hashable identifying the tool set and schemas) to
+    reuse the bound variant as well; without it tools are bound per call.
+    """
     cfg = config or AgentModelConfig()
     if cfg.mode == ModelSelectionMode.MANUAL:
         if not cfg.provider or not cfg.model:
             raise ValueError("Manual mode requires provider and model")
-        return create_chat_model(cfg.provider, cfg.model)
-    provider_value: Literal["openai", "anthropic", "gemini", "grok", "deepseek"] = settings.llm_provider.lower()  # type: ignore[assignment]
-    provider = Provider(provider_value)
-    return create_chat_model(provider, cfg.model)
+        provider = cfg.provider
+    else:
+        provider_value: Literal["openai", "anthropic", "gemini", "grok", "deepseek"] = settings.llm_provider.lower()  # type: ignore[assignment]
+        provider = Provider(provider_value)
+
+    key = _chat_model_cache_key(provider, cfg.model)
+    model = _chat_models.get(key)
+    if model is None:
+        model = create_chat_model(provider, cfg.model)
+        _chat_models.set(key, model)
+
+    if not tools:
+        return model
+    if tools_key is None:
+        return model.bind_tools(tools)
+    bound = _bound_chat_models.get((key, tools_key))
+    if bound is None:
+        bound = model.bind_tools(tools)
+        _bound_chat_models.set((key, tools_key), bound)
+    return bound
+
+
+def clear_chat_model_cache() -> None:
+    _chat_models.clear()
+    _bound_chat_models.clear()
 
 
 def create_embeddings_model(provider: Provider, model_name: str | None = None) -> Embeddings:
+    if settings.embeddings_reduce_dimensions and provider != Provider.OPENAI:
+        raise RuntimeError(f"Reduced embedding dimensions are not supported for {provider.value}")
     if provider == Provider.OPENAI:
         from langchain_openai import OpenAIEmbeddings
 
@@ -166,6 +231,7 @@ def create_embeddings_model(provider: Provider, model_name: str | None = None) -
             model=name,
             api_key=settings.openai_api_key,
             base_url=settings.openai_base_url,
+            dimensions=settings.qdrant_vector_size if settings.embeddings_reduce_dimensions else None,
         )
     if provider == Provider.ANTHROPIC:
         from langchain_anthropic import AnthropicEmbeddings
@@ -195,3 +261,17 @@ def get_embeddings_model() -> Embeddings:
     provider = Provider(provider_value)
     return create_embeddings_model(provider)
 
+
+def get_embeddings_model_id() -> str:
+    """'{provider}:{model}' of the configured embeddings model, e.g. for cache namespaces.
+
+    Reduced-dimension output is a different vector space, so the
+    dimension count is appended ('openai:text-embedding-3-large@256').
+    """
+    provider = Provider(settings.embeddings_provider.lower())
+    name = settings.embeddings_model or EMBEDDING_MODELS.get(provider, [""])[0]
+    model_id = f"{provider.value}:{name}"
+    if settings.embeddings_reduce_dimensions:
+        model_id += f"@{settings.qdrant_vector_size}"
+    return model_id
+
@@ -1,49 +1,86 @@
-from collections.abc import Iterable
+import asyncio
+from collections.abc import Callable, Iterable
 from typing import Protocol
-from uuid import UUID, uuid4
+from uuid import UUID
 
-from qdrant_client.models import PointStruct
+from qdrant_client.models import PayloadSchemaType
 
 from ai.vector_store.qdrant_client import (
+    aensure_payload_indexes,
+    asearch_workspace_points,
+    aworkspace_collection_hybrid,
+    ensure_payload_indexes,
     ensure_workspace_collection,
+    get_async_qdrant_client,
     get_qdrant_client,
     upsert_workspace_points,
     search_workspace_points,
+    workspace_collection_hybrid,
 )
-from ai.models import get_embeddings_model
+from ai.embedding_cache import EmbeddingCache, get_embedding_cache
+from ai.indexing import IndexingPipeline, IndexingProgress
+from ai.models import get_embeddings_model, get_embeddings_model_id
+from ai.sparse import encode_document, encode_query
+from core.config import settings
 
 
 class EmbeddingProvider(Protocol):
     def embed(self, texts: list[str]) -> list[list[float]]:
         ...
 
+    async def aembed(self, texts: list[str]) -> list[list[float]]:
+        ...
+
+
+# Chunk metadata that searches may filter on (workspace_filter keys);
+# each gets a payload index so filtered searches don't scan segments.
+FILTERABLE_FIELDS: dict[str, PayloadSchemaType] = {
+    "appId": PayloadSchemaType.KEYWORD,
+    "docId": PayloadSchemaType.KEYWORD,
+    "type": PayloadSchemaType.KEYWORD,
+    "chunk_index": PayloadSchemaType.INTEGER,
+}
+
 
 class RagService:
-    def __init__(self, embedding_provider: EmbeddingProvider, vector_size: int):
+    def __init__(
+        self,
+        embedding_provider: EmbeddingProvider,
+        vector_size: int,
+        filterable_fields: dict[str, PayloadSchemaType] | None = None,
+    ):
         self.embedding_provider = embedding_provider
         self.vector_size = vector_size
+        self.filterable_fields = FILTERABLE_FIELDS if filterable_fields is None else filterable_fields
 
     def index_documents(
         self,
         workspace_id: UUID,
         documents: Iterable[tuple[str, dict]],
-    ) -> None:
+        on_progress: Callable[[IndexingProgress], None] | None = None,
+    ) -> IndexingProgress:
+        """Chunk, embed and upsert *documents*, reading the iterable once.
+
+        Memory stays bounded by the pipeline's in-flight batches, so
+        *documents* can be a generator over a large knowledge base.
+        Re-indexing an unchanged chunk overwrites its point. Collections
+        with sparse vectors also get each chunk's BM25 term weights.
+        """
         client = get_qdrant_client()
-        ensure_workspace_collection(client, workspace_id, self.vector_size)
-        texts = [text for text, _ in documents]
-        vectors = self.embedding_provider.embed(texts)
-        points: list[PointStruct] = []
-        for (text, metadata), vector in zip(documents, vectors, strict=True):
-            payload = {"text": text}
-            payload.update(metadata)
-            points.append(
-                PointStruct(
-                    id=str(uuid4()),
-                    vector=vector,
-                    payload=payload,
-                )
-            )
-        upsert_workspace_points(client, workspace_id, points)
+        ensure_workspace_collection(client, workspace_id, self.vector_size, self.filterable_fields)
+        hybrid = workspace_collection_hybrid(client, workspace_id)
+        pipeline = IndexingPipeline(
+            embed=self.embedding_provider.embed,
+            upsert=lambda points: upsert_workspace_points(client, workspace_id, points, wait=False),
+            chunk_size=settings.rag_chunk_size,
+            chunk_overlap=settings.rag_chunk_overlap,
+            batch_size=settings.rag_embed_batch_size,
+            concurrency=settings.rag_index_concurrency,
+            max_retries=settings.rag_embed_max_retries,
+            on_progress=on_progress,
+            sparse_encoder=encode_document if hybrid else None,
+        )
+        return pipeline.run(documents)
 
     def search(
         self,
@@ -52,14 +89,45 @@ class RagService:
         workspace_filter: dict | None = None,
         limit: int = 5,
     ):
+        """Top *limit* chunks for *query*.
+
+        Where the collection stores sparse vectors, dense and keyword
+        matches are fused (RRF) by Qdrant in the same request, so exact
+        identifiers are found even when their embedding is not close.
+        Collections indexed before a field was declared filterable get its
+        payload index on the first search.
+        """
         client = get_qdrant_client()
         query_vector = self.embedding_provider.embed([query])[0]
+        ensure_payload_indexes(client, workspace_id, self.filterable_fields)
+        hybrid = workspace_collection_hybrid(client, workspace_id)
         return search_workspace_points(
             client=client,
             workspace_id=workspace_id,
             vector=query_vector,
             workspace_filter=workspace_filter,
             limit=limit,
+            sparse_vector=encode_query(query) if hybrid else None,
+        )
+
+    async def asearch(
+        self,
+        workspace_id: UUID,
+        query: str,
+        workspace_filter: dict | None = None,
+        limit: int = 5,
+    ):
+        client = get_async_qdrant_client()
+        query_vector = (await self.embedding_provider.aembed([query]))[0]
+        await aensure_payload_indexes(client, workspace_id, self.filterable_fields)
+        hybrid = await aworkspace_collection_hybrid(client, workspace_id)
+        return await asearch_workspace_points(
+            client=client,
+            workspace_id=workspace_id,
+            vector=query_vector,
+            workspace_filter=workspace_filter,
+            limit=limit,
+            sparse_vector=encode_query(query) if hybrid else None,
         )
 
 
@@ -70,8 +138,47 @@ class LangchainEmbeddingProvider:
     def embed(self, texts: list[str]) -> list[list[float]]:
         return self._embeddings.embed_documents(texts)
 
+    async def aembed(self, texts: list[str]) -> list[list[float]]:
+        return await self._embeddings.aembed_documents(texts)
+
+
+class CachedEmbeddingProvider:
+    """Wraps an EmbeddingProvider so only texts missing from the cache are embedded.
+
+    *namespace* must identify the wrapped provider's model, since vectors
+    from different models are not interchangeable.
+    """
+
+    def __init__(self, provider: EmbeddingProvider, cache: EmbeddingCache, namespace: str):
+        self.provider = provider
+        self.cache = cache
+        self.namespace = namespace
+
+    def _missing(self, texts: list[str], cached: dict[str, list[float]]) -> list[str]:
+        return list(dict.fromkeys(text for text in texts if text not in cached))
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        vectors = self.cache.get_many(self.namespace, texts)
+        missing = self._missing(texts, vectors)
+        if missing:
+            fresh = dict(zip(missing, self.provider.embed(missing), strict=True))
+            self.cache.set_many(self.namespace, fresh)
+            vectors.update(fresh)
+        return [vectors[text] for text in texts]
+
+    async def aembed(self, texts: list[str]) -> list[list[float]]:
+        vectors = await asyncio.to_thread(self.cache.get_many, self.namespace, texts)
+        missing = self._missing(texts, vectors)
+        if missing:
+            fresh = dict(zip(missing, await self.provider.aembed(missing), strict=True))
+            await asyncio.to_thread(self.cache.set_many, self.namespace, fresh)
+            vectors.update(fresh)
+        return [vectors[text] for text in texts]
+
 
 def create_rag_service(vector_size: int) -> RagService:
-    provider = LangchainEmbeddingProvider()
+    provider: EmbeddingProvider = LangchainEmbeddingProvider()
+    if settings.embedding_cache_size > 0 or settings.embedding_cache_path:
+        provider = CachedEmbeddingProvider(provider, get_embedding_cache(), get_embeddings_model_id())
     return RagService(embedding_provider=provider, vector_size=vector_size)
 
@@ -0,0 +1,63 @@
+"""Local BM25-style sparse vectors for keyword matching in Qdrant.
+
+Tokens are hashed into the sparse index space, so no vocabulary or model
+has to be shipped or fetched. Document values carry BM25's saturated term
+frequency with length normalisation; query values are 1 per distinct
+token. The IDF half of BM25 is computed by Qdrant itself from the
+collection's statistics (``Modifier.IDF`` on the sparse vector config).
+
+Identifiers such as ``TASK-123``, ``user_service.py`` or ``ERR_TIMEOUT``
+are kept whole as one token and also split into their parts, so both the
+exact identifier and its pieces can match.
+"""
+
+import re
+import zlib
+from collections import Counter
+
+from qdrant_client.models import SparseVector
+
+# BM25 term-frequency saturation and length normalisation
+K1 = 1.2
+B = 0.75
+AVG_DOC_TOKENS = 256
+
+_TOKEN_RE = re.compile(r"[0-9a-z]+(?:[-_.:/#][0-9a-z]+)*")
+_PART_RE = re.compile(r"[-_.:/#]")
+
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have in is it its of on or that the this to was were will with".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    tokens: list[str] = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        parts = _PART_RE.split(token)
+        if len(parts) > 1:
+            tokens.append(token)
+            tokens.extend(part for part in parts if part not in STOPWORDS)
+        elif token not in STOPWORDS:
+            tokens.append(token)
+    return tokens
+
+
+def token_index(token: str) -> int:
+    return zlib.crc32(token.encode())
+
+
+def encode_document(text: str) -> SparseVector:
+    """BM25 term weights of *text* (without IDF, which Qdrant applies)."""
+    tokens = tokenize(text)
+    norm = K1 * (1 - B + B * len(tokens) / AVG_DOC_TOKENS)
+    weights: dict[int, float] = {}
+    for token, tf in Counter(tokens).items():
+        index = token_index(token)
+        # Hash collisions just add up, like a repeated term would
+        weights[index] = weights.get(index, 0.0) + tf * (K1 + 1) / (tf + norm)
+    return SparseVector(indices=list(weights), values=list(weights.values()))
+
+
+def encode_query(text: str) -> SparseVector:
+    indices = sorted({token_index(token) for token in tokenize(text)})
+    return SparseVector(indices=indices, values=[1.0] * len(indices))
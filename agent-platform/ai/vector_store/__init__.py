@@ -1,7 +1,17 @@
 from .qdrant_client import (
     get_qdrant_client,
+    get_async_qdrant_client,
+    close_qdrant_clients,
+    workspace_collection_name,
     ensure_workspace_collection,
+    clear_known_collections,
+    workspace_collection_hybrid,
+    aworkspace_collection_hybrid,
+    ensure_payload_indexes,
+    aensure_payload_indexes,
+    delete_workspace_collection,
     upsert_workspace_points,
     search_workspace_points,
+    asearch_workspace_points,
 )
 
@@ -1,39 +1,412 @@
-from qdrant_client import QdrantClient
-from qdrant_client.models import Filter, FieldCondition, MatchValue, PointStruct, VectorParams, Distance
+import logging
+import threading
+from collections.abc import Mapping
+from dataclasses import dataclass, replace
+from uuid import NAMESPACE_URL, uuid5
+
+import httpx
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from qdrant_client.models import (
+    BinaryQuantization,
+    BinaryQuantizationConfig,
+    Distance,
+    FieldCondition,
+    Filter,
+    FilterSelector,
+    Fusion,
+    FusionQuery,
+    HnswConfigDiff,
+    KeywordIndexParams,
+    KeywordIndexType,
+    MatchValue,
+    Modifier,
+    PayloadSchemaType,
+    PointStruct,
+    Prefetch,
+    QuantizationSearchParams,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    SearchParams,
+    SparseVector,
+    SparseVectorParams,
+    VectorParams,
+)
 
 from core.config import settings
 
+logger = logging.getLogger(__name__)
+
+# Payload field holding the owning workspace in the shared (multi-tenant) collection
+TENANT_FIELD = "workspace_id"
+
+# Named vectors: the dense embedding is the collection's default vector
+DENSE_VECTOR = ""
+SPARSE_VECTOR = "sparse"
+
+
+_client: QdrantClient | None = None
+_async_client: AsyncQdrantClient | None = None
+_client_lock = threading.Lock()
+
+
+
+@dataclass(frozen=True)
+class _CollectionState:
+    hybrid: bool  # stores sparse vectors
+    indexed: frozenset[str] = frozenset()  # payload fields with an index
+
+
+# Collections this process has seen exist; checked before any metadata RPC
+_known_collections: dict[str, _CollectionState] = {}
+_known_lock = threading.Lock()
+
+
+def _client_options() -> dict:
+    options = {
+        "url": settings.qdrant_url,
+        "api_key": settings.qdrant_api_key,
+        "timeout": settings.qdrant_timeout,
+        "prefer_grpc": settings.qdrant_prefer_grpc,
+        "grpc_port": settings.qdrant_grpc_port,
+    }
+    if settings.qdrant_prefer_grpc:
+        options["grpc_options"] = {
+            "grpc.keepalive_time_ms": int(settings.qdrant_keepalive_expiry * 1000),
+        }
+    else:
+        options["limits"] = httpx.Limits(
+            max_connections=settings.qdrant_pool_size,
+            max_keepalive_connections=settings.qdrant_pool_size,
+            keepalive_expiry=settings.qdrant_keepalive_expiry,
+        )
+    return options
+
 
 def _build_qdrant_client() -> QdrantClient:
-    return QdrantClient(
-        url=settings.qdrant_url,
-        api_key=settings.qdrant_api_key,
-        prefer_grpc=False,
-    )
+    return QdrantClient(**_client_options())
+
+
+def _build_async_qdrant_client() -> AsyncQdrantClient:
+    return AsyncQdrantClient(**_client_options())
 
 
 def get_qdrant_client() -> QdrantClient:
-    return _build_qdrant_client()
+    """Process-wide sync client; connections are pooled across calls."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = _build_qdrant_client()
+    return _client
+
+
+def get_async_qdrant_client() -> AsyncQdrantClient:
+    """Process-wide async client; connections are pooled across calls."""
+    global _async_client
+    if _async_client is None:
+        with _client_lock:
+            if _async_client is None:
+                _async_client = _build_async_qdrant_client()
+    return _async_client
+
+
+async def close_qdrant_clients() -> None:
+    global _client, _async_client
+    with _client_lock:
+        client, async_client = _client, _async_client
+        _client = _async_client = None
+    if client is not None:
+        client.close()
+    if async_client is not None:
+        await async_client.close()
+
+
+def workspace_collection_name(workspace_id: str) -> str:
+    if settings.qdrant_multitenant:
+        return settings.qdrant_shared_collection
+    return f"workspace_{workspace_id}"
+
+
+def _tenant_condition(workspace_id: str) -> FieldCondition:
+    return FieldCondition(key=TENANT_FIELD, match=MatchValue(value=str(workspace_id)))
+
+
+def clear_known_collections() -> None:
+    with _known_lock:
+        _known_collections.clear()
+
+
+def _known_state(collection_name: str) -> _CollectionState | None:
+    with _known_lock:
+        return _known_collections.get(collection_name)
+
+
+def _remember_collection(collection_name: str, state: _CollectionState) -> None:
+    with _known_lock:
+        _known_collections[collection_name] = state
+
+
+def _forget_collection(collection_name: str) -> None:
+    with _known_lock:
+        _known_collections.pop(collection_name, None)
+
+
+def _state_from_info(info) -> _CollectionState:
+    return _CollectionState(
+        hybrid=SPARSE_VECTOR in (info.config.params.sparse_vectors or {}),
+        indexed=frozenset(info.payload_schema or {}),
+    )
+
+
+def _collection_state(client: QdrantClient, collection_name: str) -> _CollectionState:
+    state = _known_state(collection_name)
+    if state is None:
+        state = _state_from_info(client.get_collection(collection_name))
+        _remember_collection(collection_name, state)
+    return state
+
+
+async def _acollection_state(client: AsyncQdrantClient, collection_name: str) -> _CollectionState:
+    state = _known_state(collection_name)
+    if state is None:
+        state = _state_from_info(await client.get_collection(collection_name))
+        _remember_collection(collection_name, state)
+    return state
+
+
+def workspace_collection_hybrid(client: QdrantClient, workspace_id: str) -> bool:
+    """Whether the workspace's collection stores sparse vectors for hybrid search.
+
+    Collections created before hybrid search was enabled have none. The
+    answer is remembered with the collection, so only the first call per
+    process may ask Qdrant.
+    """
+    return _collection_state(client, workspace_collection_name(workspace_id)).hybrid
+
+
+async def aworkspace_collection_hybrid(client: AsyncQdrantClient, workspace_id: str) -> bool:
+    return (await _acollection_state(client, workspace_collection_name(workspace_id))).hybrid
+
+
+def ensure_payload_indexes(
+    client: QdrantClient,
+    workspace_id: str,
+    fields: Mapping[str, PayloadSchemaType],
+) -> None:
+    """Create any of *fields*' payload indexes the workspace's collection lacks.
 
+    Indexes already known to exist cost nothing. Missing ones on a populated
+    collection are built by Qdrant in the background (``wait=False``).
+    """
+    collection_name = workspace_collection_name(workspace_id)
+    state = _collection_state(client, collection_name)
+    missing = {name: schema for name, schema in fields.items() if name not in state.indexed}
+    for name, schema in missing.items():
+        client.create_payload_index(
+            collection_name=collection_name, field_name=name, field_schema=schema, wait=False,
+        )
+    if missing:
+        _remember_collection(collection_name, replace(state, indexed=state.indexed.union(missing)))
 
-def ensure_workspace_collection(client: QdrantClient, workspace_id: str, vector_size: int) -> None:
-    collection_name = f"workspace_{workspace_id}"
-    collections = client.get_collections()
-    if any(c.name == collection_name for c in collections.collections):
+
+async def aensure_payload_indexes(
+    client: AsyncQdrantClient,
+    workspace_id: str,
+    fields: Mapping[str, PayloadSchemaType],
+) -> None:
+    collection_name = workspace_collection_name(workspace_id)
+    state = await _acollection_state(client, collection_name)
+    missing = {name: schema for name, schema in fields.items() if name not in state.indexed}
+    for name, schema in missing.items():
+        await client.create_payload_index(
+            collection_name=collection_name, field_name=name, field_schema=schema, wait=False,
+        )
+    if missing:
+        _remember_collection(collection_name, replace(state, indexed=state.indexed.union(missing)))
+
+
+def _quantization_config() -> ScalarQuantization | BinaryQuantization | None:
+    if settings.qdrant_quantization == "scalar":
+        return ScalarQuantization(
+            scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True),
+        )
+    if settings.qdrant_quantization == "binary":
+        return BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=True))
+    return None
+
+
+def _hnsw_config() -> HnswConfigDiff | None:
+    if settings.qdrant_multitenant:
+        # Shared collection: no global HNSW graph (m=0), one small graph per
+        # tenant (payload_m) built from the is_tenant index on workspace_id,
+        # which also keeps each workspace's points together on disk.
+        return HnswConfigDiff(
+            m=0, payload_m=settings.qdrant_hnsw_m or 16, ef_construct=settings.qdrant_hnsw_ef_construct,
+        )
+    if settings.qdrant_hnsw_m is None and settings.qdrant_hnsw_ef_construct is None:
+        return None
+    return HnswConfigDiff(m=settings.qdrant_hnsw_m, ef_construct=settings.qdrant_hnsw_ef_construct)
+
+
+def _search_params() -> SearchParams | None:
+    quantization = None
+    if settings.qdrant_quantization:
+        quantization = QuantizationSearchParams(
+            rescore=settings.qdrant_quantization_rescore,
+            oversampling=settings.qdrant_quantization_oversampling,
+        )
+    if quantization is None and settings.qdrant_search_ef is None:
+        return None
+    return SearchParams(hnsw_ef=settings.qdrant_search_ef, quantization=quantization)
+
+
+def _sparse_vectors_config() -> dict[str, SparseVectorParams] | None:
+    if not settings.qdrant_hybrid_search:
+        return None
+    # Points carry BM25 term weights; Qdrant supplies the IDF from collection statistics
+    return {SPARSE_VECTOR: SparseVectorParams(modifier=Modifier.IDF)}
+
+
+def _create_collection(client: QdrantClient, collection_name: str, vector_size: int) -> bool:
+    """Create *collection_name*; returns False if another caller created it first."""
+    try:
+        client.create_collection(
+            collection_name=collection_name,
+            vectors_config=VectorParams(
+                size=vector_size,
+                distance=Distance.COSINE,
+                on_disk=settings.qdrant_on_disk_vectors or None,
+            ),
+            sparse_vectors_config=_sparse_vectors_config(),
+            hnsw_config=_hnsw_config(),
+            quantization_config=_quantization_config(),
+            on_disk_payload=settings.qdrant_on_disk_payload or None,
+        )
+    except Exception:
+        # Lost a create race (REST 409, gRPC ALREADY_EXISTS, ...): fine if it now exists
+        if not client.collection_exists(collection_name):
+            raise
+        logger.debug("Collection %s created concurrently", collection_name)
+        return False
+    return True
+
+
+def ensure_workspace_collection(
+    client: QdrantClient,
+    workspace_id: str,
+    vector_size: int,
+    payload_indexes: Mapping[str, PayloadSchemaType] | None = None,
+) -> None:
+    """Create the workspace's collection unless it is known to exist.
+
+    Quantization, on-disk and HNSW settings only take effect here, for new
+    collections; existing ones keep the configuration they were created with.
+    *payload_indexes* are created with a new collection and backfilled on
+    an existing one that lacks them.
+
+    Once a collection has been seen in this process it is remembered, so
+    steady-state calls make no Qdrant request at all. A collection deleted
+    behind the process's back is only noticed after a restart or through
+    delete_workspace_collection().
+    """
+    collection_name = workspace_collection_name(workspace_id)
+    if _known_state(collection_name) is None and not client.collection_exists(collection_name):
+        if _create_collection(client, collection_name, vector_size):
+            indexed = set()
+            if settings.qdrant_multitenant:
+                client.create_payload_index(
+                    collection_name=collection_name,
+                    field_name=TENANT_FIELD,
+                    field_schema=KeywordIndexParams(type=KeywordIndexType.KEYWORD, is_tenant=True),
+                )
+                indexed.add(TENANT_FIELD)
+            for name, schema in (payload_indexes or {}).items():
+                client.create_payload_index(collection_name=collection_name, field_name=name, field_schema=schema)
+                indexed.add(name)
+            _remember_collection(
+                collection_name, _CollectionState(hybrid=settings.qdrant_hybrid_search, indexed=frozenset(indexed)),
+            )
+            return
+    if payload_indexes:
+        ensure_payload_indexes(client, workspace_id, payload_indexes)
+    else:
+        _collection_state(client, collection_name)
+
+
+def delete_workspace_collection(client: QdrantClient, workspace_id: str) -> None:
+    """Remove a workspace's vectors: its collection, or its points in the shared one."""
+    collection_name = workspace_collection_name(workspace_id)
+    if not settings.qdrant_multitenant:
+        client.delete_collection(collection_name)
+        _forget_collection(collection_name)
         return
-    client.create_collection(
+    client.delete(
         collection_name=collection_name,
-        vectors_config=VectorParams(size=vector_size, distance=Distance.COSINE),
+        points_selector=FilterSelector(filter=Filter(must=[_tenant_condition(workspace_id)])),
     )
 
 
+def _tenant_points(workspace_id: str, points: list[PointStruct]) -> list[PointStruct]:
+    """Tag points with their workspace and scope their ids to it.
+
+    Ids are re-derived per workspace so identical content indexed by two
+    workspaces never overwrites the other's point.
+    """
+    return [
+        PointStruct(
+            id=str(uuid5(NAMESPACE_URL, f"{workspace_id}/{point.id}")),
+            vector=point.vector,
+            payload={**(point.payload or {}), TENANT_FIELD: str(workspace_id)},
+        )
+        for point in points
+    ]
+
+
 def upsert_workspace_points(
     client: QdrantClient,
     workspace_id: str,
     points: list[PointStruct],
+    wait: bool = True,
 ) -> None:
-    collection_name = f"workspace_{workspace_id}"
-    client.upsert(collection_name=collection_name, points=points)
+    collection_name = workspace_collection_name(workspace_id)
+    if settings.qdrant_multitenant:
+        points = _tenant_points(workspace_id, points)
+    client.upsert(collection_name=collection_name, points=points, wait=wait)
+
+
+def _build_search_filter(workspace_filter: dict | None, workspace_id: str | None = None) -> Filter | None:
+    must_conditions: list[FieldCondition] = []
+    if settings.qdrant_multitenant and workspace_id is not None:
+        must_conditions.append(_tenant_condition(workspace_id))
+    workspace_filter = workspace_filter or {}
+    for key, value in workspace_filter.items():
+        must_conditions.append(FieldCondition(key=key, match=MatchValue(value=value)))
+    return Filter(must=must_conditions) if must_conditions else None
+
+
+def _query_kwargs(
+    workspace_id: str,
+    vector: list[float],
+    workspace_filter: dict | None,
+    limit: int,
+    sparse_vector: SparseVector | None,
+) -> dict:
+    query_filter = _build_search_filter(workspace_filter, workspace_id)
+    if sparse_vector is None or not sparse_vector.indices:
+        return {"query": vector, "query_filter": query_filter, "search_params": _search_params(), "limit": limit}
+    # Hybrid: dense and sparse candidates fused by reciprocal rank in one
+    # request; the top-level filter also applies to both prefetches.
+    prefetch_limit = max(limit, settings.qdrant_hybrid_prefetch)
+    return {
+        "prefetch": [
+            Prefetch(query=vector, params=_search_params(), limit=prefetch_limit),
+            Prefetch(query=sparse_vector, using=SPARSE_VECTOR, limit=prefetch_limit),
+        ],
+        "query": FusionQuery(fusion=Fusion.RRF),
+        "query_filter": query_filter,
+        "limit": limit,
+    }
 
 
 def search_workspace_points(
@@ -42,15 +415,26 @@ def search_workspace_points(
     vector: list[float],
     workspace_filter: dict | None = None,
     limit: int = 10,
+    sparse_vector: SparseVector | None = None,
 ):
-    collection_name = f"workspace_{workspace_id}"
-    must_conditions: list[FieldCondition] = []
-    workspace_filter = workspace_filter or {}
-    for key, value in workspace_filter.items():
-        must_conditions.append(FieldCondition(key=key, match=MatchValue(value=value)))
-    return client.search(
-        collection_name=collection_name,
-        query_vector=vector,
-        query_filter=Filter(must=must_conditions) if must_conditions else None,
-        limit=limit,
+    """Nearest points to *vector*, fused with *sparse_vector* matches when given."""
+    response = client.query_points(
+        collection_name=workspace_collection_name(workspace_id),
+        **_query_kwargs(workspace_id, vector, workspace_filter, limit, sparse_vector),
+    )
+    return response.points
+
+
+async def asearch_workspace_points(
+    client: AsyncQdrantClient,
+    workspace_id: str,
+    vector: list[float],
+    workspace_filter: dict | None = None,
+    limit: int = 10,
+    sparse_vector: SparseVector | None = None,
+):
+    response = await client.query_points(
+        collection_name=workspace_collection_name(workspace_id),
+        **_query_kwargs(workspace_id, vector, workspace_filter, limit, sparse_vector),
     )
+    return response.points
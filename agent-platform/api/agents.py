@@ -213,7 +213,7 @@ def get_agent(
 ) -> AgentResponse:
     db = get_firestore_client()
     policy = PolicyEngine(db)
-    agent_data = policy.assert_agent_access(current_user.firebase_uid, agent_id)
+    agent_data = policy.get_accessible_agent(current_user.firebase_uid, agent_id)
     agent_data["id"] = agent_id
     return _to_response(agent_data)
 
@@ -42,7 +42,7 @@ class PlanExecuteResponse(BaseModel):
 
 
 def _validate_session_ownership(db, session_id: str, firebase_uid: str) -> dict:
-    data = session_service.get_session(db, session_id)
+    data = session_service.get_session(db, session_id, include_messages=False)
     if data.get("userId") != firebase_uid:
         raise ForbiddenError("You do not own this session")
     return data
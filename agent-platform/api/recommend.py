@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 
 from core.firestore import get_firestore_client
@@ -32,16 +33,18 @@ def get_prompt_types() -> list[str]:
 
 
 @router.post("", response_model=RecommendResponse)
-def recommend(
+async def recommend(
     payload: RecommendRequest,
     current_user: AuthedUser = Depends(get_current_user),
 ) -> RecommendResponse:
     db = get_firestore_client()
     policy = PolicyEngine(db)
-    policy.assert_workspace_owner(current_user.firebase_uid, payload.workspace_id)
+    await run_in_threadpool(
+        policy.assert_workspace_owner, current_user.firebase_uid, payload.workspace_id,
+    )
 
     # Validate agent belongs to workspace
-    agent_data = agent_service.get_agent(db, payload.agent_id)
+    agent_data = await run_in_threadpool(agent_service.get_agent, db, payload.agent_id)
     if agent_data.get("workspaceId") != payload.workspace_id:
         raise AppError(
             code="AGENT_WORKSPACE_MISMATCH",
@@ -57,7 +60,7 @@ def recommend(
 
     # Call LLM
     chat_service = ChatService()
-    response_text, model_used = chat_service.chat(
+    response_text, model_used = await chat_service.achat(
         agent_data=agent_data,
         message=prompt,
     )
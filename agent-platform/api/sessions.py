@@ -1,6 +1,11 @@
 """Session API endpoints."""
 
-from fastapi import APIRouter, Depends, Query, status
+import json
+from collections.abc import AsyncIterator
+
+from fastapi import APIRouter, Depends, Query, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
 from core.exceptions import AppError, ForbiddenError
@@ -15,6 +20,8 @@ from services import session_service
 
 router = APIRouter(prefix="/sessions", tags=["sessions"])
 
+NEXT_PAGE_TOKEN_HEADER = "X-Next-Page-Token"
+
 
 # --- Request / Response Models ---
 
@@ -69,6 +76,11 @@ class SessionListItem(BaseModel):
     updated_at: str | None
 
 
+class MessagePageResponse(BaseModel):
+    messages: list[MessageResponse]
+    next_cursor: int | None = None
+
+
 class ToolCallTrace(BaseModel):
     tool_id: str
     args: dict
@@ -115,12 +127,6 @@ def _to_session_response(data: dict) -> SessionResponse:
 
 
 def _to_list_item(data: dict) -> SessionListItem:
-    messages = data.get("messages", [])
-    last_preview = None
-    if messages:
-        last_msg = messages[-1]
-        content = last_msg.get("content", "")
-        last_preview = content[:100] + "..." if len(content) > 100 else content
     created_at = data.get("createdAt")
     updated_at = data.get("updatedAt")
     return SessionListItem(
@@ -129,13 +135,134 @@ def _to_list_item(data: dict) -> SessionListItem:
         agent_id=data.get("agentId", ""),
         title=data.get("title"),
         status=data.get("status", "active"),
-        message_count=len(messages),
-        last_message_preview=last_preview,
+        message_count=data.get("messageCount") or 0,
+        last_message_preview=data.get("lastMessagePreview"),
         created_at=str(created_at) if created_at else None,
         updated_at=str(updated_at) if updated_at else None,
     )
 
 
+def _begin_turn(
+    db,
+    session_id: str,
+    payload: SessionMessageRequest,
+    current_user: AuthedUser,
+) -> tuple[dict, dict, dict, bool]:
+    """Validate the session and store the user message.
+
+    Returns (user_msg, session_data, agent_data, use_tools).
+    """
+    # Validate session ownership and status
+    session_data = session_service.get_session_document(db, session_id)
+    if session_data.get("userId") != current_user.firebase_uid:
+        raise ForbiddenError("You do not own this session")
+    if session_data.get("status") != "active":
+        raise AppError(
+            code="SESSION_NOT_ACTIVE",
+            message="Cannot send messages to a non-active session",
+        )
+
+    # Add user message, plus a title from the first message if none exists,
+    # in one commit — written before the LLM call so it survives a failure
+    with session_service.SessionWriteBuffer(db, session_id) as writes:
+        user_msg = writes.add_message("user", payload.message)
+        if not session_data.get("title"):
+            session_data["title"] = session_service.generate_session_title(payload.message)
+            writes.update({"title": session_data["title"]})
+
+    # History for the LLM, including any unmigrated inline messages
+    session_data["messages"] = session_service.list_messages(
+        db, session_id, legacy=session_data.pop("messages", None),
+    )
+
+    # Load agent config
+    agent_data = agent_service.get_agent(db, session_data["agentId"])
+
+    # Check if agent has tools — use ExecutionService if so, else plain ChatService
+    # Chat-only sessions always skip tools even if agent has them
+    chat_only = session_data.get("metadata", {}).get("chatOnly", False)
+    use_tools = not chat_only and bool(get_agent_tools(agent_data) or agent_data.get("mcpServers"))
+    return user_msg, session_data, agent_data, use_tools
+
+
+def _chat_history(session_data: dict) -> list[dict]:
+    """User/assistant history for ChatService, excluding the just-added user message."""
+    history = []
+    for msg in session_data.get("messages", [])[:-1]:
+        if msg.get("role") in ("user", "assistant"):
+            history.append({"role": msg["role"], "content": msg["content"]})
+    return history
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def _stream_turn(
+    db,
+    session_id: str,
+    payload: SessionMessageRequest,
+    user_msg: dict,
+    session_data: dict,
+    agent_data: dict,
+    use_tools: bool,
+) -> AsyncIterator[str]:
+    yield _sse("user_message", _to_message_response(user_msg).model_dump())
+
+    writes = session_service.SessionWriteBuffer(db, session_id)
+    try:
+        async for chunk in _stream_events(payload, user_msg, session_data, agent_data, use_tools, writes):
+            yield chunk
+    finally:
+        # Tool messages and the assistant reply land in a single commit
+        await run_in_threadpool(writes.flush)
+
+
+async def _stream_events(
+    payload: SessionMessageRequest,
+    user_msg: dict,
+    session_data: dict,
+    agent_data: dict,
+    use_tools: bool,
+    writes: session_service.SessionWriteBuffer,
+) -> AsyncIterator[str]:
+    done: dict = {}
+    try:
+        if use_tools:
+            execution = ExecutionService(writes.db, agent_data, session_data, writes=writes)
+            events = execution.astream(payload.message, context=payload.context)
+        else:
+            events = ChatService().astream(
+                agent_data=agent_data,
+                message=payload.message,
+                history=_chat_history(session_data),
+                context=payload.context,
+            )
+        async for event in events:
+            if event["type"] == "done":
+                done = event
+            else:
+                yield _sse(event["type"], {k: v for k, v in event.items() if k != "type"})
+    except Exception as exc:
+        yield _sse("error", {
+            "code": "LLM_ERROR",
+            "message": f"Failed to get response from AI: {exc}",
+        })
+        return
+
+    assistant_msg = writes.add_message("assistant", done["response"], metadata={"model": done["model"]})
+    final = SessionMessageResponse(
+        user_message=_to_message_response(user_msg),
+        assistant_message=_to_message_response(assistant_msg),
+        model=done["model"],
+        tool_calls=[
+            ToolCallTrace(tool_id=tc["tool_id"], args=tc["args"], result=tc["result"])
+            for tc in done.get("tool_calls", [])
+        ],
+    )
+    yield _sse("message", final.model_dump())
+
+
 # --- Endpoints ---
 
 
@@ -170,17 +297,28 @@ def create_session(
 @router.get("", response_model=list[SessionListItem])
 def list_sessions(
     workspace_id: str,
+    response: Response,
     agent_id: str | None = Query(default=None),
     status_filter: str | None = Query(default=None, alias="status"),
+    limit: int = Query(default=50, ge=1, le=200),
+    page_token: str | None = Query(default=None),
     current_user: AuthedUser = Depends(get_current_user),
 ) -> list[SessionListItem]:
+    """List sessions, most recently updated first.
+
+    When more sessions exist, the ``X-Next-Page-Token`` response header
+    carries the ``page_token`` for the next page.
+    """
     db = get_firestore_client()
     policy = PolicyEngine(db)
     policy.assert_workspace_owner(current_user.firebase_uid, workspace_id)
 
-    sessions = session_service.list_sessions(
+    sessions, next_page_token = session_service.list_sessions(
         db, workspace_id, agent_id=agent_id, status=status_filter,
+        limit=limit, page_token=page_token,
     )
+    if next_page_token:
+        response.headers[NEXT_PAGE_TOKEN_HEADER] = next_page_token
     return [_to_list_item(s) for s in sessions]
 
 
@@ -196,48 +334,51 @@ def get_session(
     return _to_session_response(data)
 
 
-@router.post("/{session_id}/messages", response_model=SessionMessageResponse)
-def send_message(
+@router.get("/{session_id}/messages", response_model=MessagePageResponse)
+def list_messages(
     session_id: str,
-    payload: SessionMessageRequest,
+    limit: int = Query(default=100, ge=1, le=500),
+    after: int | None = Query(default=None, description="Cursor: seq of the last message already loaded"),
     current_user: AuthedUser = Depends(get_current_user),
-) -> SessionMessageResponse:
-    db = get_firestore_client()
+) -> MessagePageResponse:
+    """Page through a session's messages in order.
 
-    # Validate session ownership and status
-    session_data = session_service.get_session(db, session_id)
+    Messages still in an unmigrated inline array come first, with ``seq``
+    equal to their position, so cursors stay valid across the migration.
+    """
+    db = get_firestore_client()
+    session_data = session_service.get_session_document(db, session_id)
     if session_data.get("userId") != current_user.firebase_uid:
         raise ForbiddenError("You do not own this session")
-    if session_data.get("status") != "active":
-        raise AppError(
-            code="SESSION_NOT_ACTIVE",
-            message="Cannot send messages to a non-active session",
-        )
 
-    # Add user message
-    user_msg = session_service.add_message(db, session_id, "user", payload.message)
-
-    # Generate title from first message if none exists
-    if not session_data.get("title"):
-        title = session_service.generate_session_title(payload.message)
-        db.collection("sessions").document(session_id).update({"title": title})
+    messages = session_service.list_messages(
+        db, session_id, limit=limit, after=after, legacy=session_data.get("messages"),
+    )
+    next_cursor = messages[-1]["seq"] if len(messages) == limit else None
+    return MessagePageResponse(
+        messages=[_to_message_response(m) for m in messages],
+        next_cursor=next_cursor,
+    )
 
-    # Reload session to get updated messages
-    session_data = session_service.get_session(db, session_id)
 
-    # Load agent config
-    agent_data = agent_service.get_agent(db, session_data["agentId"])
-
-    # Check if agent has tools — use ExecutionService if so, else plain ChatService
-    # Chat-only sessions always skip tools even if agent has them
-    chat_only = session_data.get("metadata", {}).get("chatOnly", False)
-    agent_tools = get_agent_tools(agent_data)
+@router.post("/{session_id}/messages", response_model=SessionMessageResponse)
+async def send_message(
+    session_id: str,
+    payload: SessionMessageRequest,
+    current_user: AuthedUser = Depends(get_current_user),
+) -> SessionMessageResponse:
+    db = get_firestore_client()
+    user_msg, session_data, agent_data, use_tools = await run_in_threadpool(
+        _begin_turn, db, session_id, payload, current_user,
+    )
 
+    # Tool messages and the assistant reply are committed together
+    writes = session_service.SessionWriteBuffer(db, session_id)
     try:
-        if not chat_only and agent_tools:
+        if use_tools:
             # Tool-augmented execution
-            execution = ExecutionService(db, agent_data, session_data)
-            result = execution.execute(payload.message, context=payload.context)
+            execution = ExecutionService(db, agent_data, session_data, writes=writes)
+            result = await execution.aexecute(payload.message, context=payload.context)
             response_text = result["response"]
             model_used = result["model"]
             tool_call_traces = [
@@ -247,19 +388,16 @@ def send_message(
         else:
             # Simple chat (no tools)
             chat_service = ChatService()
-            session_messages = session_data.get("messages", [])
-            history = []
-            for msg in session_messages[:-1]:
-                if msg.get("role") in ("user", "assistant"):
-                    history.append({"role": msg["role"], "content": msg["content"]})
-            response_text, model_used = chat_service.chat(
+            response_text, model_used = await chat_service.achat(
                 agent_data=agent_data,
                 message=payload.message,
-                history=history,
+                history=_chat_history(session_data),
                 context=payload.context,
             )
             tool_call_traces = []
     except Exception as exc:
+        # Keep whatever tool activity happened before the failure
+        await run_in_threadpool(writes.flush)
         raise AppError(
             code="LLM_ERROR",
             message=f"Failed to get response from AI: {exc}",
@@ -267,10 +405,8 @@ def send_message(
         )
 
     # Add assistant message
-    assistant_msg = session_service.add_message(
-        db, session_id, "assistant", response_text,
-        metadata={"model": model_used},
-    )
+    assistant_msg = writes.add_message("assistant", response_text, metadata={"model": model_used})
+    await run_in_threadpool(writes.flush)
 
     return SessionMessageResponse(
         user_message=_to_message_response(user_msg),
@@ -280,13 +416,36 @@ def send_message(
     )
 
 
+@router.post("/{session_id}/messages/stream")
+async def stream_message(
+    session_id: str,
+    payload: SessionMessageRequest,
+    current_user: AuthedUser = Depends(get_current_user),
+) -> StreamingResponse:
+    """Streaming variant of send_message as Server-Sent Events.
+
+    Events: ``user_message``, ``token``, ``tool_call``, ``tool_result``,
+    then ``message`` (same shape as SessionMessageResponse) or ``error``.
+    Validation errors are raised before the stream starts.
+    """
+    db = get_firestore_client()
+    user_msg, session_data, agent_data, use_tools = await run_in_threadpool(
+        _begin_turn, db, session_id, payload, current_user,
+    )
+    return StreamingResponse(
+        _stream_turn(db, session_id, payload, user_msg, session_data, agent_data, use_tools),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.delete("/{session_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_session(
     session_id: str,
     current_user: AuthedUser = Depends(get_current_user),
 ) -> None:
     db = get_firestore_client()
-    session_data = session_service.get_session(db, session_id)
+    session_data = session_service.get_session(db, session_id, include_messages=False)
     if session_data.get("userId") != current_user.firebase_uid:
         raise ForbiddenError("You do not own this session")
     session_service.delete_session(db, session_id)
@@ -299,7 +458,7 @@ def update_session(
     current_user: AuthedUser = Depends(get_current_user),
 ) -> SessionResponse:
     db = get_firestore_client()
-    session_data = session_service.get_session(db, session_id)
+    session_data = session_service.get_session(db, session_id, include_messages=False)
     if session_data.get("userId") != current_user.firebase_uid:
         raise ForbiddenError("You do not own this session")
 
@@ -8,9 +8,15 @@ from google.cloud.firestore_v1.base_query import FieldFilter
 from core.firestore import get_firestore_client
 from core.exceptions import AppError, NotFoundError
 from services.auth import AuthedUser, get_current_user
+from services import policy_engine
 from services.policy_engine import PolicyEngine
 from services import agents as agent_service
-from ai.vector_store.qdrant_client import get_qdrant_client, ensure_workspace_collection
+from services import session_service
+from ai.vector_store.qdrant_client import (
+    delete_workspace_collection,
+    ensure_workspace_collection,
+    get_qdrant_client,
+)
 from core.config import settings
 
 logger = logging.getLogger(__name__)
@@ -91,9 +97,7 @@ def setup_workspace(
         # Rollback: delete Qdrant collection if created
         if qdrant_collection_created:
             try:
-                qdrant = get_qdrant_client()
-                collection_name = f"workspace_{payload.workspace_id}"
-                qdrant.delete_collection(collection_name)
+                delete_workspace_collection(get_qdrant_client(), payload.workspace_id)
             except Exception:
                 logger.exception("Rollback: failed to delete Qdrant collection for %s", payload.workspace_id)
         raise AppError(
@@ -115,21 +119,15 @@ def teardown_workspace(
 ) -> None:
     """Clean up agent-platform resources for a workspace being deleted.
 
-    Deletes: all agents, all sessions, and the Qdrant collection.
+    Deletes: all agents, all sessions, and the workspace's Qdrant vectors.
     Called by the frontend before deleting the workspace doc from Firestore.
     """
     db = get_firestore_client()
     policy = PolicyEngine(db)
     policy.assert_workspace_owner(current_user.firebase_uid, workspace_id)
 
-    # 1. Delete all sessions for this workspace
-    session_docs = (
-        db.collection("sessions")
-        .where(filter=FieldFilter("workspaceId", "==", workspace_id))
-        .stream()
-    )
-    for doc in session_docs:
-        doc.reference.delete()
+    # 1. Delete all sessions (and their messages) for this workspace
+    session_service.delete_workspace_sessions(db, workspace_id)
 
     # 2. Delete all agents for this workspace
     agent_docs = (
@@ -139,12 +137,12 @@ def teardown_workspace(
     )
     for doc in agent_docs:
         doc.reference.delete()
+        policy_engine.invalidate_agent(doc.id)
+    policy_engine.invalidate_workspace(workspace_id)
 
-    # 3. Delete Qdrant collection (best-effort)
+    # 3. Delete Qdrant vectors (best-effort)
     try:
-        qdrant = get_qdrant_client()
-        collection_name = f"workspace_{workspace_id}"
-        qdrant.delete_collection(collection_name)
+        delete_workspace_collection(get_qdrant_client(), workspace_id)
     except Exception:
         logger.warning("Failed to delete Qdrant collection for workspace %s (may not exist)", workspace_id)
 
@@ -157,7 +155,7 @@ def get_workspace(
     """Get workspace details including agent configuration."""
     db = get_firestore_client()
     policy = PolicyEngine(db)
-    ws_data = policy.assert_workspace_owner(current_user.firebase_uid, workspace_id)
+    ws_data = policy.get_owned_workspace(current_user.firebase_uid, workspace_id)
     return WorkspaceResponse(
         id=workspace_id,
         name=ws_data.get("name", ""),
@@ -0,0 +1,79 @@
+"""Compare ``_make_json_safe`` with the old JSON string round-trip.
+
+Builds pyramid documents shaped like the ones ``pyramids.read`` and
+``pyramids.list`` return (Firestore timestamps, a blocks map, connections,
+context sources) and times both conversions on a single document and on a
+list page.
+
+Usage:
+    python -m benchmarks.json_safe [--blocks 200] [--documents 50] [--repeat 20]
+"""
+
+import argparse
+import json
+import timeit
+from datetime import datetime, timedelta, timezone
+
+from google.api_core.datetime_helpers import DatetimeWithNanoseconds
+
+from tools.handlers import _make_json_safe
+
+
+class _DateTimeEncoder(json.JSONEncoder):
+    def default(self, o):
+        if isinstance(o, datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def round_trip(obj):
+    """The conversion _make_json_safe replaced."""
+    return json.loads(json.dumps(obj, cls=_DateTimeEncoder))
+
+
+def make_pyramid(index: int, blocks: int) -> dict:
+    created = DatetimeWithNanoseconds(2026, 1, 1, tzinfo=timezone.utc) + timedelta(minutes=index)
+    block_map = {
+        f"block-{i}": {
+            "id": f"block-{i}",
+            "type": "question" if i % 2 else "answer",
+            "content": f"Block {i}: " + "why does this approach work better than the alternative? " * 3,
+            "position": {"x": i * 120, "y": (i % 7) * 80},
+            "layer": i % 7,
+            "updatedAt": created + timedelta(seconds=i),
+        }
+        for i in range(blocks)
+    }
+    return {
+        "id": f"pyramid-{index}",
+        "userId": "user-1",
+        "workspaceId": "ws-1",
+        "title": f"Pyramid {index}",
+        "context": "Explore how we should approach authentication for the new API. " * 5,
+        "status": "active",
+        "blocks": block_map,
+        "connections": [{"from": f"block-{i}", "to": f"block-{i + 1}"} for i in range(blocks - 1)],
+        "contextSources": [{"type": "contextDocument", "id": f"doc-{i}", "title": f"Doc {i}"} for i in range(5)],
+        "createdAt": created,
+        "updatedAt": created,
+    }
+
+
+def run(blocks: int, documents: int, repeat: int) -> None:
+    single = make_pyramid(0, blocks)
+    page = [make_pyramid(i, blocks) for i in range(documents)]
+    assert _make_json_safe(page) == round_trip(page)
+
+    for label, payload in (("read (1 document)", single), (f"list ({documents} documents)", page)):
+        old = min(timeit.repeat(lambda: round_trip(payload), number=1, repeat=repeat))
+        new = min(timeit.repeat(lambda: _make_json_safe(payload), number=1, repeat=repeat))
+        print(f"{label:<24} round-trip {old * 1000:8.2f} ms  single-pass {new * 1000:8.2f} ms  ({old / new:.1f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--blocks", type=int, default=200, help="Blocks per pyramid")
+    parser.add_argument("--documents", type=int, default=50, help="Pyramids in the list page")
+    parser.add_argument("--repeat", type=int, default=20, help="Timing runs; the best is reported")
+    args = parser.parse_args()
+    run(args.blocks, args.documents, args.repeat)
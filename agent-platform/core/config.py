@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -17,14 +19,46 @@ class Settings(BaseSettings):
     qdrant_url: str = "http://localhost:6333"
     qdrant_api_key: str | None = None
     qdrant_vector_size: int = 1536  # default embedding dimension
+    qdrant_timeout: int = 10  # seconds per request
+    qdrant_prefer_grpc: bool = False
+    qdrant_grpc_port: int = 6334
+    qdrant_pool_size: int = 20  # max pooled HTTP connections per client
+    qdrant_keepalive_expiry: float = 30.0  # seconds an idle connection is kept open
+    qdrant_multitenant: bool = False  # one shared collection partitioned by workspace_id instead of one per workspace
+    qdrant_shared_collection: str = "workspaces"
+    # Collection storage, applied when a collection is created
+    qdrant_quantization: Literal["scalar", "binary"] | None = None  # int8 (~4x smaller) or 1-bit (~32x) copies kept in RAM
+    qdrant_quantization_rescore: bool = True  # re-rank quantized candidates with the original vectors
+    qdrant_quantization_oversampling: float = 2.0  # candidates fetched per requested result before rescoring
+    qdrant_on_disk_vectors: bool = False  # original vectors memory-mapped from disk; pair with quantization
+    qdrant_on_disk_payload: bool = False
+    qdrant_hnsw_m: int | None = None  # graph edges per node; None = server default
+    qdrant_hnsw_ef_construct: int | None = None  # None = server default
+    qdrant_hybrid_search: bool = True  # new collections also store BM25-style sparse vectors fused with dense results
+    qdrant_hybrid_prefetch: int = 50  # candidates taken from each of the dense and sparse searches before fusion
+    qdrant_search_ef: int | None = None  # HNSW candidate list size at query time; None = server default
 
     # LLM
     llm_provider: str = "anthropic"
     llm_model: str = "claude-3-5-sonnet-20241022"
+    chat_model_cache_size: int = 32  # shared model instances (provider, model, base url, key)
+    chat_model_tools_cache_size: int = 256  # tool-bound variants of those models
+    chat_model_cache_ttl: int = 3600
 
     # Embeddings
     embeddings_provider: str = "anthropic"
     embeddings_model: str = "text-embedding-3-large"
+    embeddings_reduce_dimensions: bool = False  # ask the model for qdrant_vector_size dimensions (text-embedding-3-*)
+    embedding_cache_size: int = 10000  # vectors kept in memory; 0 with no path disables the cache
+    embedding_cache_path: str | None = None  # SQLite file for the on-disk tier; unset = memory only
+    embedding_cache_disk_size: int = 1000000  # max vectors kept on disk
+
+    # RAG indexing
+    rag_chunk_size: int = 2000  # characters per chunk
+    rag_chunk_overlap: int = 200  # characters shared by consecutive chunks
+    rag_embed_batch_size: int = 64  # chunks per embeddings call / upsert
+    rag_index_concurrency: int = 4  # embed+upsert batches in flight at once
+    rag_embed_max_retries: int = 5  # retries of a rate-limited embeddings call
 
     # Provider API keys
     openai_api_key: str | None = None
@@ -36,6 +70,35 @@ class Settings(BaseSettings):
     deepseek_api_key: str | None = None
     deepseek_base_url: str | None = None
 
+    # Auth
+    auth_token_cache_size: int = 10000
+    auth_token_cache_ttl: int = 300  # max seconds a verified ID token is reused; 0 disables the cache
+    auth_check_revoked: bool = False  # also check token revocation (extra Firebase call per cache miss)
+
+    # Ownership cache (PolicyEngine)
+    policy_cache_size: int = 10000
+    policy_cache_ttl: int = 60  # seconds; bounds staleness across instances
+
+    # Execution
+    tool_call_concurrency: int = 4  # max read-only tool calls run at once per turn; 1 = sequential
+
+    # MCP
+    mcp_discovery_timeout: float = 10.0  # seconds allowed for all of an agent's servers to answer tools/list
+    mcp_manifest_ttl: int = 300  # seconds a tools/list manifest is used without revalidating
+    mcp_manifest_max_age: int = 86400  # seconds a stale manifest is kept for ETag revalidation
+    mcp_manifest_cache_size: int = 256
+    mcp_http2: bool = True
+    mcp_pool_size: int = 10  # max pooled connections per MCP server
+    mcp_keepalive_expiry: float = 30.0  # seconds an idle connection is kept open
+    mcp_max_retries: int = 2  # extra attempts for idempotent requests and refused connections
+    mcp_retry_backoff: float = 0.2  # base seconds for jittered exponential backoff
+    mcp_breaker_threshold: int = 5  # consecutive failures before a server's circuit opens
+    mcp_breaker_cooldown: float = 30.0  # seconds an open circuit rejects calls before a trial request
+    mcp_idle_timeout: int = 600  # seconds an unused MCP connection stays in the process-wide registry
+
+    # Sessions
+    session_write_flush_every: int = 0  # checkpoint buffered turn writes every N messages; 0 = turn end only
+
     # CORS
     cors_origins: str = "http://localhost:5173,http://localhost:3000"
 
@@ -1,9 +1,14 @@
+import threading
+
 import firebase_admin
 from firebase_admin import credentials, firestore
 from google.cloud.firestore_v1.client import Client
 
 from .config import settings
 
+_client: Client | None = None
+_client_lock = threading.Lock()
+
 
 def _ensure_firebase_initialized() -> None:
     if firebase_admin._apps:
@@ -16,5 +21,19 @@ def _ensure_firebase_initialized() -> None:
 
 
 def get_firestore_client() -> Client:
-    _ensure_firebase_initialized()
-    return firestore.client()
+    """Process-wide Firestore client; its gRPC channel is shared by all requests."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _ensure_firebase_initialized()
+                _client = firestore.client()
+    return _client
+
+
+def close_firestore_client() -> None:
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
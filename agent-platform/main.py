@@ -1,9 +1,16 @@
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
 from core.config import settings
 from core.exceptions import AppError
+from core.firestore import close_firestore_client, get_firestore_client
+from ai.embedding_cache import close_embedding_cache
+from ai.vector_store.qdrant_client import close_qdrant_clients, get_async_qdrant_client, get_qdrant_client
+from services.mcp_client import close_mcp_connections
 
 from api.workspaces import router as workspaces_router
 from api.agents import router as agents_router
@@ -13,8 +20,30 @@ from api.recommend import router as recommend_router
 from api.sessions import router as sessions_router
 from api.plans import router as plans_router
 
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    """Open the shared Firestore/Qdrant clients up front and close them (and MCP connections) on shutdown."""
+    for name, factory in (
+        ("Firestore", get_firestore_client),
+        ("Qdrant", get_qdrant_client),
+        ("async Qdrant", get_async_qdrant_client),
+    ):
+        try:
+            factory()
+        except Exception:
+            # Not fatal: the client is created lazily on first use instead
+            logger.warning("Could not initialise %s client at startup", name, exc_info=True)
+    yield
+    await close_qdrant_clients()
+    close_mcp_connections()
+    close_embedding_cache()
+    close_firestore_client()
+
 
-app = FastAPI(title="Pyramid Agent Platform", version="2.0.0")
+app = FastAPI(title="Pyramid Agent Platform", version="2.0.0", lifespan=lifespan)
 
 # CORS
 origins = [o.strip() for o in settings.cors_origins.split(",") if o.strip()]
@@ -24,6 +53,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Page-Token"],
 )
 
 
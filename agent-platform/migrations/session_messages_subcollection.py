@@ -0,0 +1,70 @@
+"""Move inline session ``messages`` arrays into the messages subcollection.
+
+Each legacy message becomes ``sessions/{id}/messages/{message_id}`` with a
+``seq`` equal to its position in the old array, so it sorts ahead of any
+message written since the switch. The ``messages`` field is then removed
+from the session document. Re-running is safe: message documents are keyed
+by their original id (or, lacking one, an id derived from the session and
+position) and already-migrated sessions have no array left.
+
+Usage:
+    python -m migrations.session_messages_subcollection [--dry-run]
+"""
+
+import argparse
+import logging
+
+from google.cloud.firestore_v1 import DELETE_FIELD
+from google.cloud.firestore_v1.client import Client
+
+from services.session_service import MAX_BATCH_WRITES, MESSAGES_SUBCOLLECTION, legacy_message_id
+
+logger = logging.getLogger(__name__)
+
+
+def migrate_session(db: Client, session_id: str, messages: list[dict], dry_run: bool = False) -> int:
+    """Copy one session's legacy messages and drop the array. Returns messages moved."""
+    if dry_run:
+        return len(messages)
+
+    session_ref = db.collection("sessions").document(session_id)
+    messages_ref = session_ref.collection(MESSAGES_SUBCOLLECTION)
+    batch = db.batch()
+    pending = 0
+    for index, message in enumerate(messages):
+        doc = {**message, "id": message.get("id") or legacy_message_id(session_id, index), "seq": index}
+        batch.set(messages_ref.document(doc["id"]), doc)
+        pending += 1
+        # Leave room for the final update in the last batch
+        if pending == MAX_BATCH_WRITES - 1:
+            batch.commit()
+            batch = db.batch()
+            pending = 0
+    batch.update(session_ref, {"messages": DELETE_FIELD})
+    batch.commit()
+    return len(messages)
+
+
+def migrate(db: Client, dry_run: bool = False) -> dict:
+    """Migrate every session that still has an inline messages array."""
+    sessions = 0
+    moved = 0
+    for doc in db.collection("sessions").stream():
+        messages = (doc.to_dict() or {}).get("messages")
+        if messages is None:
+            continue
+        moved += migrate_session(db, doc.id, messages, dry_run=dry_run)
+        sessions += 1
+    logger.info("Migrated %d messages across %d sessions (dry_run=%s)", moved, sessions, dry_run)
+    return {"sessions": sessions, "messages": moved}
+
+
+if __name__ == "__main__":
+    from core.firestore import get_firestore_client
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dry-run", action="store_true", help="Count without writing")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    print(migrate(get_firestore_client(), dry_run=args.dry_run))
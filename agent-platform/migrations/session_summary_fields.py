@@ -0,0 +1,59 @@
+"""Backfill ``messageCount``, ``lastMessagePreview`` and ``lastMessageAt`` on sessions.
+
+New message writes keep these fields current; this computes them for
+sessions written before they existed. Counts cover the messages
+subcollection plus any inline legacy array, but run
+``migrations.session_messages_subcollection`` first so the summary is
+taken from one place. Values are recomputed from scratch, so re-running
+is safe; avoid running it while sessions are actively receiving messages.
+
+Usage:
+    python -m migrations.session_summary_fields [--dry-run]
+"""
+
+import argparse
+import logging
+
+from google.cloud.firestore_v1 import Query
+from google.cloud.firestore_v1.client import Client
+
+from services.session_service import MESSAGES_SUBCOLLECTION, message_summary_fields
+
+logger = logging.getLogger(__name__)
+
+
+def summarise_session(db: Client, session_id: str, legacy_messages: list[dict] | None = None) -> dict:
+    """Compute the summary fields for one session."""
+    messages_ref = db.collection("sessions").document(session_id).collection(MESSAGES_SUBCOLLECTION)
+    count = messages_ref.count().get()[0][0].value
+    last = list(messages_ref.order_by("seq", direction=Query.DESCENDING).limit(1).stream())
+    legacy_messages = legacy_messages or []
+    if last:
+        last_message = last[0].to_dict()
+    else:
+        last_message = legacy_messages[-1] if legacy_messages else None
+    return message_summary_fields(int(count) + len(legacy_messages), last_message)
+
+
+def backfill(db: Client, dry_run: bool = False) -> dict:
+    """Recompute summary fields for every session."""
+    sessions = 0
+    for doc in db.collection("sessions").stream():
+        legacy = (doc.to_dict() or {}).get("messages")
+        summary = summarise_session(db, doc.id, legacy)
+        if not dry_run:
+            doc.reference.update(summary)
+        sessions += 1
+    logger.info("Backfilled summary fields on %d sessions (dry_run=%s)", sessions, dry_run)
+    return {"sessions": sessions}
+
+
+if __name__ == "__main__":
+    from core.firestore import get_firestore_client
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dry-run", action="store_true", help="Compute without writing")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    print(backfill(get_firestore_client(), dry_run=args.dry_run))
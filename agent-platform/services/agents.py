@@ -6,6 +6,7 @@ from google.cloud.firestore_v1.base_query import FieldFilter
 from google.cloud.firestore_v1.client import Client
 
 from core.exceptions import ConflictError, NotFoundError
+from services.policy_engine import invalidate_agent
 
 
 DEFAULT_GM_AGENT = {
@@ -121,3 +122,4 @@ def delete_agent(db: Client, agent_id: str) -> None:
     if data.get("isDefault"):
         raise ConflictError("Cannot delete the default agent")
     ref.delete()
+    invalidate_agent(agent_id)
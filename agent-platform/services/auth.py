@@ -1,11 +1,22 @@
+import hashlib
+import time
 from typing import Optional
 
 from fastapi import Header, HTTPException, status
 from firebase_admin import auth as firebase_auth
 from pydantic import BaseModel
 
+from core.cache import TTLCache
+from core.config import settings
 from core.firestore import _ensure_firebase_initialized
 
+# Verified ID tokens, keyed by SHA-256 of the raw token. Entries never
+# outlive the token's own ``exp`` claim.
+_token_cache: TTLCache[str, dict] = TTLCache(
+    maxsize=settings.auth_token_cache_size,
+    ttl=settings.auth_token_cache_ttl,
+)
+
 
 class AuthedUser(BaseModel):
     firebase_uid: str
@@ -20,13 +31,30 @@ def _get_bearer_token(authorization: Optional[str]) -> str:
     return token
 
 
-def get_current_user(authorization: Optional[str] = Header(default=None, convert_underscores=False)) -> AuthedUser:
-    token = _get_bearer_token(authorization)
+def _verify_token(token: str) -> dict:
+    """Verify a Firebase ID token, reusing a recent verification when possible.
+
+    With ``auth_check_revoked`` on, revocation is checked on each cache miss,
+    so a revoked token is rejected at most ``auth_token_cache_ttl`` seconds later.
+    """
+    key = hashlib.sha256(token.encode()).hexdigest()
+    decoded = _token_cache.get(key)
+    if decoded is not None:
+        return decoded
+
     _ensure_firebase_initialized()
     try:
-        decoded = firebase_auth.verify_id_token(token)
+        decoded = firebase_auth.verify_id_token(token, check_revoked=settings.auth_check_revoked)
     except Exception:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired token")
+    expires_in = decoded.get("exp", 0) - time.time()
+    _token_cache.set(key, decoded, ttl=expires_in)
+    return decoded
+
+
+def get_current_user(authorization: Optional[str] = Header(default=None, convert_underscores=False)) -> AuthedUser:
+    token = _get_bearer_token(authorization)
+    decoded = _verify_token(token)
     firebase_uid = decoded.get("uid")
     if not firebase_uid:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token missing uid claim")
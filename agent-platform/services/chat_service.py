@@ -1,3 +1,5 @@
+from collections.abc import AsyncIterator
+
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
 
 from ai.models import AgentModelConfig, ModelSelectionMode, Provider, get_chat_model
@@ -26,6 +28,45 @@ class ChatService:
         content = response.content if isinstance(response.content, str) else str(response.content)
         return content, model_used
 
+    async def achat(
+        self,
+        agent_data: dict,
+        message: str,
+        history: list[dict] | None = None,
+        context: str | None = None,
+    ) -> tuple[str, str]:
+        """Async variant of chat() — awaits the LLM instead of blocking a thread."""
+        config = self._build_model_config(agent_data)
+        llm = get_chat_model(config)
+        messages = self._build_messages(agent_data, message, history, context)
+        response = await llm.ainvoke(messages)
+        model_used = config.model or settings.llm_model
+        return _content_text(response.content), model_used
+
+    async def astream(
+        self,
+        agent_data: dict,
+        message: str,
+        history: list[dict] | None = None,
+        context: str | None = None,
+    ) -> AsyncIterator[dict]:
+        """Stream the LLM response token by token.
+
+        Yields ``{"type": "token", "content"}`` events, then a final
+        ``{"type": "done", "response", "model"}`` event.
+        """
+        config = self._build_model_config(agent_data)
+        llm = get_chat_model(config)
+        messages = self._build_messages(agent_data, message, history, context)
+        model_used = config.model or settings.llm_model
+        parts: list[str] = []
+        async for chunk in llm.astream(messages):
+            text = _content_text(chunk.content)
+            if text:
+                parts.append(text)
+                yield {"type": "token", "content": text}
+        yield {"type": "done", "response": "".join(parts), "model": model_used}
+
     @staticmethod
     def _build_model_config(agent_data: dict) -> AgentModelConfig:
         mode_str = agent_data.get("modelMode", "auto")
@@ -70,3 +111,16 @@ class ChatService:
         # Current user message
         messages.append(HumanMessage(content=message))
         return messages
+
+
+def _content_text(content) -> str:
+    """Extract plain text from a message or chunk content (str or content blocks)."""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(
+            block.get("text", "") if isinstance(block, dict) else str(block)
+            for block in content
+            if not isinstance(block, dict) or block.get("type") == "text"
+        )
+    return str(content)
@@ -1,43 +1,237 @@
 """Agent execution loop — LLM call with tool binding and execution."""
 
+import asyncio
 import json
+from collections.abc import AsyncIterator
+from concurrent.futures import ThreadPoolExecutor
 from uuid import uuid4
 
 from langchain_core.messages import (
     AIMessage, HumanMessage, SystemMessage, ToolMessage,
 )
-from langchain_core.tools import StructuredTool
-from pydantic import create_model
 
 from ai.models import get_chat_model
 from core.config import settings
-from services.chat_service import ChatService
+from services.chat_service import ChatService, _content_text
+from services.mcp_client import get_mcp_registry
 from services.permission_service import can_execute, get_agent_app_definitions, get_agent_tools
 from services import session_service
-from tools.base import ToolDefinition
 from tools.registry import get_tool_registry
 
 
+MAX_ITERATIONS_RESPONSE = "I've reached the maximum number of tool calls for this turn."
+
+
 class ExecutionService:
     """Handles the agent execution loop: LLM call -> tool calls -> result -> repeat."""
 
     MAX_TOOL_ITERATIONS = 10
 
-    def __init__(self, db, agent_data: dict, session_data: dict):
+    def __init__(
+        self,
+        db,
+        agent_data: dict,
+        session_data: dict,
+        writes: session_service.SessionWriteBuffer | None = None,
+    ):
+        """*writes* lets the caller fold this turn's tool messages into its own
+        batched commit; without one the service buffers and flushes itself
+        when the loop ends.
+        """
         self.db = db
         self.agent_data = agent_data
         self.session_data = session_data
         self.workspace_id = session_data["workspaceId"]
         self.user_id = session_data["userId"]
+        self._owns_writes = writes is None
+        self.writes = writes or session_service.SessionWriteBuffer(db, session_data["id"])
+        # The agent's MCP tools for this turn, by the sanitised tool id the LLM
+        # calls; each handler targets the real server and tool name (set by _prepare)
+        self._mcp_tools: dict = {}
 
     def execute(self, user_message: str, context: str | None = None) -> dict:
         """Run the full execution loop.
 
         Returns dict with: response, model, tool_calls, messages_added
         """
-        # 1. Get agent's allowed tools
-        tool_defs = get_agent_tools(self.agent_data)
-        langchain_tools = self._build_langchain_tools(tool_defs)
+        try:
+            llm_with_tools, messages, model_used = self._prepare(context)
+
+            all_tool_calls = []
+            messages_added = []
+            iteration = 0
+
+            while iteration < self.MAX_TOOL_ITERATIONS:
+                iteration += 1
+                response = llm_with_tools.invoke(messages)
+
+                # Check if LLM wants to call tools
+                if hasattr(response, "tool_calls") and response.tool_calls:
+                    # Add AI message with tool calls to the conversation
+                    messages.append(response)
+
+                    for batch in self._tool_call_batches(response.tool_calls):
+                        results = self._invoke_batch(batch)
+                        all_tool_calls.extend(
+                            self._record_batch(batch, results, messages, messages_added),
+                        )
+                else:
+                    # LLM returned text response — done
+                    return {
+                        "response": _content_text(response.content),
+                        "model": model_used,
+                        "tool_calls": all_tool_calls,
+                        "messages_added": messages_added,
+                    }
+
+            # Safety: exceeded max iterations
+            return {
+                "response": MAX_ITERATIONS_RESPONSE,
+                "model": model_used,
+                "tool_calls": all_tool_calls,
+                "messages_added": messages_added,
+            }
+        finally:
+            if self._owns_writes:
+                self.writes.flush()
+
+    async def aexecute(self, user_message: str, context: str | None = None) -> dict:
+        """Async variant of execute().
+
+        LLM round-trips are awaited; MCP discovery, tool handlers and the
+        session flush, which block on sync clients, run in a worker thread.
+        """
+        try:
+            llm_with_tools, messages, model_used = await self._aprepare(context)
+
+            all_tool_calls = []
+            messages_added = []
+            iteration = 0
+
+            while iteration < self.MAX_TOOL_ITERATIONS:
+                iteration += 1
+                response = await llm_with_tools.ainvoke(messages)
+
+                if hasattr(response, "tool_calls") and response.tool_calls:
+                    messages.append(response)
+
+                    for batch in self._tool_call_batches(response.tool_calls):
+                        results = await self._ainvoke_batch(batch)
+                        all_tool_calls.extend(await asyncio.to_thread(
+                            self._record_batch, batch, results, messages, messages_added,
+                        ))
+                else:
+                    return {
+                        "response": _content_text(response.content),
+                        "model": model_used,
+                        "tool_calls": all_tool_calls,
+                        "messages_added": messages_added,
+                    }
+
+            return {
+                "response": MAX_ITERATIONS_RESPONSE,
+                "model": model_used,
+                "tool_calls": all_tool_calls,
+                "messages_added": messages_added,
+            }
+        finally:
+            if self._owns_writes:
+                await asyncio.to_thread(self.writes.flush)
+
+    async def astream(self, user_message: str, context: str | None = None) -> AsyncIterator[dict]:
+        """Run the execution loop, yielding events as they happen.
+
+        Yields dicts with a ``type`` key:
+        - ``token``: ``{"content"}`` — a fragment of assistant text
+        - ``tool_call``: ``{"tool_id", "args", "call_id"}``
+        - ``tool_result``: ``{"tool_id", "call_id", "result"}``
+        - ``done``: ``{"response", "model", "tool_calls", "messages_added"}`` — always last
+        """
+        try:
+            llm_with_tools, messages, model_used = await self._aprepare(context)
+
+            all_tool_calls = []
+            messages_added = []
+            iteration = 0
+
+            while iteration < self.MAX_TOOL_ITERATIONS:
+                iteration += 1
+                response = None
+                text_parts: list[str] = []
+                async for chunk in llm_with_tools.astream(messages):
+                    text = _content_text(chunk.content)
+                    if text:
+                        text_parts.append(text)
+                        yield {"type": "token", "content": text}
+                    response = chunk if response is None else response + chunk
+
+                if response is not None and response.tool_calls:
+                    messages.append(response)
+
+                    for batch in self._tool_call_batches(response.tool_calls):
+                        for tool_call in batch:
+                            yield {
+                                "type": "tool_call",
+                                "tool_id": tool_call["name"],
+                                "args": tool_call["args"],
+                                "call_id": tool_call["id"],
+                            }
+                        results = await self._ainvoke_batch(batch)
+                        traces = await asyncio.to_thread(
+                            self._record_batch, batch, results, messages, messages_added,
+                        )
+                        all_tool_calls.extend(traces)
+                        for tool_call, trace in zip(batch, traces):
+                            yield {
+                                "type": "tool_result",
+                                "tool_id": trace["tool_id"],
+                                "call_id": tool_call["id"],
+                                "result": trace["result"],
+                            }
+                else:
+                    yield {
+                        "type": "done",
+                        "response": "".join(text_parts),
+                        "model": model_used,
+                        "tool_calls": all_tool_calls,
+                        "messages_added": messages_added,
+                    }
+                    return
+
+            yield {
+                "type": "done",
+                "response": MAX_ITERATIONS_RESPONSE,
+                "model": model_used,
+                "tool_calls": all_tool_calls,
+                "messages_added": messages_added,
+            }
+        finally:
+            if self._owns_writes:
+                await asyncio.to_thread(self.writes.flush)
+
+    def _prepare(self, context: str | None) -> tuple:
+        """Resolve tools, prompt and model for a turn.
+
+        Returns (llm_with_tools, messages, model_used).
+        """
+        return self._build_turn(self._load_mcp_tools(), context)
+
+    async def _aprepare(self, context: str | None) -> tuple:
+        """_prepare() for the async paths, with MCP discovery off the event loop."""
+        mcp_tools = []
+        if self.agent_data.get("mcpServers"):
+            mcp_tools = await asyncio.to_thread(self._load_mcp_tools)
+        return self._build_turn(mcp_tools, context)
+
+    def _load_mcp_tools(self) -> list:
+        """Tools from the agent's MCP servers. Blocks while servers are discovered."""
+        return get_mcp_registry().get_tools(self.agent_data.get("mcpServers") or [])
+
+    def _build_turn(self, mcp_tools: list, context: str | None) -> tuple:
+        # 1. Get agent's allowed tools, plus tools from its MCP servers
+        self._mcp_tools = {td.tool_id: td for td in mcp_tools}
+        tool_defs = get_agent_tools(self.agent_data) + mcp_tools
+        langchain_tools = get_tool_registry().compiled.get_many(tool_defs)
 
         # 2. Build system prompt with app context
         app_defs = get_agent_app_definitions(self.agent_data)
@@ -48,125 +242,126 @@ class ExecutionService:
 
         # 4. Build LLM with tools bound
         config = ChatService._build_model_config(self.agent_data)
-        llm = get_chat_model(config)
-        if langchain_tools:
-            llm_with_tools = llm.bind_tools(langchain_tools)
-        else:
-            llm_with_tools = llm
+        tools_key = tuple(td.schema_key for td in tool_defs)
+        llm_with_tools = get_chat_model(config, tools=langchain_tools, tools_key=tools_key)
 
         model_used = config.model or settings.llm_model
+        return llm_with_tools, messages, model_used
 
-        # 5. Execution loop
-        all_tool_calls = []
-        messages_added = []
-        iteration = 0
-
-        while iteration < self.MAX_TOOL_ITERATIONS:
-            iteration += 1
-            response = llm_with_tools.invoke(messages)
-
-            # Check if LLM wants to call tools
-            if hasattr(response, "tool_calls") and response.tool_calls:
-                # Add AI message with tool calls to the conversation
-                messages.append(response)
-
-                for tool_call in response.tool_calls:
-                    tool_id = tool_call["name"]
-                    tool_args = tool_call["args"]
-                    call_id = tool_call.get("id", str(uuid4()))
-
-                    # Permission check
-                    if not can_execute(self.agent_data, tool_id):
-                        tool_result = {
-                            "success": False,
-                            "error": f"Permission denied for tool '{tool_id}'",
-                        }
-                    else:
-                        tool_def = get_tool_registry().get_tool(tool_id)
-                        if tool_def is None:
-                            tool_result = {
-                                "success": False,
-                                "error": f"Tool '{tool_id}' not found",
-                            }
-                        else:
-                            try:
-                                tool_result = tool_def.handler(
-                                    self.db, self.workspace_id, self.user_id, tool_args,
-                                )
-                            except Exception as e:
-                                tool_result = {"success": False, "error": str(e)}
-
-                    # Store tool_call in session
-                    tc_msg = session_service.add_message(
-                        self.db, self.session_data["id"],
-                        role="tool_call",
-                        content=json.dumps({
-                            "tool_id": tool_id,
-                            "args": tool_args,
-                            "call_id": call_id,
-                        }),
-                        metadata={"tool_id": tool_id},
-                    )
-                    messages_added.append(tc_msg)
-
-                    # Store tool_result in session
-                    tr_msg = session_service.add_message(
-                        self.db, self.session_data["id"],
-                        role="tool_result",
-                        content=json.dumps(tool_result),
-                        metadata={"tool_id": tool_id, "call_id": call_id},
-                    )
-                    messages_added.append(tr_msg)
-
-                    all_tool_calls.append({
-                        "tool_id": tool_id,
-                        "args": tool_args,
-                        "result": tool_result,
-                    })
-
-                    # Add tool result to messages for next LLM call
-                    messages.append(ToolMessage(
-                        content=json.dumps(tool_result),
-                        tool_call_id=call_id,
-                    ))
+    def _tool_call_batches(self, tool_calls: list[dict]) -> list[list[dict]]:
+        """Group tool calls for execution, preserving their order.
+
+        Consecutive parallel-safe (read-only) calls share a batch and may run
+        concurrently; any other call runs alone, so writes keep their order
+        relative to the reads around them. Missing call ids are filled in.
+        """
+        registry = get_tool_registry()
+        parallel = settings.tool_call_concurrency > 1
+        batches: list[list[dict]] = []
+        previous_safe = False
+        for tool_call in tool_calls:
+            tool_call = {**tool_call, "id": tool_call.get("id") or str(uuid4())}
+            tool_def = registry.get_tool(tool_call["name"])
+            safe = parallel and tool_def is not None and tool_def.parallel_safe
+            if safe and previous_safe:
+                batches[-1].append(tool_call)
             else:
-                # LLM returned text response — done
-                content = (
-                    response.content
-                    if isinstance(response.content, str)
-                    else str(response.content)
-                )
+                batches.append([tool_call])
+            previous_safe = safe
+        return batches
+
+    def _invoke_batch(self, batch: list[dict]) -> list[dict]:
+        if len(batch) == 1:
+            return [self._invoke_tool(batch[0])]
+        workers = min(settings.tool_call_concurrency, len(batch))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(self._invoke_tool, batch))
+
+    async def _ainvoke_batch(self, batch: list[dict]) -> list[dict]:
+        limit = asyncio.Semaphore(settings.tool_call_concurrency)
+
+        async def invoke(tool_call: dict) -> dict:
+            async with limit:
+                return await asyncio.to_thread(self._invoke_tool, tool_call)
+
+        return list(await asyncio.gather(*(invoke(tc) for tc in batch)))
+
+    def _record_batch(
+        self, batch: list[dict], results: list[dict], messages: list, messages_added: list,
+    ) -> list[dict]:
+        return [
+            self._record_tool_call(tool_call, result, messages, messages_added)
+            for tool_call, result in zip(batch, results)
+        ]
+
+    def _invoke_tool(self, tool_call: dict) -> dict:
+        """Check permission and run the tool handler. Safe to call from worker threads."""
+        tool_id = tool_call["name"]
+        tool_args = tool_call["args"]
+
+        # MCP tools are allowed by being configured on the agent
+        tool_def = self._mcp_tools.get(tool_id)
+        if tool_def is None:
+            # Permission check
+            if not can_execute(self.agent_data, tool_id):
+                return {
+                    "success": False,
+                    "error": f"Permission denied for tool '{tool_id}'",
+                }
+            tool_def = get_tool_registry().get_tool(tool_id)
+            if tool_def is None:
                 return {
-                    "response": content,
-                    "model": model_used,
-                    "tool_calls": all_tool_calls,
-                    "messages_added": messages_added,
+                    "success": False,
+                    "error": f"Tool '{tool_id}' not found",
                 }
+        try:
+            return tool_def.handler(self.db, self.workspace_id, self.user_id, tool_args)
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+    def _record_tool_call(
+        self, tool_call: dict, tool_result: dict, messages: list, messages_added: list,
+    ) -> dict:
+        """Buffer the call/result messages and append the ToolMessage for the LLM.
+
+        Returns the trace dict: {tool_id, args, result}.
+        """
+        tool_id = tool_call["name"]
+        tool_args = tool_call["args"]
+        call_id = tool_call["id"]
+
+        # Store tool_call in session
+        tc_msg = self.writes.add_message(
+            role="tool_call",
+            content=json.dumps({
+                "tool_id": tool_id,
+                "args": tool_args,
+                "call_id": call_id,
+            }),
+            metadata={"tool_id": tool_id},
+        )
+        messages_added.append(tc_msg)
+
+        # Store tool_result in session
+        tr_msg = self.writes.add_message(
+            role="tool_result",
+            content=json.dumps(tool_result),
+            metadata={"tool_id": tool_id, "call_id": call_id},
+        )
+        messages_added.append(tr_msg)
+
+        # Add tool result to messages for next LLM call
+        messages.append(ToolMessage(
+            content=json.dumps(tool_result),
+            tool_call_id=call_id,
+        ))
 
-        # Safety: exceeded max iterations
         return {
-            "response": "I've reached the maximum number of tool calls for this turn.",
-            "model": model_used,
-            "tool_calls": all_tool_calls,
-            "messages_added": messages_added,
+            "tool_id": tool_id,
+            "args": tool_args,
+            "result": tool_result,
         }
 
-    def _build_langchain_tools(self, tool_defs: list[ToolDefinition]) -> list[StructuredTool]:
-        """Convert ToolDefinitions to LangChain StructuredTool objects."""
-        tools = []
-        for td in tool_defs:
-            args_model = _build_args_model(td)
-            # Capture variables in closure
-            handler = _make_tool_handler(td.handler, self.db, self.workspace_id, self.user_id)
-            tool = StructuredTool(
-                name=td.tool_id,
-                description=td.description,
-                func=handler,
-                args_schema=args_model,
-            )
-            tools.append(tool)
-        return tools
-
     def _build_system_prompt(self, app_defs: list, context: str | None) -> str:
         """Build system prompt including agent context and app definitions."""
         parts = []
@@ -224,36 +419,3 @@ class ExecutionService:
                 ))
         return messages
 
-
-def _make_tool_handler(handler, db, workspace_id, user_id):
-    """Create a closure that wraps a tool handler with db/workspace/user context."""
-    def wrapped(**kwargs):
-        return handler(db, workspace_id, user_id, kwargs)
-    return wrapped
-
-
-def _build_args_model(td: ToolDefinition):
-    """Build a Pydantic model from a ToolDefinition's JSON Schema parameters."""
-    fields = {}
-    props = td.parameters.get("properties", {})
-    required = set(td.parameters.get("required", []))
-
-    type_map = {
-        "string": str,
-        "integer": int,
-        "number": float,
-        "boolean": bool,
-        "object": dict,
-        "array": list,
-    }
-
-    for name, schema in props.items():
-        py_type = type_map.get(schema.get("type", "string"), str)
-        if name in required:
-            fields[name] = (py_type, ...)
-        else:
-            fields[name] = (py_type | None, None)
-
-    # Create a unique model name to avoid conflicts
-    model_name = td.tool_id.replace(".", "_") + "_Args"
-    return create_model(model_name, **fields)
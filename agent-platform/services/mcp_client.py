@@ -1,10 +1,19 @@
 """MCP client — connect to external MCP servers, discover and call tools."""
 
+import hashlib
+import json
 import logging
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from dataclasses import dataclass, field
 
 import httpx
 
+from core.cache import TTLCache
+from core.config import settings
 from tools.base import ToolAction, ToolDefinition
 
 logger = logging.getLogger(__name__)
@@ -12,6 +21,10 @@ logger = logging.getLogger(__name__)
 # Timeout for MCP server HTTP calls
 MCP_TIMEOUT = 10.0
 
+# LLM providers only accept function names matching ^[a-zA-Z0-9_-]{1,64}$
+MAX_TOOL_NAME_LENGTH = 64
+_UNSAFE_NAME_CHARS = re.compile(r"[^a-zA-Z0-9_-]+")
+
 
 @dataclass
 class McpServerConfig:
@@ -21,6 +34,178 @@ class McpServerConfig:
     auth: dict = field(default_factory=dict)
 
 
+@dataclass
+class McpManifest:
+    """A server's tools/list result and the validator to revalidate it with."""
+    tools: list[dict]
+    etag: str | None
+    fresh_until: float
+
+    @property
+    def fresh(self) -> bool:
+        return time.monotonic() < self.fresh_until
+
+
+# Manifests outlive the clients that fetched them. Entries stay past their
+# fresh window (up to mcp_manifest_max_age) so a stale one can be
+# revalidated with If-None-Match instead of downloaded again.
+_manifests: TTLCache[tuple[str, str], McpManifest] = TTLCache(
+    maxsize=settings.mcp_manifest_cache_size, ttl=settings.mcp_manifest_max_age,
+)
+
+
+def clear_manifest_cache() -> None:
+    _manifests.clear()
+
+
+class McpUnavailableError(Exception):
+    """Raised instead of contacting a server whose circuit is open."""
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker.
+
+    After *threshold* failures in a row the circuit opens and requests are
+    rejected for *cooldown* seconds. Then a single trial request is let
+    through: success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, threshold: int, cooldown: float):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at < self.cooldown:
+            return "open"
+        return "half_open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._trial or time.monotonic() - self._opened_at < self.cooldown:
+                return False
+            self._trial = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._trial or self._failures >= self.threshold:
+                self._opened_at = time.monotonic()
+                self._trial = False
+
+
+@dataclass(frozen=True)
+class McpServerStats:
+    url: str
+    requests: int
+    errors: int
+    retries: int
+    rejected: int
+    total_latency: float
+    circuit: str
+
+    @property
+    def avg_latency_ms(self) -> float:
+        return self.total_latency / self.requests * 1000 if self.requests else 0.0
+
+
+class _McpServer:
+    """Connection pool, circuit breaker and counters shared by all clients of one server URL."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.http = httpx.Client(
+            http2=settings.mcp_http2,
+            limits=httpx.Limits(
+                max_connections=settings.mcp_pool_size,
+                max_keepalive_connections=settings.mcp_pool_size,
+                keepalive_expiry=settings.mcp_keepalive_expiry,
+            ),
+            timeout=MCP_TIMEOUT,
+        )
+        self.breaker = CircuitBreaker(settings.mcp_breaker_threshold, settings.mcp_breaker_cooldown)
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._errors = 0
+        self._retries = 0
+        self._rejected = 0
+        self._total_latency = 0.0
+
+    def record(self, latency: float, error: bool) -> None:
+        with self._lock:
+            self._requests += 1
+            self._total_latency += latency
+            if error:
+                self._errors += 1
+
+    def record_retry(self) -> None:
+        with self._lock:
+            self._retries += 1
+
+    def record_rejected(self) -> None:
+        with self._lock:
+            self._rejected += 1
+
+    def stats(self) -> McpServerStats:
+        with self._lock:
+            return McpServerStats(
+                self.url, self._requests, self._errors, self._retries,
+                self._rejected, self._total_latency, self.breaker.state,
+            )
+
+
+_servers: dict[str, _McpServer] = {}
+_servers_lock = threading.Lock()
+
+
+def _get_server(url: str) -> _McpServer:
+    with _servers_lock:
+        server = _servers.get(url)
+        if server is None:
+            server = _servers[url] = _McpServer(url)
+        return server
+
+
+def mcp_server_stats() -> list[McpServerStats]:
+    """Request, error and latency counters for every MCP server contacted."""
+    with _servers_lock:
+        servers = list(_servers.values())
+    return [server.stats() for server in servers]
+
+
+def close_mcp_http_clients() -> None:
+    """Close every pooled MCP connection; later calls open new pools."""
+    with _servers_lock:
+        servers = list(_servers.values())
+        _servers.clear()
+    for server in servers:
+        server.http.close()
+
+
+def _is_server_failure(response: httpx.Response) -> bool:
+    return response.status_code >= 500 or response.status_code == 429
+
+
+def _auth_fingerprint(auth: dict) -> str:
+    """Hash of the auth config, so manifests are never shared across credentials."""
+    return hashlib.sha256(json.dumps(auth, sort_keys=True).encode()).hexdigest()[:16]
+
+
 class McpClient:
     """Client for a single external MCP server."""
 
@@ -41,21 +226,90 @@ class McpClient:
             headers["X-API-Key"] = auth.get("key", "")
         return headers
 
-    def connect(self) -> list[dict]:
+    def _post(self, path: str, payload: dict, headers: dict, timeout: float, idempotent: bool) -> httpx.Response:
+        """POST to the server over its pooled connection.
+
+        Refused connections are always retried (the request never reached
+        the server); timeouts, 5xx and 429 only when *idempotent*. Retries
+        back off exponentially with full jitter. Requests are rejected with
+        McpUnavailableError while the server's circuit is open.
+        """
+        server = _get_server(self.url)
+        if not server.breaker.allow():
+            server.record_rejected()
+            raise McpUnavailableError(f"MCP server '{self.name}' is unavailable (circuit open)")
+
+        attempt = 0
+        while True:
+            started = time.monotonic()
+            try:
+                response = server.http.post(f"{self.url}{path}", headers=headers, json=payload, timeout=timeout)
+            except httpx.TransportError as e:
+                server.record(time.monotonic() - started, error=True)
+                retriable = idempotent or isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout))
+                if not retriable or attempt >= settings.mcp_max_retries:
+                    server.breaker.record_failure()
+                    raise
+            except Exception:
+                # Decoding errors, redirect loops and the like are not retried
+                # but still count, so a half-open trial never stays pending
+                server.record(time.monotonic() - started, error=True)
+                server.breaker.record_failure()
+                raise
+            else:
+                failed = _is_server_failure(response)
+                server.record(time.monotonic() - started, error=failed)
+                if not failed:
+                    server.breaker.record_success()
+                    return response
+                if not idempotent or attempt >= settings.mcp_max_retries:
+                    server.breaker.record_failure()
+                    return response
+            attempt += 1
+            server.record_retry()
+            time.sleep(random.uniform(0, settings.mcp_retry_backoff * 2 ** (attempt - 1)))
+
+    @property
+    def manifest_key(self) -> tuple[str, str]:
+        return (self.url, _auth_fingerprint(self.config.auth))
+
+    @property
+    def manifest_fresh(self) -> bool:
+        """True when connect() can be answered from the manifest cache."""
+        cached = _manifests.get(self.manifest_key)
+        return cached is not None and cached.fresh
+
+    def connect(self, timeout: float = MCP_TIMEOUT) -> list[dict]:
         """Connect to the MCP server and discover available tools.
 
+        A fresh cached manifest is used without a request; a stale one is
+        revalidated with its ETag and reused on 304 Not Modified.
+
         Returns list of raw tool descriptors from the server.
         """
+        key = self.manifest_key
+        cached = _manifests.get(key)
+        if cached is not None and cached.fresh:
+            self._tools = cached.tools
+            self._connected = True
+            return self._tools
+
+        headers = self._build_headers()
+        if cached is not None and cached.etag:
+            headers["If-None-Match"] = cached.etag
         try:
-            response = httpx.post(
-                f"{self.url}/tools/list",
-                headers=self._build_headers(),
-                json={},
-                timeout=MCP_TIMEOUT,
-            )
-            response.raise_for_status()
-            data = response.json()
-            self._tools = data.get("tools", [])
+            response = self._post("/tools/list", {}, headers, timeout, idempotent=True)
+            if cached is not None and response.status_code == 304:
+                tools, etag = cached.tools, cached.etag
+            else:
+                response.raise_for_status()
+                data = response.json()
+                tools = data.get("tools", [])
+                # Servers without ETags can version the manifest body instead
+                version = data.get("version")
+                etag = response.headers.get("ETag") or (str(version) if version is not None else None)
+            _manifests.set(key, McpManifest(tools, etag, time.monotonic() + settings.mcp_manifest_ttl))
+            self._tools = tools
             self._connected = True
             logger.info("Connected to MCP server '%s': %d tools", self.name, len(self._tools))
             return self._tools
@@ -71,17 +325,20 @@ class McpClient:
             return {"success": False, "error": f"Not connected to MCP server '{self.name}'"}
 
         try:
-            response = httpx.post(
-                f"{self.url}/tools/call",
-                headers=self._build_headers(),
-                json={"name": tool_name, "arguments": args},
-                timeout=MCP_TIMEOUT,
+            response = self._post(
+                "/tools/call",
+                {"name": tool_name, "arguments": args},
+                self._build_headers(),
+                MCP_TIMEOUT,
+                idempotent=False,
             )
             response.raise_for_status()
             data = response.json()
             return {"success": True, "result": data.get("content", data)}
         except httpx.HTTPStatusError as e:
             return {"success": False, "error": f"MCP server error: {e.response.status_code}"}
+        except McpUnavailableError as e:
+            return {"success": False, "error": str(e)}
         except Exception as e:
             return {"success": False, "error": f"MCP call failed: {str(e)}"}
 
@@ -99,54 +356,117 @@ class McpClient:
         return self._connected
 
 
+def _server_configs(mcp_servers: list[dict]) -> list[McpServerConfig]:
+    configs = []
+    for server_config in mcp_servers:
+        config = McpServerConfig(
+            name=server_config.get("name", "unknown"),
+            url=server_config.get("url", ""),
+            auth=server_config.get("auth", {}),
+        )
+
+        if not config.url:
+            logger.warning("MCP server '%s' has no URL, skipping", config.name)
+            continue
+        configs.append(config)
+    return configs
+
+
+def _connect_concurrently(clients: list[McpClient], timeout: float) -> list[list[dict] | None]:
+    """connect() every client at once, waiting at most *timeout* overall.
+
+    Returns each client's raw tools, or None for clients that missed the
+    deadline. Clients with a fresh cached manifest are answered inline.
+    """
+    results: list[list[dict] | None] = [None] * len(clients)
+    stale = []
+    for i, client in enumerate(clients):
+        if client.manifest_fresh:
+            results[i] = client.connect(timeout)
+        else:
+            stale.append(i)
+    if not stale:
+        return results
+
+    pool = ThreadPoolExecutor(max_workers=len(stale), thread_name_prefix="mcp-discovery")
+    futures = {i: pool.submit(clients[i].connect, timeout) for i in stale}
+    done, _ = wait(futures.values(), timeout=timeout)
+    # Don't wait for stragglers; a late answer still fills the manifest cache
+    pool.shutdown(wait=False, cancel_futures=True)
+    for i, future in futures.items():
+        if future in done:
+            results[i] = future.result()
+        else:
+            logger.warning("MCP server '%s' did not answer within %.1fs", clients[i].name, timeout)
+    return results
+
+
+def mcp_tool_id(server_name: str, tool_name: str) -> str:
+    """Tool id for an MCP tool, usable as an LLM function name.
+
+    ``mcp__{server}__{tool}`` with unsupported characters replaced by ``_``.
+    When that changes either name, the server name contains ``__`` or the
+    result is too long, a short hash of the real pair is appended so that
+    distinct tools never share an id.
+    """
+    server = _UNSAFE_NAME_CHARS.sub("_", server_name)
+    tool = _UNSAFE_NAME_CHARS.sub("_", tool_name)
+    tool_id = f"mcp__{server}__{tool}"
+    exact = server == server_name and tool == tool_name and "__" not in server_name
+    if exact and len(tool_id) <= MAX_TOOL_NAME_LENGTH:
+        return tool_id
+    digest = hashlib.sha256(f"{server_name}\0{tool_name}".encode()).hexdigest()[:8]
+    return f"{tool_id[:MAX_TOOL_NAME_LENGTH - len(digest) - 1]}_{digest}"
+
+
+def _tool_definitions(client: McpClient, raw_tools: list[dict]) -> list[ToolDefinition]:
+    """ToolDefinitions for a server's tools, with ids from mcp_tool_id()."""
+    tools = []
+    for raw_tool in raw_tools:
+        tool_name = raw_tool.get("name", "unknown")
+        tool_id = mcp_tool_id(client.name, tool_name)
+        description = raw_tool.get("description", f"MCP tool from {client.name}")
+        parameters = raw_tool.get("inputSchema", {"type": "object", "properties": {}})
+
+        # Build handler that calls the MCP server
+        handler = _make_mcp_handler(client, tool_name)
+
+        td = ToolDefinition(
+            tool_id=tool_id,
+            app_id=f"mcp:{client.name}",
+            action=ToolAction.CREATE,  # Generic action for MCP tools
+            name=tool_name,
+            description=description,
+            parameters=parameters,
+            handler=handler,
+        )
+        tools.append(td)
+    return tools
+
+
 class McpConnectionManager:
     """Manages connections to multiple MCP servers for an agent."""
 
     def __init__(self):
         self._clients: dict[str, McpClient] = {}
 
-    def connect_all(self, mcp_servers: list[dict]) -> list[ToolDefinition]:
+    def connect_all(self, mcp_servers: list[dict], timeout: float | None = None) -> list[ToolDefinition]:
         """Connect to all MCP servers and return discovered ToolDefinitions.
 
-        Tool IDs are prefixed with 'mcp:{server_name}:' to avoid collisions.
-        """
-        all_tools = []
-
-        for server_config in mcp_servers:
-            config = McpServerConfig(
-                name=server_config.get("name", "unknown"),
-                url=server_config.get("url", ""),
-                auth=server_config.get("auth", {}),
-            )
+        Servers are contacted concurrently; any that have not answered
+        within *timeout* (default ``mcp_discovery_timeout``) contribute no
+        tools to this call.
 
-            if not config.url:
-                logger.warning("MCP server '%s' has no URL, skipping", config.name)
-                continue
-
-            client = McpClient(config)
-            raw_tools = client.connect()
-            self._clients[config.name] = client
-
-            for raw_tool in raw_tools:
-                tool_name = raw_tool.get("name", "unknown")
-                tool_id = f"mcp:{config.name}:{tool_name}"
-                description = raw_tool.get("description", f"MCP tool from {config.name}")
-                parameters = raw_tool.get("inputSchema", {"type": "object", "properties": {}})
-
-                # Build handler that calls the MCP server
-                handler = _make_mcp_handler(client, tool_name)
-
-                td = ToolDefinition(
-                    tool_id=tool_id,
-                    app_id=f"mcp:{config.name}",
-                    action=ToolAction.CREATE,  # Generic action for MCP tools
-                    name=tool_name,
-                    description=description,
-                    parameters=parameters,
-                    handler=handler,
-                )
-                all_tools.append(td)
+        Tool IDs come from mcp_tool_id() and are namespaced by server.
+        """
+        clients = [McpClient(config) for config in _server_configs(mcp_servers)]
+        results = _connect_concurrently(clients, timeout or settings.mcp_discovery_timeout)
 
+        all_tools = []
+        for client, raw_tools in zip(clients, results):
+            self._clients[client.name] = client
+            if raw_tools is not None:
+                all_tools.extend(_tool_definitions(client, raw_tools))
         return all_tools
 
     def disconnect_all(self):
@@ -159,6 +479,98 @@ class McpConnectionManager:
         return self._clients.get(server_name)
 
 
+@dataclass
+class _LiveConnection:
+    client: McpClient
+    raw_tools: list[dict]
+    tools: list[ToolDefinition]
+    last_used: float
+
+
+class McpConnectionRegistry:
+    """Process-wide MCP connections, reused across turns, sessions and agents.
+
+    Connections are keyed by (server name, url, auth fingerprint) since the
+    server name is part of every tool id. A connection's ToolDefinitions are
+    rebuilt only when its manifest changes, and connections unused for
+    *idle_timeout* seconds are dropped.
+    """
+
+    def __init__(self, idle_timeout: float):
+        self.idle_timeout = idle_timeout
+        self._connections: dict[tuple[str, str, str], _LiveConnection] = {}
+        self._lock = threading.Lock()
+
+    def get_tools(self, mcp_servers: list[dict], timeout: float | None = None) -> list[ToolDefinition]:
+        """ToolDefinitions for an agent's ``mcpServers``, connecting only where needed."""
+        configs = _server_configs(mcp_servers)
+        if not configs:
+            return []
+
+        with self._lock:
+            self._evict_idle(time.monotonic())
+            keys = []
+            clients = []
+            for config in configs:
+                key = (config.name, config.url.rstrip("/"), _auth_fingerprint(config.auth))
+                live = self._connections.get(key)
+                keys.append(key)
+                clients.append(live.client if live else McpClient(config))
+
+        results = _connect_concurrently(clients, timeout or settings.mcp_discovery_timeout)
+
+        tools = []
+        with self._lock:
+            now = time.monotonic()
+            for key, client, raw_tools in zip(keys, clients, results):
+                if raw_tools is None:
+                    continue
+                if not client.connected:
+                    self._connections.pop(key, None)
+                    continue
+                live = self._connections.get(key)
+                if live is None or live.client is not client or live.raw_tools is not raw_tools:
+                    live = _LiveConnection(client, raw_tools, _tool_definitions(client, raw_tools), now)
+                    self._connections[key] = live
+                live.last_used = now
+                tools.extend(live.tools)
+        return tools
+
+    def _evict_idle(self, now: float) -> None:
+        for key, live in list(self._connections.items()):
+            if now - live.last_used > self.idle_timeout:
+                del self._connections[key]
+                live.client.disconnect()
+
+    def clear(self) -> None:
+        with self._lock:
+            connections = list(self._connections.values())
+            self._connections.clear()
+        for live in connections:
+            live.client.disconnect()
+
+    def __len__(self) -> int:
+        return len(self._connections)
+
+
+_mcp_registry: McpConnectionRegistry | None = None
+_mcp_registry_lock = threading.Lock()
+
+
+def get_mcp_registry() -> McpConnectionRegistry:
+    global _mcp_registry
+    with _mcp_registry_lock:
+        if _mcp_registry is None:
+            _mcp_registry = McpConnectionRegistry(idle_timeout=settings.mcp_idle_timeout)
+        return _mcp_registry
+
+
+def close_mcp_connections() -> None:
+    """Drop every live MCP connection and close the pooled HTTP clients."""
+    get_mcp_registry().clear()
+    close_mcp_http_clients()
+
+
 def _make_mcp_handler(client: McpClient, tool_name: str):
     """Create a tool handler that calls an MCP server tool."""
     def handler(db, workspace_id, user_id, params):
@@ -99,37 +99,32 @@ class OrchestrationService:
             parent_session_id=parent_session_id,
         )
 
-        # Add the delegated task as a user message
-        session_service.add_message(self.db, sub_session["id"], "user", task)
-        # Reload to get updated messages
-        sub_session = session_service.get_session(self.db, sub_session["id"])
-
-        # Execute using the target agent
-        agent_tools = get_agent_tools(target_agent)
-
-        if agent_tools:
-            execution = ExecutionService(self.db, target_agent, sub_session)
-            result = execution.execute(task, context=context)
-            response_text = result["response"]
-            tool_calls = result.get("tool_calls", [])
-        else:
-            # Simple chat agent with no tools
-            from services.chat_service import ChatService
-            chat_service = ChatService()
-            response_text, _ = chat_service.chat(
-                agent_data=target_agent,
-                message=task,
-                context=context,
-            )
-            tool_calls = []
-
-        # Store assistant response in sub-session
-        session_service.add_message(
-            self.db, sub_session["id"], "assistant", response_text,
-        )
-
-        # Complete the sub-session
-        session_service.update_session_status(self.db, sub_session["id"], "completed")
+        # The sub-session's whole transcript and its completion are
+        # committed in one batch once the task finishes
+        with session_service.SessionWriteBuffer(self.db, sub_session["id"]) as writes:
+            # Add the delegated task as a user message
+            sub_session["messages"] = [writes.add_message("user", task)]
+
+            # Execute using the target agent; MCP servers count as tools too
+            if get_agent_tools(target_agent) or target_agent.get("mcpServers"):
+                execution = ExecutionService(self.db, target_agent, sub_session, writes=writes)
+                result = execution.execute(task, context=context)
+                response_text = result["response"]
+                tool_calls = result.get("tool_calls", [])
+            else:
+                # Simple chat agent with no tools
+                from services.chat_service import ChatService
+                chat_service = ChatService()
+                response_text, _ = chat_service.chat(
+                    agent_data=target_agent,
+                    message=task,
+                    context=context,
+                )
+                tool_calls = []
+
+            # Store assistant response and complete the sub-session
+            writes.add_message("assistant", response_text)
+            writes.update({"status": "completed"})
 
         # Store delegation trace in parent session
         delegation_trace = {
@@ -1,33 +1,73 @@
 """Permission resolution — maps agent config to allowed tools."""
 
+from dataclasses import dataclass
+from functools import lru_cache
+
 from tools.base import AppDefinition, ToolDefinition
-from tools.registry import get_tool_registry
+from tools.registry import ToolRegistry, get_tool_registry
 
 
-def get_agent_tools(agent_data: dict) -> list[ToolDefinition]:
-    """Get all tools an agent is allowed to use, based on its appAccess."""
-    registry = get_tool_registry()
-    app_access = agent_data.get("appAccess", [])
+@dataclass(frozen=True, eq=False)
+class AgentPermissionIndex:
+    """Resolved tool permissions for one agent access configuration."""
+
+    tools: tuple[ToolDefinition, ...]
+    tool_ids: frozenset[str]
+    app_actions: dict[str, frozenset[str]]  # app_id -> allowed action values
+
+    def allows(self, tool_id: str) -> bool:
+        return tool_id in self.tool_ids
+
+
+def _access_key(agent_data: dict) -> tuple:
+    """Hashable form of the fields that determine an agent's permissions."""
+    app_access = agent_data.get("appAccess") or []
+    return (
+        agent_data.get("type"),
+        tuple((a["appId"], frozenset(a.get("permissions", []))) for a in app_access),
+    )
+
+
+@lru_cache(maxsize=1024)
+def _build_index(registry: ToolRegistry, registry_version: int, access_key: tuple) -> AgentPermissionIndex:
+    agent_type, app_access = access_key
 
     # GM with no explicit appAccess gets everything
-    if agent_data.get("type") == "gm" and not app_access:
-        return registry.list_tools()
+    if agent_type == "gm" and not app_access:
+        tools = registry.list_tools()
+        app_actions: dict[str, frozenset[str]] = {}
+        for tool in tools:
+            app_actions[tool.app_id] = app_actions.get(tool.app_id, frozenset()) | {tool.action.value}
+    else:
+        tools = []
+        app_actions = {}
+        for app_id, permissions in app_access:
+            app_actions[app_id] = app_actions.get(app_id, frozenset()) | permissions
+            for tool in registry.list_tools(app_id=app_id):
+                if tool.action.value in permissions:
+                    tools.append(tool)
+
+    return AgentPermissionIndex(
+        tools=tuple(tools),
+        tool_ids=frozenset(t.tool_id for t in tools),
+        app_actions=app_actions,
+    )
 
-    tools = []
-    for access in app_access:
-        app_id = access["appId"]
-        permissions = set(access.get("permissions", []))
-        app_tools = registry.list_tools(app_id=app_id)
-        for tool in app_tools:
-            if tool.action.value in permissions:
-                tools.append(tool)
-    return tools
+
+def get_agent_permission_index(agent_data: dict) -> AgentPermissionIndex:
+    """Permission index for *agent_data*, memoised per access configuration."""
+    registry = get_tool_registry()
+    return _build_index(registry, registry.version, _access_key(agent_data))
+
+
+def get_agent_tools(agent_data: dict) -> list[ToolDefinition]:
+    """Get all tools an agent is allowed to use, based on its appAccess."""
+    return list(get_agent_permission_index(agent_data).tools)
 
 
 def can_execute(agent_data: dict, tool_id: str) -> bool:
     """Check if an agent has permission to execute a specific tool."""
-    allowed_tools = get_agent_tools(agent_data)
-    return any(t.tool_id == tool_id for t in allowed_tools)
+    return get_agent_permission_index(agent_data).allows(tool_id)
 
 
 def get_agent_app_definitions(agent_data: dict) -> list[AppDefinition]:
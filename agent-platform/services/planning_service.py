@@ -132,19 +132,17 @@ class PlanningService:
     def store_plan(self, plan: dict) -> dict:
         """Store plan in session metadata."""
         ref = self.db.collection("sessions").document(self.session_data["id"])
-        doc = ref.get()
-        data = doc.to_dict()
-        metadata = data.get("metadata", {})
-        metadata["plan"] = plan
         ref.update({
-            "metadata": metadata,
+            "metadata.plan": plan,
             "updatedAt": datetime.now(timezone.utc),
         })
         return plan
 
     def get_plan(self) -> dict | None:
         """Get plan from session metadata."""
-        data = session_service.get_session(self.db, self.session_data["id"])
+        data = session_service.get_session(
+            self.db, self.session_data["id"], include_messages=False,
+        )
         return data.get("metadata", {}).get("plan")
 
     def approve_plan(self) -> dict:
@@ -160,7 +158,11 @@ class PlanningService:
         return plan
 
     def execute_plan(self) -> dict:
-        """Execute all pending steps in the plan."""
+        """Execute all pending steps in the plan.
+
+        The plan is kept in memory for the whole run; step messages and plan
+        updates are buffered and committed together when the run ends.
+        """
         plan = self.get_plan()
         if not plan:
             raise ValueError("No plan found in session")
@@ -170,35 +172,50 @@ class PlanningService:
         results = []
         all_success = True
 
-        for step in plan["steps"]:
-            if step["status"] != "pending":
-                continue
-
-            step_result = self.execute_step(step)
-            results.append(step_result)
+        with session_service.SessionWriteBuffer(self.db, self.session_data["id"]) as writes:
+            for step in plan["steps"]:
+                if step["status"] != "pending":
+                    continue
 
-            if not step_result.get("success", False):
-                all_success = False
-                plan["status"] = "failed"
+                step_result = self.execute_step(step, writes=writes)
+                results.append(step_result)
                 plan["updated_at"] = datetime.now(timezone.utc).isoformat()
-                self.store_plan(plan)
-                break
+                writes.update({"metadata.plan": plan})
 
-        if all_success:
-            plan["status"] = "completed"
-            plan["updated_at"] = datetime.now(timezone.utc).isoformat()
-            self.store_plan(plan)
+                if not step_result.get("success", False):
+                    all_success = False
+                    plan["status"] = "failed"
+                    break
+
+            if all_success:
+                plan["status"] = "completed"
+                plan["updated_at"] = datetime.now(timezone.utc).isoformat()
+                writes.update({"metadata.plan": plan})
 
         return {
             "plan_status": plan["status"],
             "step_results": results,
         }
 
-    def execute_step(self, step: dict) -> dict:
-        """Execute a single plan step."""
-        step["status"] = "in_progress"
-        self.store_plan(self.get_plan())
+    def execute_step(
+        self,
+        step: dict,
+        writes: session_service.SessionWriteBuffer | None = None,
+    ) -> dict:
+        """Execute a single plan step.
+
+        With *writes*, the step is updated in place and its messages are
+        buffered for the caller to commit; without, the step and its
+        messages are persisted before returning.
+        """
+        if writes is None:
+            with session_service.SessionWriteBuffer(self.db, self.session_data["id"]) as writes:
+                result = self._run_step(step, writes)
+            self._update_step(step)
+            return result
+        return self._run_step(step, writes)
 
+    def _run_step(self, step: dict, writes: session_service.SessionWriteBuffer) -> dict:
         tool_id = step.get("tool_id")
         args = step.get("args", {})
 
@@ -206,14 +223,12 @@ class PlanningService:
             # No tool — mark as completed (manual/informational step)
             step["status"] = "completed"
             step["result"] = {"success": True, "message": "Informational step completed"}
-            self._update_step(step)
             return step["result"]
 
         # Permission check
         if not can_execute(self.agent_data, tool_id):
             step["status"] = "failed"
             step["result"] = {"success": False, "error": f"Permission denied for tool '{tool_id}'"}
-            self._update_step(step)
             return step["result"]
 
         # Execute tool
@@ -222,7 +237,6 @@ class PlanningService:
         if tool_def is None:
             step["status"] = "failed"
             step["result"] = {"success": False, "error": f"Tool '{tool_id}' not found"}
-            self._update_step(step)
             return step["result"]
 
         try:
@@ -233,17 +247,13 @@ class PlanningService:
             step["status"] = "failed"
             step["result"] = {"success": False, "error": str(e)}
 
-        self._update_step(step)
-
         # Store in session messages
-        session_service.add_message(
-            self.db, self.session_data["id"],
+        writes.add_message(
             role="tool_call",
             content=json.dumps({"tool_id": tool_id, "args": args, "call_id": step["id"]}),
             metadata={"tool_id": tool_id, "plan_step": step["id"]},
         )
-        session_service.add_message(
-            self.db, self.session_data["id"],
+        writes.add_message(
             role="tool_result",
             content=json.dumps(step["result"]),
             metadata={"tool_id": tool_id, "call_id": step["id"], "plan_step": step["id"]},
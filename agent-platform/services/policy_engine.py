@@ -1,15 +1,55 @@
 from google.cloud.firestore_v1.client import Client
 
+from core.cache import TTLCache
+from core.config import settings
 from core.exceptions import ForbiddenError, NotFoundError
 
+# Ownership lookups shared by every PolicyEngine in the process:
+# workspace_id -> owner uid, agent_id -> workspace_id. Only successful
+# lookups are cached; deletes call the invalidate_* hooks below, and the
+# TTL bounds staleness for changes made by other instances.
+_workspace_owners: TTLCache[str, str] = TTLCache(
+    maxsize=settings.policy_cache_size, ttl=settings.policy_cache_ttl,
+)
+_agent_workspaces: TTLCache[str, str] = TTLCache(
+    maxsize=settings.policy_cache_size, ttl=settings.policy_cache_ttl,
+)
+
+
+def invalidate_workspace(workspace_id: str) -> None:
+    """Drop cached ownership for a workspace (call on teardown)."""
+    _workspace_owners.pop(workspace_id)
+
+
+def invalidate_agent(agent_id: str) -> None:
+    """Drop the cached workspace of an agent (call on delete)."""
+    _agent_workspaces.pop(agent_id)
+
+
+def clear_policy_cache() -> None:
+    _workspace_owners.clear()
+    _agent_workspaces.clear()
+
 
 class PolicyEngine:
     def __init__(self, db: Client) -> None:
         self.db = db
 
-    def assert_workspace_owner(self, firebase_uid: str, workspace_id: str) -> dict:
+    def assert_workspace_owner(self, firebase_uid: str, workspace_id: str) -> None:
         """Verify that *firebase_uid* owns *workspace_id*.
 
+        Served from the ownership cache when possible.
+        Raises NotFoundError or ForbiddenError on failure.
+        """
+        owner = _workspace_owners.get(workspace_id)
+        if owner is None:
+            self.get_owned_workspace(firebase_uid, workspace_id)
+        elif owner != firebase_uid:
+            raise ForbiddenError("You do not own this workspace")
+
+    def get_owned_workspace(self, firebase_uid: str, workspace_id: str) -> dict:
+        """Load *workspace_id* and verify that *firebase_uid* owns it.
+
         Returns the workspace document dict on success.
         Raises NotFoundError or ForbiddenError on failure.
         """
@@ -18,13 +58,26 @@ class PolicyEngine:
         if not ws_doc.exists:
             raise NotFoundError("workspace", workspace_id)
         ws_data = ws_doc.to_dict()
+        if ws_data.get("userId"):
+            _workspace_owners.set(workspace_id, ws_data["userId"])
         if ws_data.get("userId") != firebase_uid:
             raise ForbiddenError("You do not own this workspace")
         return ws_data
 
-    def assert_agent_access(self, firebase_uid: str, agent_id: str) -> dict:
+    def assert_agent_access(self, firebase_uid: str, agent_id: str) -> None:
         """Verify that *firebase_uid* owns the agent (via workspace).
 
+        Served from the ownership cache when possible.
+        """
+        workspace_id = _agent_workspaces.get(agent_id)
+        if workspace_id is None:
+            self.get_accessible_agent(firebase_uid, agent_id)
+        else:
+            self.assert_workspace_owner(firebase_uid, workspace_id)
+
+    def get_accessible_agent(self, firebase_uid: str, agent_id: str) -> dict:
+        """Load *agent_id* and verify that *firebase_uid* owns it (via workspace).
+
         Returns the agent document dict on success.
         """
         agent_ref = self.db.collection("agents").document(agent_id)
@@ -32,5 +85,6 @@ class PolicyEngine:
         if not agent_doc.exists:
             raise NotFoundError("agent", agent_id)
         agent_data = agent_doc.to_dict()
+        _agent_workspaces.set(agent_id, agent_data["workspaceId"])
         self.assert_workspace_owner(firebase_uid, agent_data["workspaceId"])
         return agent_data
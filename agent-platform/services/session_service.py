@@ -1,13 +1,91 @@
-"""Session CRUD operations against Firestore."""
+"""Session CRUD operations against Firestore.
 
+Messages live in an append-only ``sessions/{id}/messages`` subcollection,
+ordered by a monotonic ``seq`` field. Sessions created before the move may
+still carry an inline ``messages`` array; reads merge it in front of the
+subcollection until ``migrations.session_messages_subcollection`` has run.
+"""
+
+import base64
+import binascii
+import json
+import logging
+import threading
+import time
 from datetime import datetime, timezone
-from uuid import uuid4
+from uuid import NAMESPACE_URL, uuid4, uuid5
 
+from google.api_core.exceptions import NotFound
+from google.cloud.firestore_v1 import Increment, Query
 from google.cloud.firestore_v1.base_query import FieldFilter
 from google.cloud.firestore_v1.client import Client
 
+from core.cache import TTLCache
+from core.config import settings
 from core.exceptions import AppError, NotFoundError
 
+logger = logging.getLogger(__name__)
+
+MESSAGES_SUBCOLLECTION = "messages"
+
+# Firestore allows at most 500 writes per batch
+MAX_BATCH_WRITES = 500
+
+# Session fields fetched for list views — never the legacy messages array.
+# messageCount / lastMessagePreview / lastMessageAt are maintained on every
+# message write (see SessionWriteBuffer.flush).
+SESSION_SUMMARY_FIELDS = [
+    "workspaceId", "agentId", "userId", "title", "status",
+    "parentSessionId", "createdAt", "updatedAt",
+    "messageCount", "lastMessagePreview", "lastMessageAt",
+]
+
+PREVIEW_LENGTH = 100
+
+_seq_lock = threading.Lock()
+_last_seq = 0
+
+# Sessions known to carry messageCount, so flushes can Increment it without
+# a read. The field is never removed, so entries cannot go stale.
+_counted_sessions: TTLCache[str, bool] = TTLCache(maxsize=10_000, ttl=24 * 3600)
+
+
+def clear_counted_sessions() -> None:
+    _counted_sessions.clear()
+
+
+def message_preview(content: str) -> str:
+    return content[:PREVIEW_LENGTH] + "..." if len(content) > PREVIEW_LENGTH else content
+
+
+def message_summary_fields(count: int, last_message: dict | None) -> dict:
+    """Denormalised summary fields for a session, given its messages."""
+    return {
+        "messageCount": count,
+        "lastMessagePreview": message_preview(last_message.get("content", "")) if last_message else None,
+        "lastMessageAt": (
+            datetime.fromisoformat(last_message["timestamp"])
+            if last_message and last_message.get("timestamp") else None
+        ),
+    }
+
+
+def _next_seq() -> int:
+    """Return a strictly increasing (per process) nanosecond sequence number."""
+    global _last_seq
+    with _seq_lock:
+        _last_seq = max(time.time_ns(), _last_seq + 1)
+        return _last_seq
+
+
+def legacy_message_id(session_id: str, index: int) -> str:
+    """Stable id for an inline legacy message that was stored without one."""
+    return str(uuid5(NAMESPACE_URL, f"{session_id}:{index}"))
+
+
+def _messages_ref(db: Client, session_id: str):
+    return db.collection("sessions").document(session_id).collection(MESSAGES_SUBCOLLECTION)
+
 
 def create_session(
     db: Client,
@@ -30,19 +108,24 @@ def create_session(
         "userId": user_id,
         "title": title,
         "status": "active",
-        "messages": [],
         "metadata": metadata,
         "parentSessionId": parent_session_id,
         "createdAt": now,
         "updatedAt": now,
+        **message_summary_fields(0, None),
     }
     ref.set(doc)
+    _counted_sessions.set(ref.id, True)
     doc["id"] = ref.id
+    doc["messages"] = []
     return doc
 
 
-def get_session(db: Client, session_id: str) -> dict:
-    """Get a session by ID. Raises NotFoundError if missing."""
+def get_session_document(db: Client, session_id: str) -> dict:
+    """Get a session document as stored, legacy ``messages`` array included.
+
+    Raises NotFoundError if missing.
+    """
     doc = db.collection("sessions").document(session_id).get()
     if not doc.exists:
         raise NotFoundError("session", session_id)
@@ -51,28 +134,134 @@ def get_session(db: Client, session_id: str) -> dict:
     return data
 
 
+def get_session(db: Client, session_id: str, include_messages: bool = True) -> dict:
+    """Get a session by ID. Raises NotFoundError if missing.
+
+    With *include_messages* the full ordered message list is loaded into
+    ``messages``; pass False when only the session fields are needed.
+    """
+    data = get_session_document(db, session_id)
+    legacy = data.pop("messages", None) or []
+    if include_messages:
+        data["messages"] = list_messages(db, session_id, legacy=legacy)
+    return data
+
+
+def list_messages(
+    db: Client,
+    session_id: str,
+    limit: int | None = None,
+    after: int | None = None,
+    legacy: list[dict] | None = None,
+) -> list[dict]:
+    """List a session's messages in order.
+
+    *after* is the ``seq`` of the last message already seen (exclusive cursor).
+    *legacy* is the session's unmigrated inline ``messages`` array; its
+    entries come first with ``seq`` set to their index, as the migration
+    would store them.
+    """
+    messages = [
+        {**message, "id": message.get("id") or legacy_message_id(session_id, index), "seq": index}
+        for index, message in enumerate(legacy or [])
+        if after is None or index > after
+    ]
+    if limit is not None:
+        messages = messages[:limit]
+        if len(messages) == limit:
+            return messages
+    query = _messages_ref(db, session_id).order_by("seq")
+    if after is not None:
+        query = query.start_after({"seq": after})
+    if limit is not None:
+        query = query.limit(limit - len(messages))
+    return messages + [doc.to_dict() for doc in query.stream()]
+
+
+def _encode_page_token(updated_at: datetime, session_id: str) -> str:
+    payload = json.dumps({"updatedAt": updated_at.isoformat(), "id": session_id})
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def _decode_page_token(page_token: str) -> dict:
+    """Cursor values for list_sessions' ``(updatedAt, __name__)`` ordering."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(page_token.encode()))
+        return {
+            "updatedAt": datetime.fromisoformat(payload["updatedAt"]),
+            "__name__": str(payload["id"]),
+        }
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise AppError(code="INVALID_PAGE_TOKEN", message="Invalid page token")
+
+
 def list_sessions(
     db: Client,
     workspace_id: str,
     agent_id: str | None = None,
     status: str | None = None,
     limit: int = 50,
-) -> list[dict]:
-    """List sessions for a workspace with optional filters."""
+    page_token: str | None = None,
+) -> tuple[list[dict], str | None]:
+    """List a page of a workspace's sessions, most recently updated first.
+
+    Filtering, ordering and paging run in Firestore (composite indexes in
+    ``firestore.indexes.json``) and only SESSION_SUMMARY_FIELDS are fetched.
+    Sessions written before the summary fields existed that have had no
+    message since (and were not backfilled by
+    ``migrations.session_summary_fields``) get them computed from their
+    messages subcollection.
+
+    Returns (sessions, next_page_token); the token is None on the last page.
+    """
     query = db.collection("sessions").where(
         filter=FieldFilter("workspaceId", "==", workspace_id)
     )
+    if agent_id:
+        query = query.where(filter=FieldFilter("agentId", "==", agent_id))
+    if status:
+        query = query.where(filter=FieldFilter("status", "==", status))
+    # Document id breaks ties, so sessions sharing the boundary updatedAt
+    # are neither skipped nor repeated across pages
+    query = (
+        query.order_by("updatedAt", direction=Query.DESCENDING)
+        .order_by("__name__", direction=Query.DESCENDING)
+    )
+    if page_token:
+        query = query.start_after(_decode_page_token(page_token))
+    # One extra document tells us whether another page exists
+    docs = list(query.select(SESSION_SUMMARY_FIELDS).limit(limit + 1).stream())
+
     results = []
-    for doc in query.stream():
+    for doc in docs[:limit]:
         data = doc.to_dict()
         data["id"] = doc.id
-        if agent_id and data.get("agentId") != agent_id:
-            continue
-        if status and data.get("status") != status:
-            continue
+        if "messageCount" not in data:
+            data.update(message_summary_fields(*_message_summary(db, doc.id)))
         results.append(data)
-    results.sort(key=lambda s: str(s.get("updatedAt", "")), reverse=True)
-    return results[:limit]
+    next_token = None
+    if len(docs) > limit and results:
+        next_token = _encode_page_token(results[-1]["updatedAt"], results[-1]["id"])
+    return results, next_token
+
+
+def _message_summary(db: Client, session_id: str) -> tuple[int, dict | None]:
+    """(message count, last message) without downloading the conversation."""
+    messages_ref = _messages_ref(db, session_id)
+    count = messages_ref.count().get()[0][0].value
+    last = list(messages_ref.order_by("seq", direction=Query.DESCENDING).limit(1).stream())
+    return int(count), (last[0].to_dict() if last else None)
+
+
+def _new_message(role: str, content: str, metadata: dict | None = None) -> dict:
+    return {
+        "id": str(uuid4()),
+        "seq": _next_seq(),
+        "role": role,
+        "content": content,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "metadata": metadata or {},
+    }
 
 
 def add_message(
@@ -82,26 +271,116 @@ def add_message(
     content: str,
     metadata: dict | None = None,
 ) -> dict:
-    """Append a message to a session's messages array."""
-    ref = db.collection("sessions").document(session_id)
-    doc = ref.get()
-    if not doc.exists:
-        raise NotFoundError("session", session_id)
-    data = doc.to_dict()
-    message = {
-        "id": str(uuid4()),
-        "role": role,
-        "content": content,
-        "timestamp": datetime.now(timezone.utc).isoformat(),
-        "metadata": metadata or {},
-    }
-    messages = data.get("messages", [])
-    messages.append(message)
-    ref.update({
-        "messages": messages,
-        "updatedAt": datetime.now(timezone.utc),
-    })
-    return message
+    """Append a message to a session's messages subcollection.
+
+    One batched commit regardless of session length: the message document
+    plus an ``updatedAt`` bump on the session.
+    """
+    with SessionWriteBuffer(db, session_id) as writes:
+        return writes.add_message(role, content, metadata)
+
+
+class SessionWriteBuffer:
+    """Collects one turn's session writes and commits them as a WriteBatch.
+
+    Messages and session field updates (status, title, ``metadata.plan``...)
+    are held in memory and written together on flush(). Used as a context
+    manager, pending writes are flushed on exit — also when the turn raises,
+    so work done before the failure is kept. *flush_every* adds a checkpoint
+    every N buffered messages to bound what a hard crash can lose
+    (0 = flush only at turn end).
+    """
+
+    def __init__(self, db: Client, session_id: str, flush_every: int | None = None):
+        self.db = db
+        self.session_id = session_id
+        self.flush_every = (
+            settings.session_write_flush_every if flush_every is None else flush_every
+        )
+        self._messages: list[dict] = []
+        self._updates: dict = {}
+
+    def add_message(self, role: str, content: str, metadata: dict | None = None) -> dict:
+        message = _new_message(role, content, metadata)
+        self._messages.append(message)
+        if self.flush_every and len(self._messages) >= self.flush_every:
+            self.flush()
+        return message
+
+    def update(self, fields: dict) -> None:
+        """Buffer session document field updates (dotted paths allowed)."""
+        self._updates.update(fields)
+
+    @property
+    def pending(self) -> int:
+        return len(self._messages) + (1 if self._updates else 0)
+
+    def flush(self) -> None:
+        """Commit everything buffered so far. No-op when nothing is pending."""
+        if not self._messages and not self._updates:
+            return
+        session_ref = self.db.collection("sessions").document(self.session_id)
+        messages_ref = _messages_ref(self.db, self.session_id)
+        messages, updates = self._messages, self._updates
+        self._messages, self._updates = [], {}
+
+        # The session update leads the first batch, so a missing session
+        # fails the commit before any message lands
+        session_updates = {**updates, "updatedAt": datetime.now(timezone.utc)}
+        if messages:
+            summary = message_summary_fields(0, messages[-1])
+            session_updates.update(summary, messageCount=self._message_count(len(messages)))
+        batch = self.db.batch()
+        batch.update(session_ref, session_updates)
+        pending = 1
+        try:
+            for message in messages:
+                if pending == MAX_BATCH_WRITES:
+                    batch.commit()
+                    batch = self.db.batch()
+                    pending = 0
+                batch.set(messages_ref.document(message["id"]), message)
+                pending += 1
+            batch.commit()
+        except NotFound:
+            raise NotFoundError("session", self.session_id)
+
+    def _message_count(self, added: int):
+        """messageCount update for *added* new messages.
+
+        An Increment on a session without the field would start from 0, so
+        sessions written before it existed get their absolute count (legacy
+        array plus subcollection) instead; once set, later flushes increment.
+        """
+        if _counted_sessions.get(self.session_id):
+            return Increment(added)
+        snapshot = (
+            self.db.collection("sessions").document(self.session_id)
+            .get(field_paths=["messageCount", "messages"])
+        )
+        if not snapshot.exists:
+            # The commit fails with NotFoundError
+            return Increment(added)
+        data = snapshot.to_dict() or {}
+        if "messageCount" in data:
+            count = Increment(added)
+        else:
+            stored = _messages_ref(self.db, self.session_id).count().get()[0][0].value
+            count = int(stored) + len(data.get("messages") or []) + added
+        _counted_sessions.set(self.session_id, True)
+        return count
+
+    def __enter__(self) -> "SessionWriteBuffer":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.flush()
+            return
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Failed to flush session %s writes after error", self.session_id)
 
 
 def update_session_status(db: Client, session_id: str, new_status: str) -> dict:
@@ -127,20 +406,49 @@ def update_session_status(db: Client, session_id: str, new_status: str) -> dict:
         "status": new_status,
         "updatedAt": datetime.now(timezone.utc),
     })
-    updated = ref.get().to_dict()
-    updated["id"] = ref.id
-    return updated
+    return get_session(db, session_id)
 
 
 def delete_session(db: Client, session_id: str) -> None:
-    """Delete a session document from Firestore."""
+    """Delete a session document and its messages from Firestore."""
     ref = db.collection("sessions").document(session_id)
     doc = ref.get()
     if not doc.exists:
         raise NotFoundError("session", session_id)
+    _delete_messages(db, session_id)
     ref.delete()
 
 
+def delete_workspace_sessions(db: Client, workspace_id: str) -> None:
+    """Delete every session (and its messages) in a workspace."""
+    docs = (
+        db.collection("sessions")
+        .where(filter=FieldFilter("workspaceId", "==", workspace_id))
+        .stream()
+    )
+    for doc in docs:
+        _delete_messages(db, doc.id)
+        doc.reference.delete()
+
+
+def _delete_messages(db: Client, session_id: str) -> None:
+    """Delete a session's messages subcollection in batches.
+
+    Firestore does not cascade deletes to subcollections.
+    """
+    batch = db.batch()
+    pending = 0
+    for doc in _messages_ref(db, session_id).select([]).stream():
+        batch.delete(doc.reference)
+        pending += 1
+        if pending == MAX_BATCH_WRITES:
+            batch.commit()
+            batch = db.batch()
+            pending = 0
+    if pending:
+        batch.commit()
+
+
 def generate_session_title(first_message: str) -> str:
     """Generate a short title from the first user message."""
     title = first_message.strip()
@@ -1,12 +1,16 @@
 """Test fixtures: mock Firebase auth, Firestore, Qdrant, and LLM."""
 
+import copy
 from collections import defaultdict
 from datetime import datetime, timezone
+from types import SimpleNamespace
 from unittest.mock import patch, MagicMock
 from uuid import uuid4
 
 import pytest
 from fastapi.testclient import TestClient
+from google.api_core.exceptions import NotFound
+from google.cloud.firestore_v1 import DELETE_FIELD, Increment
 
 
 # ---------------------------------------------------------------------------
@@ -14,20 +18,29 @@ from fastapi.testclient import TestClient
 # ---------------------------------------------------------------------------
 
 class MockDocumentSnapshot:
-    def __init__(self, doc_id: str, data: dict | None):
+    def __init__(self, doc_id: str, data: dict | None, reference: "MockDocumentReference | None" = None):
         self._id = doc_id
         self._data = data
+        self._reference = reference
 
     @property
     def id(self) -> str:
         return self._id
 
+    @property
+    def reference(self) -> "MockDocumentReference | None":
+        return self._reference
+
     @property
     def exists(self) -> bool:
         return self._data is not None
 
     def to_dict(self) -> dict | None:
-        return self._data
+        # Firestore hands out a fresh copy on every read
+        return copy.deepcopy(self._data)
+
+    def get(self, field: str):
+        return (self._data or {}).get(field)
 
 
 class MockDocumentReference:
@@ -39,71 +52,236 @@ class MockDocumentReference:
     def id(self) -> str:
         return self._id
 
-    def get(self) -> MockDocumentSnapshot:
+    @property
+    def path(self) -> str:
+        return f"{self._collection._name}/{self._id}"
+
+    def get(self, field_paths=None) -> MockDocumentSnapshot:
         data = self._collection._store.get(self._id)
-        return MockDocumentSnapshot(self._id, data)
+        return MockDocumentSnapshot(self._id, data, self)
 
-    def set(self, data: dict) -> None:
-        self._collection._store[self._id] = dict(data)
+    def set(self, data: dict, merge: bool = False) -> None:
+        existing = self._collection._store.get(self._id)
+        if merge and existing is not None:
+            existing.update(data)
+        else:
+            self._collection._store[self._id] = dict(data)
 
     def update(self, updates: dict) -> None:
         existing = self._collection._store.get(self._id)
         if existing is None:
-            raise Exception(f"Document {self._id} not found")
-        existing.update(updates)
+            raise NotFound(f"Document {self._id} not found")
+        _apply_updates(existing, updates)
 
     def delete(self) -> None:
         self._collection._store.pop(self._id, None)
 
+    def collection(self, name: str) -> "MockCollectionReference":
+        client = self._collection._client
+        path = f"{self.path}/{name}"
+        return MockCollectionReference(path, client._collections[path], client)
+
+
+def _apply_updates(target: dict, updates: dict) -> None:
+    """Apply Firestore-style updates: dotted paths, DELETE_FIELD, Increment."""
+    for key, value in updates.items():
+        parts = key.split(".")
+        node = target
+        for part in parts[:-1]:
+            node = node.setdefault(part, {})
+        leaf = parts[-1]
+        if value is DELETE_FIELD:
+            node.pop(leaf, None)
+        elif isinstance(value, Increment):
+            node[leaf] = node.get(leaf, 0) + value.value
+        else:
+            node[leaf] = value
+
 
 class MockCollectionReference:
-    def __init__(self, name: str, store: dict):
+    def __init__(self, name: str, store: dict, client: "MockFirestoreClient | None" = None):
         self._name = name
         self._store = store
+        self._client = client
 
     def document(self, doc_id: str | None = None) -> MockDocumentReference:
         if doc_id is None:
             doc_id = str(uuid4())[:20]
         return MockDocumentReference(self, doc_id)
 
+    def _query(self) -> "MockQuery":
+        return MockQuery(self._store, collection=self)
+
     def where(self, field: str | None = None, op: str | None = None, value=None, *, filter=None) -> "MockQuery":
-        if filter is not None:
-            # Support FieldFilter(field, op, value) keyword syntax
-            field = filter.field_path
-            op = filter.op_string
-            value = filter.value
-        return MockQuery(self._store, field, op, value)
+        return self._query().where(field, op, value, filter=filter)
+
+    def order_by(self, field: str, direction: str = "ASCENDING") -> "MockQuery":
+        return self._query().order_by(field, direction=direction)
+
+    def limit(self, count: int) -> "MockQuery":
+        return self._query().limit(count)
+
+    def select(self, field_paths) -> "MockQuery":
+        return self._query().select(field_paths)
+
+    def count(self) -> "MockAggregationQuery":
+        return self._query().count()
+
+    def stream(self):
+        return self._query().stream()
 
-    def order_by(self, field: str) -> "MockQuery":
-        return MockQuery(self._store)
+
+class MockAggregationQuery:
+    """query.count(): get() returns [[result]] with ``.value``, like Firestore."""
+
+    def __init__(self, query: "MockQuery"):
+        self._query = query
+
+    def get(self):
+        return [[SimpleNamespace(alias="count", value=len(self._query.stream()))]]
 
 
 class MockQuery:
-    def __init__(self, store: dict, field: str | None = None, op: str | None = None, value=None):
+    def __init__(
+        self,
+        store: dict,
+        field: str | None = None,
+        op: str | None = None,
+        value=None,
+        *,
+        collection: MockCollectionReference | None = None,
+    ):
         self._store = store
-        self._field = field
-        self._op = op
-        self._value = value
+        self._collection = collection
+        self._filters: list[tuple] = [(field, op, value)] if field else []
+        self._orders: list[tuple[str, str]] = []
+        self._limit: int | None = None
+        self._cursor = None
+        self._fields: list[str] | None = None
+
+    def _clone(self) -> "MockQuery":
+        q = MockQuery(self._store, collection=self._collection)
+        q._filters = list(self._filters)
+        q._orders = list(self._orders)
+        q._limit = self._limit
+        q._cursor = self._cursor
+        q._fields = self._fields
+        return q
 
-    def order_by(self, field: str) -> "MockQuery":
-        return self
+    def where(self, field: str | None = None, op: str | None = None, value=None, *, filter=None) -> "MockQuery":
+        if filter is not None:
+            # Support FieldFilter(field, op, value) keyword syntax
+            field = filter.field_path
+            op = filter.op_string
+            value = filter.value
+        q = self._clone()
+        q._filters.append((field, op, value))
+        return q
+
+    def order_by(self, field: str, direction: str = "ASCENDING") -> "MockQuery":
+        q = self._clone()
+        q._orders.append((field, direction))
+        return q
+
+    def limit(self, count: int) -> "MockQuery":
+        q = self._clone()
+        q._limit = count
+        return q
+
+    def start_after(self, cursor) -> "MockQuery":
+        q = self._clone()
+        q._cursor = cursor
+        return q
+
+    def select(self, field_paths) -> "MockQuery":
+        q = self._clone()
+        q._fields = list(field_paths)
+        return q
+
+    def count(self) -> MockAggregationQuery:
+        return MockAggregationQuery(self)
+
+    def _matches(self, data: dict) -> bool:
+        for field, op, value in self._filters:
+            actual = data.get(field)
+            if op == "==" and actual != value:
+                return False
+            if op == "in" and actual not in value:
+                return False
+        return all(field == "__name__" or field in data for field, _ in self._orders)
+
+    def _compare(self, a: tuple, b: tuple) -> int:
+        for (_, direction), x, y in zip(self._orders, a, b):
+            if x == y:
+                continue
+            result = -1 if x < y else 1
+            return -result if direction == "DESCENDING" else result
+        return 0
 
     def stream(self):
+        import functools
+
+        matches = [
+            (doc_id, data) for doc_id, data in self._store.items() if self._matches(data)
+        ]
+        if self._orders:
+            def key(item):
+                doc_id, data = item
+                return tuple(doc_id if f == "__name__" else data.get(f) for f, _ in self._orders)
+            matches.sort(key=functools.cmp_to_key(lambda a, b: self._compare(key(a), key(b))))
+            if self._cursor is not None:
+                if isinstance(self._cursor, MockDocumentSnapshot):
+                    cursor = key((self._cursor.id, self._cursor.to_dict()))
+                else:
+                    cursor = tuple(self._cursor.get(f) for f, _ in self._orders)
+                matches = [m for m in matches if self._compare(key(m), cursor) > 0]
+        if self._limit is not None:
+            matches = matches[:self._limit]
         results = []
-        for doc_id, data in self._store.items():
-            if self._field and self._op == "==":
-                if data.get(self._field) != self._value:
-                    continue
-            results.append(MockDocumentSnapshot(doc_id, data))
+        for doc_id, data in matches:
+            if self._fields is not None:
+                data = {k: v for k, v in data.items() if k in self._fields}
+            ref = self._collection.document(doc_id) if self._collection else None
+            results.append(MockDocumentSnapshot(doc_id, data, ref))
         return results
 
 
+class MockWriteBatch:
+    """Collects writes and applies them together on commit()."""
+
+    def __init__(self, client: "MockFirestoreClient"):
+        self._client = client
+        self._ops: list = []
+
+    def set(self, ref: MockDocumentReference, data: dict, merge: bool = False) -> None:
+        self._ops.append(lambda: ref.set(data, merge=merge))
+
+    def update(self, ref: MockDocumentReference, updates: dict) -> None:
+        self._ops.append(lambda: ref.update(updates))
+
+    def delete(self, ref: MockDocumentReference) -> None:
+        self._ops.append(ref.delete)
+
+    def __len__(self) -> int:
+        return len(self._ops)
+
+    def commit(self) -> list:
+        self._client.batch_commits += 1
+        for op in self._ops:
+            op()
+        return []
+
+
 class MockFirestoreClient:
     def __init__(self):
         self._collections: dict[str, dict] = defaultdict(dict)
+        self.batch_commits = 0
 
     def collection(self, name: str) -> MockCollectionReference:
-        return MockCollectionReference(name, self._collections[name])
+        return MockCollectionReference(name, self._collections[name], self)
+
+    def batch(self) -> MockWriteBatch:
+        return MockWriteBatch(self)
 
 
 # ---------------------------------------------------------------------------
@@ -122,18 +300,34 @@ class MockQdrantCollection:
 
 class MockQdrantClient:
     def __init__(self):
-        self._collections: set[str] = set()
+        self._collections: dict[str, dict] = {}  # name -> sparse vectors config
+        self.payload_indexes: list[tuple[str, str]] = []
+        self.deleted_points: list[tuple[str, object]] = []
+
+    def collection_exists(self, collection_name: str) -> bool:
+        return collection_name in self._collections
 
     def get_collections(self):
         result = MockQdrantCollections()
         result.collections = [MockQdrantCollection(n) for n in self._collections]
         return result
 
+    def get_collection(self, collection_name: str):
+        params = SimpleNamespace(sparse_vectors=self._collections[collection_name])
+        payload_schema = {field: None for name, field in self.payload_indexes if name == collection_name}
+        return SimpleNamespace(config=SimpleNamespace(params=params), payload_schema=payload_schema)
+
     def create_collection(self, collection_name: str, **kwargs):
-        self._collections.add(collection_name)
+        self._collections[collection_name] = kwargs.get("sparse_vectors_config") or {}
 
     def delete_collection(self, collection_name: str):
-        self._collections.discard(collection_name)
+        self._collections.pop(collection_name, None)
+
+    def create_payload_index(self, collection_name: str, field_name: str, **kwargs):
+        self.payload_indexes.append((collection_name, field_name))
+
+    def delete(self, collection_name: str, points_selector):
+        self.deleted_points.append((collection_name, points_selector))
 
 
 # ---------------------------------------------------------------------------
@@ -143,6 +337,48 @@ class MockQdrantClient:
 TEST_FIREBASE_UID = "test-user-uid-123"
 
 
+@pytest.fixture(autouse=True)
+def reset_policy_cache():
+    """Ownership lookups are cached per process; start each test cold."""
+    from services.policy_engine import clear_policy_cache
+
+    clear_policy_cache()
+    yield
+    clear_policy_cache()
+
+
+@pytest.fixture(autouse=True)
+def reset_counted_sessions():
+    """Sessions known to carry messageCount are remembered per process; start each test cold."""
+    from services.session_service import clear_counted_sessions
+
+    clear_counted_sessions()
+    yield
+    clear_counted_sessions()
+
+
+@pytest.fixture(autouse=True)
+def reset_mcp_state():
+    """MCP manifests, connection pools and breakers are per process; start each test cold."""
+    from services.mcp_client import clear_manifest_cache, close_mcp_connections
+
+    clear_manifest_cache()
+    close_mcp_connections()
+    yield
+    clear_manifest_cache()
+    close_mcp_connections()
+
+
+@pytest.fixture(autouse=True)
+def reset_known_collections():
+    """Verified Qdrant collections are remembered per process; start each test cold."""
+    from ai.vector_store import clear_known_collections
+
+    clear_known_collections()
+    yield
+    clear_known_collections()
+
+
 @pytest.fixture
 def mock_firestore():
     return MockFirestoreClient()
@@ -183,7 +419,6 @@ def client(seeded_firestore, mock_qdrant):
         patch("api.sessions.get_firestore_client", return_value=seeded_firestore),
         patch("api.plans.get_firestore_client", return_value=seeded_firestore),
         patch("api.workspaces.get_qdrant_client", return_value=mock_qdrant),
-        patch("api.workspaces.ensure_workspace_collection", side_effect=lambda c, wid, vs: c.create_collection(f"workspace_{wid}")),
     ]
 
     for p in patches:
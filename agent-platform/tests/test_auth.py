@@ -0,0 +1,70 @@
+"""Tests for ID token verification and its cache."""
+
+import time
+from unittest.mock import patch
+
+import pytest
+from fastapi import HTTPException
+
+import services.auth as auth
+
+
+@pytest.fixture(autouse=True)
+def reset_token_cache():
+    auth._token_cache.clear()
+    with patch("services.auth._ensure_firebase_initialized"):
+        yield
+    auth._token_cache.clear()
+
+
+def _decoded(uid="user-1", expires_in=3600):
+    return {"uid": uid, "exp": time.time() + expires_in}
+
+
+@patch("services.auth.firebase_auth.verify_id_token")
+def test_verified_token_is_cached(mock_verify):
+    mock_verify.return_value = _decoded()
+
+    assert auth.get_current_user("Bearer tok").firebase_uid == "user-1"
+    assert auth.get_current_user("Bearer tok").firebase_uid == "user-1"
+
+    assert mock_verify.call_count == 1
+    stats = auth._token_cache.stats()
+    assert (stats.hits, stats.misses) == (1, 1)
+
+
+@patch("services.auth.firebase_auth.verify_id_token")
+def test_cache_honours_token_expiry(mock_verify):
+    mock_verify.return_value = _decoded(expires_in=-1)
+
+    auth.get_current_user("Bearer tok")
+    auth.get_current_user("Bearer tok")
+
+    assert mock_verify.call_count == 2
+
+
+@patch("services.auth.firebase_auth.verify_id_token")
+def test_invalid_token_not_cached(mock_verify):
+    mock_verify.side_effect = ValueError("bad signature")
+
+    for _ in range(2):
+        with pytest.raises(HTTPException) as exc:
+            auth.get_current_user("Bearer tok")
+        assert exc.value.status_code == 401
+    assert mock_verify.call_count == 2
+
+
+@patch("services.auth.firebase_auth.verify_id_token")
+def test_check_revoked_setting(mock_verify):
+    mock_verify.return_value = _decoded()
+
+    with patch.object(auth.settings, "auth_check_revoked", True):
+        auth.get_current_user("Bearer tok")
+
+    mock_verify.assert_called_once_with("tok", check_revoked=True)
+
+
+def test_missing_header():
+    with pytest.raises(HTTPException) as exc:
+        auth.get_current_user(None)
+    assert exc.value.status_code == 401
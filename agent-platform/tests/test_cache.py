@@ -0,0 +1,38 @@
+"""Tests for the shared TTL/LRU cache."""
+
+from unittest.mock import patch
+
+from core.cache import TTLCache
+
+
+def test_lru_eviction():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats().evictions == 1
+
+
+def test_entries_expire():
+    cache = TTLCache(maxsize=10, ttl=60)
+    with patch("core.cache.time.monotonic", return_value=100.0):
+        cache.set("a", 1, ttl=5)
+    with patch("core.cache.time.monotonic", return_value=104.0):
+        assert cache.get("a") == 1
+    with patch("core.cache.time.monotonic", return_value=106.0):
+        assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_ttl_capped_and_zero_skipped():
+    cache = TTLCache(maxsize=10, ttl=1)
+    cache.set("a", 1, ttl=0)
+    assert cache.get("a") is None
+    with patch("core.cache.time.monotonic", return_value=0.0):
+        cache.set("b", 2, ttl=3600)
+    with patch("core.cache.time.monotonic", return_value=2.0):
+        assert cache.get("b") is None
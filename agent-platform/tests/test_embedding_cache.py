@@ -0,0 +1,162 @@
+"""Tests for the embedding cache and the caching embedding provider."""
+
+import asyncio
+
+import pytest
+
+from ai.embedding_cache import EmbeddingCache
+from ai.rag import CachedEmbeddingProvider
+
+
+class CountingProvider:
+    def __init__(self):
+        self.calls: list[list[str]] = []
+
+    def embed(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(t)), 0.5] for t in texts]
+
+    async def aembed(self, texts):
+        return self.embed(texts)
+
+
+def test_memory_hit_and_miss_counts():
+    cache = EmbeddingCache(maxsize=10)
+    cache.set_many("openai:small", {"a": [1.0], "b": [2.0]})
+
+    assert cache.get_many("openai:small", ["a", "c"]) == {"a": [1.0]}
+    stats = cache.stats()["memory"]
+    assert (stats.hits, stats.misses, stats.size) == (1, 1, 2)
+    assert stats.hit_rate == 0.5
+
+
+def test_namespaces_are_isolated():
+    cache = EmbeddingCache(maxsize=10)
+    cache.set_many("openai:small", {"a": [1.0]})
+    assert cache.get_many("openai:large", ["a"]) == {}
+
+
+def test_memory_lru_eviction():
+    cache = EmbeddingCache(maxsize=2)
+    cache.set_many("ns", {"a": [1.0], "b": [2.0]})
+    cache.get_many("ns", ["a"])  # a is now most recently used
+    cache.set_many("ns", {"c": [3.0]})
+
+    assert set(cache.get_many("ns", ["a", "b", "c"])) == {"a", "c"}
+    assert cache.stats()["memory"].evictions == 1
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite")
+    first = EmbeddingCache(maxsize=10, path=path, disk_maxsize=100)
+    first.set_many("ns", {"hello": [0.25, -1.5]})
+    first.close()
+
+    second = EmbeddingCache(maxsize=10, path=path, disk_maxsize=100)
+    assert second.get_many("ns", ["hello"]) == {"hello": [0.25, -1.5]}
+    stats = second.stats()
+    assert (stats["memory"].misses, stats["disk"].hits) == (1, 1)
+    # Promoted to memory: the next lookup does not touch disk
+    second.get_many("ns", ["hello"])
+    assert second.stats()["disk"].hits == 1
+    second.close()
+
+
+def test_disk_tier_trimmed_by_least_recent_use(tmp_path):
+    cache = EmbeddingCache(maxsize=0, path=str(tmp_path / "e.sqlite"), disk_maxsize=2)
+    cache.set_many("ns", {"a": [1.0]})
+    cache.set_many("ns", {"b": [2.0]})
+    cache.set_many("ns", {"c": [3.0]})
+
+    assert set(cache.get_many("ns", ["a", "b", "c"])) == {"b", "c"}
+    assert cache.stats()["disk"].evictions == 1
+    cache.close()
+
+
+def test_disk_write_failure_rolls_back(tmp_path):
+    from ai.embedding_cache import _SqliteVectorStore
+
+    store = _SqliteVectorStore(str(tmp_path / "e.sqlite"), maxsize=10)
+    with pytest.raises(TypeError):
+        store.set_many("ns", {"bad": ["not a float"]})
+
+    # The connection is usable again and nothing from the failed write landed
+    store.set_many("ns", {"good": [1.0]})
+    assert store.get_many("ns", ["bad", "good"]) == {"good": [1.0]}
+    store.close()
+
+
+def test_disk_writes_count_rows_without_scanning(tmp_path, monkeypatch):
+    from ai.embedding_cache import _SqliteVectorStore
+
+    store = _SqliteVectorStore(str(tmp_path / "e.sqlite"), maxsize=2)
+    counts = []
+    original = store._count
+    monkeypatch.setattr(store, "_count", lambda: counts.append(1) or original())
+
+    store.set_many("ns", {"a": [1.0], "b": [2.0]})
+    store.set_many("ns", {"a": [1.5]})  # Replacing a row does not grow the table
+    assert counts == []
+    assert store.evictions == 0
+
+    store.set_many("ns", {"c": [3.0]})
+    assert len(counts) == 1
+    assert store.evictions == 1
+    assert store.size() == 2
+    store.close()
+
+
+def test_cached_provider_embeds_only_misses():
+    provider = CountingProvider()
+    cached = CachedEmbeddingProvider(provider, EmbeddingCache(maxsize=10), "ns")
+
+    first = cached.embed(["one", "two", "one"])
+    second = cached.embed(["two", "three"])
+
+    assert provider.calls == [["one", "two"], ["three"]]
+    assert first == [[3.0, 0.5], [3.0, 0.5], [3.0, 0.5]]
+    assert second[1] == [5.0, 0.5]
+
+
+def test_cached_provider_async():
+    provider = CountingProvider()
+    cached = CachedEmbeddingProvider(provider, EmbeddingCache(maxsize=10), "ns")
+
+    asyncio.run(cached.aembed(["query"]))
+    result = asyncio.run(cached.aembed(["query"]))
+
+    assert result == [[5.0, 0.5]]
+    assert provider.calls == [["query"]]
+
+
+def test_cached_provider_length_mismatch_raises():
+    class BrokenProvider(CountingProvider):
+        def embed(self, texts):
+            return []
+
+    cached = CachedEmbeddingProvider(BrokenProvider(), EmbeddingCache(maxsize=10), "ns")
+    with pytest.raises(ValueError):
+        cached.embed(["a"])
+
+
+def test_reduced_dimensions_get_their_own_namespace(monkeypatch):
+    from ai.models import get_embeddings_model_id, settings
+
+    monkeypatch.setattr(settings, "embeddings_provider", "openai")
+    monkeypatch.setattr(settings, "embeddings_model", "text-embedding-3-large")
+    assert get_embeddings_model_id() == "openai:text-embedding-3-large"
+
+    monkeypatch.setattr(settings, "embeddings_reduce_dimensions", True)
+    monkeypatch.setattr(settings, "qdrant_vector_size", 256)
+    assert get_embeddings_model_id() == "openai:text-embedding-3-large@256"
+
+
+def test_reduced_dimensions_requested_from_model(monkeypatch):
+    from ai.models import Provider, create_embeddings_model, settings
+
+    monkeypatch.setattr(settings, "openai_api_key", "key")
+    monkeypatch.setattr(settings, "embeddings_reduce_dimensions", True)
+    monkeypatch.setattr(settings, "qdrant_vector_size", 256)
+    assert create_embeddings_model(Provider.OPENAI).dimensions == 256
+    with pytest.raises(RuntimeError):
+        create_embeddings_model(Provider.GEMINI)
@@ -1,7 +1,7 @@
 """Tests for the execution service."""
 
 import json
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 import tools.registry as registry_mod
@@ -193,6 +193,98 @@ def test_tool_calls_stored_in_session(mock_get_model):
     assert "tool_result" in roles
 
 
+@patch("services.execution_service.get_chat_model")
+def test_tool_messages_committed_in_one_batch(mock_get_model):
+    """All tool messages of a turn land in a single batched commit."""
+    db = _make_db()
+    session = _make_session_with_user_msg(db)
+    agent = _gm_agent()
+
+    tool_call_response = MagicMock()
+    tool_call_response.content = ""
+    tool_call_response.tool_calls = [
+        {"name": "pyramids.list", "args": {}, "id": "c1"},
+        {"name": "pyramids.list", "args": {}, "id": "c2"},
+    ]
+
+    text_response = MagicMock()
+    text_response.content = "Done."
+    text_response.tool_calls = []
+
+    mock_llm = MagicMock()
+    mock_llm.bind_tools.return_value = mock_llm
+    mock_llm.invoke.side_effect = [tool_call_response, text_response]
+    mock_get_model.return_value = mock_llm
+
+    before = db.batch_commits
+    result = ExecutionService(db, agent, session).execute("List pyramids twice")
+
+    assert db.batch_commits - before == 1
+    assert len(result["messages_added"]) == 4
+
+
+def _patch_handler(tool_id, handler):
+    from dataclasses import replace
+    registry = registry_mod.get_tool_registry()
+    registry._tools[tool_id] = replace(registry.get_tool(tool_id), handler=handler)
+
+
+@patch("services.execution_service.get_chat_model")
+def test_read_only_tool_calls_run_concurrently(mock_get_model):
+    """Independent reads overlap; results keep the LLM's call order."""
+    import threading
+
+    db = _make_db()
+    session = _make_session_with_user_msg(db)
+    barrier = threading.Barrier(2, timeout=5)
+
+    def concurrent_list(db, workspace_id, user_id, params):
+        barrier.wait()  # deadlocks (and times out) unless both run at once
+        return {"success": True, "app": params["app"]}
+
+    _patch_handler("pyramids.list", concurrent_list)
+    _patch_handler("diagrams.list", concurrent_list)
+
+    tool_call_response = MagicMock()
+    tool_call_response.content = ""
+    tool_call_response.tool_calls = [
+        {"name": "pyramids.list", "args": {"app": "pyramids"}, "id": "c1"},
+        {"name": "diagrams.list", "args": {"app": "diagrams"}, "id": "c2"},
+    ]
+    text_response = MagicMock()
+    text_response.content = "Summary."
+    text_response.tool_calls = []
+
+    mock_llm = MagicMock()
+    mock_llm.invoke.side_effect = [tool_call_response, text_response]
+    mock_get_model.return_value = mock_llm
+
+    result = ExecutionService(db, _gm_agent(), session).execute("Summarise")
+
+    assert [tc["result"]["app"] for tc in result["tool_calls"]] == ["pyramids", "diagrams"]
+    assert [m["role"] for m in result["messages_added"]] == ["tool_call", "tool_result"] * 2
+    tool_messages = mock_llm.invoke.call_args_list[1].args[0][-2:]
+    assert [m.tool_call_id for m in tool_messages] == ["c1", "c2"]
+
+
+def test_writes_split_parallel_batches():
+    db = _make_db()
+    session = _make_session_with_user_msg(db)
+    service = ExecutionService(db, _gm_agent(), session)
+
+    batches = service._tool_call_batches([
+        {"name": "pyramids.list", "args": {}, "id": "a"},
+        {"name": "pyramids.read", "args": {}, "id": "b"},
+        {"name": "pyramids.create", "args": {}, "id": "c"},
+        {"name": "pyramids.list", "args": {}},
+    ])
+
+    assert [[tc["name"] for tc in b] for b in batches] == [
+        ["pyramids.list", "pyramids.read"], ["pyramids.create"], ["pyramids.list"],
+    ]
+    assert batches[-1][0]["id"]
+
+
 @patch("services.execution_service.get_chat_model")
 def test_max_iterations_safety(mock_get_model):
     """Execution stops after MAX_TOOL_ITERATIONS."""
@@ -273,3 +365,196 @@ def test_tool_creates_document(mock_get_model):
     doc = list(pyramids.values())[0]
     assert doc["title"] == "My Pyramid"
     assert doc["workspaceId"] == "ws-1"
+
+
+def _run(coro):
+    import asyncio
+    return asyncio.run(coro)
+
+
+@patch("services.execution_service.get_chat_model")
+def test_aexecute_single_tool_call(mock_get_model):
+    """aexecute awaits the LLM and runs tools off the event loop."""
+    db = _make_db()
+    session = _make_session_with_user_msg(db)
+    agent = _gm_agent()
+
+    tool_call_response = MagicMock()
+    tool_call_response.content = ""
+    tool_call_response.tool_calls = [{"name": "pyramids.create", "args": {"title": "Async"}, "id": "c1"}]
+
+    text_response = MagicMock()
+    text_response.content = "Created!"
+    text_response.tool_calls = []
+
+    mock_llm = MagicMock()
+    mock_llm.bind_tools.return_value = mock_llm
+    mock_llm.ainvoke = AsyncMock(side_effect=[tool_call_response, text_response])
+    mock_get_model.return_value = mock_llm
+
+    result = _run(ExecutionService(db, agent, session).aexecute("Create a pyramid"))
+
+    assert result["response"] == "Created!"
+    assert result["tool_calls"][0]["result"]["success"] is True
+    assert len(db._collections["pyramids"]) == 1
+    mock_llm.invoke.assert_not_called()
+
+
+@patch("services.execution_service.get_chat_model")
+def test_astream_emits_tokens_and_tool_events(mock_get_model):
+    """astream() yields tokens, tool_call/tool_result events and a final done event."""
+    from langchain_core.messages import AIMessageChunk
+
+    db = _make_db()
+    session = _make_session_with_user_msg(db)
+    agent = _gm_agent()
+
+    rounds = iter([
+        [AIMessageChunk(content="", tool_call_chunks=[
+            {"name": "pyramids.list", "args": "{}", "id": "c1", "index": 0},
+        ])],
+        [AIMessageChunk(content="You have "), AIMessageChunk(content="0 pyramids.")],
+    ])
+
+    async def fake_astream(messages):
+        for chunk in next(rounds):
+            yield chunk
+
+    mock_llm = MagicMock()
+    mock_llm.bind_tools.return_value = mock_llm
+    mock_llm.astream.side_effect = fake_astream
+    mock_get_model.return_value = mock_llm
+
+    async def collect():
+        return [e async for e in ExecutionService(db, agent, session).astream("List my pyramids")]
+
+    events = _run(collect())
+    types = [e["type"] for e in events]
+    assert types == ["tool_call", "tool_result", "token", "token", "done"]
+    assert events[0]["tool_id"] == "pyramids.list"
+    assert events[1]["result"]["success"] is True
+    done = events[-1]
+    assert done["response"] == "You have 0 pyramids."
+    assert len(done["tool_calls"]) == 1
+
+
+@patch("services.mcp_client.httpx.Client.post")
+@patch("services.execution_service.get_chat_model")
+def test_mcp_tools_bound_and_called(mock_get_model, mock_post):
+    """Tools from the agent's mcpServers are bound to the LLM and executed."""
+    import httpx
+
+    def post(url, **kwargs):
+        request = httpx.Request("POST", url)
+        if url.endswith("/tools/list"):
+            return httpx.Response(200, json={"tools": [{"name": "search", "description": "Search"}]}, request=request)
+        return httpx.Response(200, json={"content": "3 results"}, request=request)
+
+    mock_post.side_effect = post
+    db = _make_db()
+    agent = {**_custom_agent_no_access(), "mcpServers": [{"name": "docs", "url": "https://docs.example.com"}]}
+    session = _make_session_with_user_msg(db, agent["id"])
+
+    tool_call_response = MagicMock()
+    tool_call_response.content = ""
+    tool_call_response.tool_calls = [{"name": "mcp__docs__search", "args": {"q": "auth"}, "id": "c1"}]
+    text_response = MagicMock()
+    text_response.content = "Found 3 results."
+    text_response.tool_calls = []
+    mock_llm = MagicMock()
+    mock_llm.invoke.side_effect = [tool_call_response, text_response]
+    mock_get_model.return_value = mock_llm
+
+    result = ExecutionService(db, agent, session).execute("Search docs")
+
+    bound = mock_get_model.call_args.kwargs["tools"]
+    assert [t.name for t in bound] == ["mcp__docs__search"]
+    assert result["tool_calls"][0]["result"] == {"success": True, "result": "3 results"}
+
+
+@patch("services.mcp_client.httpx.Client.post")
+@patch("services.execution_service.get_chat_model")
+def test_mcp_tool_from_free_text_server_name(mock_get_model, mock_post):
+    """A server name with spaces and punctuation binds a valid function name that still routes back."""
+    import re
+
+    import httpx
+
+    calls = []
+
+    def post(url, **kwargs):
+        request = httpx.Request("POST", url)
+        if url.endswith("/tools/list"):
+            return httpx.Response(200, json={"tools": [{"name": "search.issues", "description": "Search"}]}, request=request)
+        calls.append(kwargs["json"])
+        return httpx.Response(200, json={"content": "1 issue"}, request=request)
+
+    mock_post.side_effect = post
+    db = _make_db()
+    agent = {**_custom_agent_no_access(), "mcpServers": [{"name": "My GitHub (work)!", "url": "https://gh.example.com"}]}
+    session = _make_session_with_user_msg(db, agent["id"])
+
+    mock_llm = MagicMock()
+    mock_get_model.return_value = mock_llm
+    service = ExecutionService(db, agent, session)
+    service._prepare(None)
+    [bound] = mock_get_model.call_args.kwargs["tools"]
+    assert re.match(r"^[a-zA-Z0-9_-]{1,64}$", bound.name)
+
+    tool_call_response = MagicMock()
+    tool_call_response.content = ""
+    tool_call_response.tool_calls = [{"name": bound.name, "args": {"q": "bug"}, "id": "c1"}]
+    text_response = MagicMock()
+    text_response.content = "Found it."
+    text_response.tool_calls = []
+    mock_llm.invoke.side_effect = [tool_call_response, text_response]
+
+    result = service.execute("Find the bug")
+
+    assert result["tool_calls"][0]["result"] == {"success": True, "result": "1 issue"}
+    assert calls[0]["name"] == "search.issues"
+
+
+@patch("services.mcp_client.httpx.Client.post")
+@patch("services.execution_service.get_chat_model")
+def test_aexecute_mcp_discovery_keeps_event_loop_responsive(mock_get_model, mock_post):
+    """Blocking MCP discovery runs in a worker thread, not on the event loop."""
+    import asyncio
+    import time
+
+    import httpx
+
+    def slow_post(url, **kwargs):
+        time.sleep(0.3)
+        return httpx.Response(200, json={"tools": []}, request=httpx.Request("POST", url))
+
+    mock_post.side_effect = slow_post
+    db = _make_db()
+    agent = {**_custom_agent_no_access(), "mcpServers": [{"name": "docs", "url": "https://docs.example.com"}]}
+    session = _make_session_with_user_msg(db, agent["id"])
+
+    text_response = MagicMock()
+    text_response.content = "Hi"
+    text_response.tool_calls = []
+    mock_llm = MagicMock()
+    mock_llm.ainvoke = AsyncMock(return_value=text_response)
+    mock_get_model.return_value = mock_llm
+
+    async def main():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        result = await ExecutionService(db, agent, session).aexecute("Hello")
+        task.cancel()
+        return result, ticks
+
+    result, ticks = _run(main())
+    assert result["response"] == "Hi"
+    # A blocked loop would manage at most one tick during the 0.3s discovery
+    assert ticks >= 10
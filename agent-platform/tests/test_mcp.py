@@ -1,11 +1,32 @@
 """Tests for the MCP client."""
 
-from unittest.mock import patch, MagicMock
+import time
+from unittest.mock import patch
 
 import pytest
 import httpx
 
-from services.mcp_client import McpClient, McpConnectionManager, McpServerConfig
+from core.config import settings
+from services.mcp_client import (
+    CircuitBreaker,
+    McpClient,
+    McpConnectionManager,
+    McpConnectionRegistry,
+    McpServerConfig,
+    mcp_server_stats,
+)
+
+
+def _http_response(status_code, json_body=None, headers=None):
+    return httpx.Response(
+        status_code, json=json_body, headers=headers,
+        request=httpx.Request("POST", "https://mcp.example.com/tools/list"),
+    )
+
+
+@pytest.fixture(autouse=True)
+def no_retry_backoff(monkeypatch):
+    monkeypatch.setattr(settings, "mcp_retry_backoff", 0)
 
 
 def _mock_tools_response():
@@ -36,12 +57,10 @@ def _mock_tools_response():
     }
 
 
-@patch("services.mcp_client.httpx.post")
+@patch("services.mcp_client.httpx.Client.post")
 def test_connect_discovers_tools(mock_post):
     """Connect discovers tools from MCP server."""
-    mock_response = MagicMock()
-    mock_response.json.return_value = _mock_tools_response()
-    mock_response.raise_for_status = MagicMock()
+    mock_response = _http_response(200, _mock_tools_response())
     mock_post.return_value = mock_response
 
     config = McpServerConfig(name="github", url="https://mcp.example.com")
@@ -54,12 +73,10 @@ def test_connect_discovers_tools(mock_post):
     mock_post.assert_called_once()
 
 
-@patch("services.mcp_client.httpx.post")
+@patch("services.mcp_client.httpx.Client.post")
 def test_connect_with_bearer_auth(mock_post):
     """Auth headers are sent correctly."""
-    mock_response = MagicMock()
-    mock_response.json.return_value = {"tools": []}
-    mock_response.raise_for_status = MagicMock()
+    mock_response = _http_response(200, {"tools": []})
     mock_post.return_value = mock_response
 
     config = McpServerConfig(
@@ -75,7 +92,7 @@ def test_connect_with_bearer_auth(mock_post):
     assert headers["Authorization"] == "Bearer my-secret-token"
 
 
-@patch("services.mcp_client.httpx.post")
+@patch("services.mcp_client.httpx.Client.post")
 def test_connect_failure_graceful(mock_post):
     """Connection failure is handled gracefully."""
     mock_post.side_effect = httpx.ConnectError("Connection refused")
@@ -88,18 +105,14 @@ def test_connect_failure_graceful(mock_post):
     assert tools == []
 
 
-@patch("services.mcp_client.httpx.post")
+@patch("services.mcp_client.httpx.Client.post")
 def test_call_tool(mock_post):
     """Tool call sends correct request and returns result."""
     # First call: connect
-    connect_response = MagicMock()
-    connect_response.json.return_value = _mock_tools_response()
-    connect_response.raise_for_status = MagicMock()
+    connect_response = _http_response(200, _mock_tools_response())
 
     # Second call: tool call
-    call_response = MagicMock()
-    call_response.json.return_value = {"content": [{"type": "text", "text": "Issue created #42"}]}
-    call_response.raise_for_status = MagicMock()
+    call_response = _http_response(200, {"content": [{"type": "text", "text": "Issue created #42"}]})
 
     mock_post.side_effect = [connect_response, call_response]
 
@@ -122,20 +135,14 @@ def test_call_tool_not_connected():
     assert "Not connected" in result["error"]
 
 
-@patch("services.mcp_client.httpx.post")
+@patch("services.mcp_client.httpx.Client.post")
 def test_call_tool_server_error(mock_post):
     """HTTP error from MCP server is handled."""
     # Connect succeeds
-    connect_response = MagicMock()
-    connect_response.json.return_value = {"tools": [{"name": "test_tool"}]}
-    connect_response.raise_for_status = MagicMock()
+    connect_response = _http_response(200, {"tools": [{"name": "test_tool"}]})
 
     # Tool call fails
-    error_response = MagicMock()
-    error_response.status_code = 500
-    error_response.raise_for_status.side_effect = httpx.HTTPStatusError(
-        "Server Error", request=MagicMock(), response=error_response,
-    )
+    error_response = _http_response(500)
 
     mock_post.side_effect = [connect_response, error_response]
 
@@ -148,12 +155,10 @@ def test_call_tool_server_error(mock_post):
     assert "500" in result["error"]
 
 
-@patch("services.mcp_client.httpx.post")
+@patch("services.mcp_client.httpx.Client.post")
 def test_disconnect(mock_post):
     """Disconnect clears state."""
-    mock_response = MagicMock()
-    mock_response.json.return_value = _mock_tools_response()
-    mock_response.raise_for_status = MagicMock()
+    mock_response = _http_response(200, _mock_tools_response())
     mock_post.return_value = mock_response
 
     config = McpServerConfig(name="github", url="https://mcp.example.com")
@@ -166,12 +171,10 @@ def test_disconnect(mock_post):
     assert client.tools == []
 
 
-@patch("services.mcp_client.httpx.post")
+@patch("services.mcp_client.httpx.Client.post")
 def test_connection_manager_connect_all(mock_post):
     """Manager connects to multiple servers and merges tools."""
-    mock_response = MagicMock()
-    mock_response.json.return_value = _mock_tools_response()
-    mock_response.raise_for_status = MagicMock()
+    mock_response = _http_response(200, _mock_tools_response())
     mock_post.return_value = mock_response
 
     manager = McpConnectionManager()
@@ -184,23 +187,21 @@ def test_connection_manager_connect_all(mock_post):
     # 2 tools from each server = 4 total
     assert len(tools) == 4
     tool_ids = {t.tool_id for t in tools}
-    assert "mcp:github:create_issue" in tool_ids
-    assert "mcp:slack:list_repos" in tool_ids
+    assert "mcp__github__create_issue" in tool_ids
+    assert "mcp__slack__list_repos" in tool_ids
 
 
-@patch("services.mcp_client.httpx.post")
+@patch("services.mcp_client.httpx.Client.post")
 def test_connection_manager_tool_id_namespacing(mock_post):
-    """MCP tools are namespaced with mcp:{server}:{tool} format."""
-    mock_response = MagicMock()
-    mock_response.json.return_value = {"tools": [{"name": "my_tool", "description": "A tool"}]}
-    mock_response.raise_for_status = MagicMock()
+    """MCP tools are namespaced with mcp__{server}__{tool} format."""
+    mock_response = _http_response(200, {"tools": [{"name": "my_tool", "description": "A tool"}]})
     mock_post.return_value = mock_response
 
     manager = McpConnectionManager()
     tools = manager.connect_all([{"name": "my_server", "url": "https://example.com"}])
 
     assert len(tools) == 1
-    assert tools[0].tool_id == "mcp:my_server:my_tool"
+    assert tools[0].tool_id == "mcp__my_server__my_tool"
     assert tools[0].app_id == "mcp:my_server"
 
 
@@ -211,12 +212,10 @@ def test_connection_manager_skip_no_url():
     assert tools == []
 
 
-@patch("services.mcp_client.httpx.post")
+@patch("services.mcp_client.httpx.Client.post")
 def test_connection_manager_disconnect_all(mock_post):
     """Disconnect clears all clients."""
-    mock_response = MagicMock()
-    mock_response.json.return_value = {"tools": []}
-    mock_response.raise_for_status = MagicMock()
+    mock_response = _http_response(200, {"tools": []})
     mock_post.return_value = mock_response
 
     manager = McpConnectionManager()
@@ -227,18 +226,14 @@ def test_connection_manager_disconnect_all(mock_post):
     assert manager.get_client("test") is None
 
 
-@patch("services.mcp_client.httpx.post")
+@patch("services.mcp_client.httpx.Client.post")
 def test_mcp_handler_calls_tool(mock_post):
     """Handler created from MCP tool properly calls the MCP server."""
     # Connect
-    connect_response = MagicMock()
-    connect_response.json.return_value = {"tools": [{"name": "do_thing", "description": "Do it"}]}
-    connect_response.raise_for_status = MagicMock()
+    connect_response = _http_response(200, {"tools": [{"name": "do_thing", "description": "Do it"}]})
 
     # Tool call
-    call_response = MagicMock()
-    call_response.json.return_value = {"content": "done"}
-    call_response.raise_for_status = MagicMock()
+    call_response = _http_response(200, {"content": "done"})
 
     mock_post.side_effect = [connect_response, call_response]
 
@@ -249,3 +244,229 @@ def test_mcp_handler_calls_tool(mock_post):
     # Call the handler (db, workspace_id, user_id are ignored for MCP handlers)
     result = tools[0].handler(None, "ws-1", "user-1", {"param": "value"})
     assert result["success"] is True
+
+
+@patch("services.mcp_client.httpx.Client.post")
+def test_connect_uses_cached_manifest(mock_post):
+    """A fresh manifest is reused by later clients without a request."""
+    mock_post.return_value = _http_response(200, _mock_tools_response())
+    config = McpServerConfig(name="github", url="https://mcp.example.com")
+
+    McpClient(config).connect()
+    client = McpClient(config)
+    tools = client.connect()
+
+    assert mock_post.call_count == 1
+    assert client.connected is True
+    assert len(tools) == 2
+
+
+@patch("services.mcp_client.httpx.Client.post")
+def test_manifest_cache_keyed_by_auth(mock_post):
+    """Different credentials for the same URL never share a manifest."""
+    mock_post.return_value = _http_response(200, _mock_tools_response())
+    url = "https://mcp.example.com"
+
+    McpClient(McpServerConfig(name="a", url=url, auth={"type": "bearer", "token": "one"})).connect()
+    McpClient(McpServerConfig(name="b", url=url, auth={"type": "bearer", "token": "two"})).connect()
+
+    assert mock_post.call_count == 2
+
+
+@patch("services.mcp_client.httpx.Client.post")
+def test_stale_manifest_revalidated_with_etag(mock_post, monkeypatch):
+    """A stale manifest is revalidated with If-None-Match and kept on 304."""
+    monkeypatch.setattr(settings, "mcp_manifest_ttl", 0)
+    mock_post.side_effect = [
+        _http_response(200, _mock_tools_response(), headers={"ETag": '"v1"'}),
+        _http_response(304),
+    ]
+    config = McpServerConfig(name="github", url="https://mcp.example.com")
+
+    McpClient(config).connect()
+    tools = McpClient(config).connect()
+
+    assert mock_post.call_count == 2
+    assert mock_post.call_args.kwargs["headers"]["If-None-Match"] == '"v1"'
+    assert [t["name"] for t in tools] == ["create_issue", "list_repos"]
+
+
+@patch("services.mcp_client.httpx.Client.post")
+def test_connect_all_discovers_concurrently(mock_post):
+    """Servers are queried in parallel and a slow one is cut off at the deadline."""
+    def post(url, **kwargs):
+        time.sleep(2.0 if "slow" in url else 0.2)
+        return _http_response(200, {"tools": [{"name": "tool"}]})
+
+    mock_post.side_effect = post
+    servers = [{"name": f"fast{i}", "url": f"https://fast{i}.example.com"} for i in range(5)]
+    servers.append({"name": "slow", "url": "https://slow.example.com"})
+
+    started = time.monotonic()
+    tools = McpConnectionManager().connect_all(servers, timeout=0.6)
+    elapsed = time.monotonic() - started
+
+    assert elapsed < 1.0
+    assert {t.app_id for t in tools} == {f"mcp:fast{i}" for i in range(5)}
+
+
+def _connected_client(name="github"):
+    client = McpClient(McpServerConfig(name=name, url="https://mcp.example.com"))
+    client._connected = True
+    return client
+
+
+@patch("services.mcp_client.httpx.Client.post")
+def test_discovery_retried_on_server_error(mock_post):
+    """tools/list is idempotent, so 5xx responses are retried."""
+    mock_post.side_effect = [_http_response(503), _http_response(200, _mock_tools_response())]
+    client = McpClient(McpServerConfig(name="github", url="https://mcp.example.com"))
+
+    assert len(client.connect()) == 2
+    assert mock_post.call_count == 2
+    [stats] = mcp_server_stats()
+    assert (stats.requests, stats.errors, stats.retries) == (2, 1, 1)
+
+
+@patch("services.mcp_client.httpx.Client.post")
+def test_tool_call_not_retried_after_server_error(mock_post):
+    """A tool call may have had side effects, so a 5xx is not retried."""
+    mock_post.return_value = _http_response(500)
+    result = _connected_client().call_tool("create_issue", {"title": "Bug"})
+
+    assert result["success"] is False
+    assert mock_post.call_count == 1
+
+
+@patch("services.mcp_client.httpx.Client.post")
+def test_tool_call_retried_when_connection_refused(mock_post):
+    """A refused connection never reached the server, so it is safe to retry."""
+    mock_post.side_effect = [httpx.ConnectError("refused"), _http_response(200, {"content": "ok"})]
+    result = _connected_client().call_tool("create_issue", {"title": "Bug"})
+
+    assert result == {"success": True, "result": "ok"}
+    assert mock_post.call_count == 2
+
+
+@patch("services.mcp_client.httpx.Client.post")
+def test_circuit_opens_after_repeated_failures(mock_post, monkeypatch):
+    """Once the circuit opens, calls fail fast without reaching the server."""
+    monkeypatch.setattr(settings, "mcp_breaker_threshold", 2)
+    mock_post.return_value = _http_response(500)
+    client = _connected_client()
+
+    client.call_tool("t", {})
+    client.call_tool("t", {})
+    result = client.call_tool("t", {})
+
+    assert mock_post.call_count == 2
+    assert "circuit open" in result["error"]
+    [stats] = mcp_server_stats()
+    assert stats.circuit == "open"
+    assert stats.rejected == 1
+
+
+def test_circuit_breaker_half_open_trial():
+    breaker = CircuitBreaker(threshold=1, cooldown=0.05)
+    breaker.record_failure()
+    assert breaker.allow() is False
+
+    time.sleep(0.06)
+    assert breaker.state == "half_open"
+    assert breaker.allow() is True
+    # Only one trial request at a time
+    assert breaker.allow() is False
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    time.sleep(0.06)
+    assert breaker.allow() is True
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow() is True
+
+
+@patch("services.mcp_client.httpx.Client.post")
+def test_circuit_trial_ending_in_other_error_reopens(mock_post, monkeypatch):
+    """A half-open trial that raises a non-transport error still settles the circuit."""
+    monkeypatch.setattr(settings, "mcp_breaker_threshold", 1)
+    monkeypatch.setattr(settings, "mcp_breaker_cooldown", 0.05)
+    mock_post.return_value = _http_response(500)
+    client = _connected_client()
+    client.call_tool("t", {})
+
+    time.sleep(0.06)
+    mock_post.side_effect = httpx.DecodingError("bad body")
+    with pytest.raises(httpx.DecodingError):
+        client._post("/tools/call", {}, {}, timeout=1, idempotent=False)
+    [stats] = mcp_server_stats()
+    assert stats.circuit == "open"
+
+    time.sleep(0.06)
+    mock_post.side_effect = None
+    mock_post.return_value = _http_response(200, {"content": "ok"})
+    assert client.call_tool("t", {}) == {"success": True, "result": "ok"}
+
+
+def test_mcp_tool_id_is_a_valid_function_name():
+    import re
+
+    from services.mcp_client import mcp_tool_id
+
+    valid = re.compile(r"^[a-zA-Z0-9_-]{1,64}$")
+    assert mcp_tool_id("github", "create_issue") == "mcp__github__create_issue"
+    for server, tool in [("My GitHub!", "search"), ("a" * 80, "b" * 80), ("a__b", "c"), ("a", "b__c")]:
+        assert valid.match(mcp_tool_id(server, tool)), (server, tool)
+    # Names that sanitise alike still get distinct ids
+    assert mcp_tool_id("My GitHub", "search") != mcp_tool_id("My_GitHub", "search")
+    assert mcp_tool_id("a__b", "c") != mcp_tool_id("a", "b__c")
+
+
+def test_clients_share_pooled_connection():
+    """Every client of one server URL reuses the same httpx.Client."""
+    from services.mcp_client import _get_server
+
+    assert _get_server("https://mcp.example.com") is _get_server("https://mcp.example.com")
+    assert _get_server("https://mcp.example.com").http is not _get_server("https://other.example.com").http
+
+
+@patch("services.mcp_client.httpx.Client.post")
+def test_registry_reuses_connections_across_turns(mock_post):
+    """Later turns reuse the live connection and its ToolDefinitions."""
+    mock_post.return_value = _http_response(200, _mock_tools_response())
+    registry = McpConnectionRegistry(idle_timeout=60)
+    servers = [{"name": "github", "url": "https://mcp.example.com"}]
+
+    first = registry.get_tools(servers)
+    second = registry.get_tools(servers)
+
+    assert mock_post.call_count == 1
+    assert [t.tool_id for t in first] == ["mcp__github__create_issue", "mcp__github__list_repos"]
+    assert second[0] is first[0]
+    assert len(registry) == 1
+
+
+@patch("services.mcp_client.httpx.Client.post")
+def test_registry_evicts_idle_connections(mock_post):
+    mock_post.return_value = _http_response(200, {"tools": [{"name": "t"}]})
+    registry = McpConnectionRegistry(idle_timeout=0.05)
+
+    [tool] = registry.get_tools([{"name": "a", "url": "https://a.example.com"}])
+    time.sleep(0.06)
+    registry.get_tools([{"name": "b", "url": "https://b.example.com"}])
+
+    assert len(registry) == 1
+    # The evicted connection no longer serves calls
+    assert tool.handler(None, "ws-1", "user-1", {})["success"] is False
+
+
+@patch("services.mcp_client.httpx.Client.post")
+def test_registry_drops_failed_servers(mock_post, monkeypatch):
+    monkeypatch.setattr(settings, "mcp_manifest_ttl", 0)
+    mock_post.side_effect = [_http_response(200, {"tools": [{"name": "t"}]}), _http_response(404)]
+    registry = McpConnectionRegistry(idle_timeout=60)
+    servers = [{"name": "a", "url": "https://a.example.com"}]
+
+    assert len(registry.get_tools(servers)) == 1
+    assert registry.get_tools(servers) == []
+    assert len(registry) == 0
@@ -0,0 +1,94 @@
+"""Tests for Firestore data migrations."""
+
+from tests.conftest import MockFirestoreClient
+from migrations import session_messages_subcollection, session_summary_fields
+from services.session_service import add_message, get_session
+
+
+def _legacy_session(db, session_id="s1", count=3):
+    db._collections["sessions"][session_id] = {
+        "workspaceId": "ws-1",
+        "status": "active",
+        "messages": [
+            {"id": f"m{i}", "role": "user", "content": f"msg {i}", "timestamp": "", "metadata": {}}
+            for i in range(count)
+        ],
+    }
+
+
+def test_migrate_moves_messages_to_subcollection():
+    db = MockFirestoreClient()
+    _legacy_session(db)
+
+    result = session_messages_subcollection.migrate(db)
+
+    assert result == {"sessions": 1, "messages": 3}
+    assert "messages" not in db._collections["sessions"]["s1"]
+    stored = db._collections["sessions/s1/messages"]
+    assert [stored[f"m{i}"]["seq"] for i in range(3)] == [0, 1, 2]
+
+
+def test_migrated_messages_sort_before_new_ones():
+    db = MockFirestoreClient()
+    _legacy_session(db)
+    add_message(db, "s1", "assistant", "after switch")
+
+    session_messages_subcollection.migrate(db)
+
+    contents = [m["content"] for m in get_session(db, "s1")["messages"]]
+    assert contents == ["msg 0", "msg 1", "msg 2", "after switch"]
+
+
+def test_migrate_is_idempotent_and_dry_run_writes_nothing():
+    db = MockFirestoreClient()
+    _legacy_session(db)
+
+    assert session_messages_subcollection.migrate(db, dry_run=True)["messages"] == 3
+    assert "messages" in db._collections["sessions"]["s1"]
+
+    session_messages_subcollection.migrate(db)
+    assert session_messages_subcollection.migrate(db) == {"sessions": 0, "messages": 0}
+    assert len(db._collections["sessions/s1/messages"]) == 3
+
+
+def test_rerun_after_partial_migration_does_not_duplicate_id_less_messages():
+    db = MockFirestoreClient()
+    _legacy_session(db)
+    for message in db._collections["sessions"]["s1"]["messages"]:
+        del message["id"]
+    legacy = list(db._collections["sessions"]["s1"]["messages"])
+
+    # First run copied the messages but died before dropping the array
+    session_messages_subcollection.migrate_session(db, "s1", legacy)
+    db._collections["sessions"]["s1"]["messages"] = legacy
+    session_messages_subcollection.migrate(db)
+
+    stored = db._collections["sessions/s1/messages"]
+    assert sorted(m["seq"] for m in stored.values()) == [0, 1, 2]
+    assert [m["content"] for m in get_session(db, "s1")["messages"]] == ["msg 0", "msg 1", "msg 2"]
+
+
+def test_backfill_summary_fields():
+    db = MockFirestoreClient()
+    _legacy_session(db)
+    session_messages_subcollection.migrate(db)
+    add_message(db, "s1", "assistant", "x" * 150)
+    db._collections["sessions"]["s1"].pop("messageCount")
+
+    assert session_summary_fields.backfill(db) == {"sessions": 1}
+
+    session = db._collections["sessions"]["s1"]
+    assert session["messageCount"] == 4
+    assert session["lastMessagePreview"] == "x" * 100 + "..."
+    assert session["lastMessageAt"] is not None
+
+
+def test_backfill_counts_unmigrated_legacy_messages():
+    db = MockFirestoreClient()
+    _legacy_session(db, count=2)
+
+    session_summary_fields.backfill(db)
+
+    session = db._collections["sessions"]["s1"]
+    assert session["messageCount"] == 2
+    assert session["lastMessagePreview"] == "msg 1"
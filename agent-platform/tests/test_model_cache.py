@@ -0,0 +1,63 @@
+"""Tests for the chat model instance cache in ai.models."""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+import ai.models as models
+from ai.models import AgentModelConfig, ModelSelectionMode, Provider, get_chat_model
+
+
+@pytest.fixture(autouse=True)
+def reset_model_cache():
+    models.clear_chat_model_cache()
+    with patch.object(models.settings, "anthropic_api_key", "key-1"), \
+            patch.object(models.settings, "openai_api_key", "key-2"):
+        yield
+    models.clear_chat_model_cache()
+
+
+def _manual(provider, model):
+    return AgentModelConfig(mode=ModelSelectionMode.MANUAL, provider=provider, model=model)
+
+
+@patch("ai.models.create_chat_model")
+def test_model_instance_reused(mock_create):
+    mock_create.side_effect = lambda provider, name: MagicMock(name=f"{provider}-{name}")
+
+    first = get_chat_model(_manual(Provider.ANTHROPIC, "claude-3-5-haiku-20241022"))
+    second = get_chat_model(_manual(Provider.ANTHROPIC, "claude-3-5-haiku-20241022"))
+    other = get_chat_model(_manual(Provider.OPENAI, "gpt-4.1"))
+
+    assert first is second
+    assert other is not first
+    assert mock_create.call_count == 2
+
+
+@patch("ai.models.create_chat_model")
+def test_key_rotation_builds_new_instance(mock_create):
+    mock_create.side_effect = lambda provider, name: MagicMock()
+    config = _manual(Provider.ANTHROPIC, "claude-3-5-haiku-20241022")
+
+    first = get_chat_model(config)
+    with patch.object(models.settings, "anthropic_api_key", "rotated"):
+        second = get_chat_model(config)
+
+    assert first is not second
+
+
+@patch("ai.models.create_chat_model")
+def test_bound_variant_cached_per_tools_key(mock_create):
+    llm = MagicMock()
+    llm.bind_tools.side_effect = lambda tools: MagicMock()
+    mock_create.return_value = llm
+    config = _manual(Provider.ANTHROPIC, "claude-3-5-haiku-20241022")
+
+    a1 = get_chat_model(config, tools=["t1"], tools_key=("t1",))
+    a2 = get_chat_model(config, tools=["t1"], tools_key=("t1",))
+    b = get_chat_model(config, tools=["t1", "t2"], tools_key=("t1", "t2"))
+
+    assert a1 is a2
+    assert b is not a1
+    assert llm.bind_tools.call_count == 2
+    assert get_chat_model(config) is llm
@@ -162,6 +162,36 @@ def test_delegate_creates_sub_session(mock_exec_cls):
     assert sub.get("parentSessionId") == parent_session["id"]
 
 
+@patch("services.orchestration_service.ExecutionService")
+def test_delegate_to_mcp_only_agent_uses_execution(mock_exec_cls):
+    """An agent whose only tools come from mcpServers still runs through ExecutionService."""
+    db = _make_db()
+    gm = _create_agent(db, {"name": "GM", "type": "gm", "isOrchestrator": True, "appAccess": []})
+    specialist = _create_agent(db, {
+        "name": "Docs Bot",
+        "type": "custom",
+        "appAccess": [],
+        "mcpServers": [{"name": "docs", "url": "https://docs.example.com"}],
+    })
+    parent_session = _make_session(db, gm["id"])
+
+    mock_exec = MagicMock()
+    mock_exec.execute.return_value = {"response": "Found it.", "model": "gpt-4o", "tool_calls": [], "messages_added": []}
+    mock_exec_cls.return_value = mock_exec
+
+    orch = OrchestrationService(db, "ws-1", TEST_FIREBASE_UID)
+    with patch("services.chat_service.ChatService.chat") as mock_chat:
+        result = orch.delegate(
+            parent_session_id=parent_session["id"],
+            target_agent=specialist,
+            task="Search the docs",
+        )
+
+    assert result["response"] == "Found it."
+    mock_exec.execute.assert_called_once()
+    mock_chat.assert_not_called()
+
+
 @patch("services.orchestration_service.ExecutionService")
 def test_delegate_max_depth(mock_exec_cls):
     """Delegation depth limit prevents infinite loops."""
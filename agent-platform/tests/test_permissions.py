@@ -115,3 +115,23 @@ def test_get_agent_app_definitions_empty():
     agent = {"type": "custom", "appAccess": []}
     defs = get_agent_app_definitions(agent)
     assert len(defs) == 0
+
+
+def test_permission_index_memoised_per_access_config():
+    from services.permission_service import get_agent_permission_index
+
+    agent = {"type": "custom", "appAccess": [{"appId": "pyramids", "permissions": ["read", "list"]}]}
+    same = {"type": "custom", "appAccess": [{"appId": "pyramids", "permissions": ["list", "read"]}], "name": "Other"}
+    index = get_agent_permission_index(agent)
+
+    assert get_agent_permission_index(same) is index
+    assert index.tool_ids == {"pyramids.read", "pyramids.list"}
+    assert index.app_actions == {"pyramids": {"read", "list"}}
+
+
+def test_permission_index_follows_config_changes():
+    agent = {"type": "custom", "appAccess": [{"appId": "pyramids", "permissions": ["read"]}]}
+    assert not can_execute(agent, "pyramids.delete")
+
+    agent["appAccess"][0]["permissions"].append("delete")
+    assert can_execute(agent, "pyramids.delete")
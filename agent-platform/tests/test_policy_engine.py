@@ -0,0 +1,62 @@
+"""Tests for PolicyEngine ownership checks and their cache."""
+
+import pytest
+
+from core.exceptions import ForbiddenError, NotFoundError
+from services import policy_engine
+from services.policy_engine import PolicyEngine
+from tests.conftest import TEST_FIREBASE_UID
+
+
+def _seed_agent(db, agent_id="agent-1"):
+    db._collections["agents"][agent_id] = {"workspaceId": "test-workspace-id", "name": "A"}
+
+
+def test_workspace_owner_served_from_cache(seeded_firestore):
+    policy = PolicyEngine(seeded_firestore)
+    policy.assert_workspace_owner(TEST_FIREBASE_UID, "test-workspace-id")
+
+    # Remove the document behind the cache's back: no further read happens
+    del seeded_firestore._collections["workspaces"]["test-workspace-id"]
+    policy.assert_workspace_owner(TEST_FIREBASE_UID, "test-workspace-id")
+
+
+def test_cached_owner_still_rejects_other_users(seeded_firestore):
+    policy = PolicyEngine(seeded_firestore)
+    policy.assert_workspace_owner(TEST_FIREBASE_UID, "test-workspace-id")
+
+    with pytest.raises(ForbiddenError):
+        policy.assert_workspace_owner("someone-else", "test-workspace-id")
+
+
+def test_invalidate_workspace(seeded_firestore):
+    policy = PolicyEngine(seeded_firestore)
+    policy.assert_workspace_owner(TEST_FIREBASE_UID, "test-workspace-id")
+
+    del seeded_firestore._collections["workspaces"]["test-workspace-id"]
+    policy_engine.invalidate_workspace("test-workspace-id")
+    with pytest.raises(NotFoundError):
+        policy.assert_workspace_owner(TEST_FIREBASE_UID, "test-workspace-id")
+
+
+def test_agent_access_served_from_cache(seeded_firestore):
+    _seed_agent(seeded_firestore)
+    policy = PolicyEngine(seeded_firestore)
+    assert policy.get_accessible_agent(TEST_FIREBASE_UID, "agent-1")["name"] == "A"
+
+    seeded_firestore._collections["agents"].clear()
+    seeded_firestore._collections["workspaces"].clear()
+    policy.assert_agent_access(TEST_FIREBASE_UID, "agent-1")
+
+    policy_engine.invalidate_agent("agent-1")
+    with pytest.raises(NotFoundError):
+        policy.assert_agent_access(TEST_FIREBASE_UID, "agent-1")
+
+
+def test_missing_workspace_not_cached(seeded_firestore):
+    policy = PolicyEngine(seeded_firestore)
+    with pytest.raises(NotFoundError):
+        policy.assert_workspace_owner(TEST_FIREBASE_UID, "later")
+
+    seeded_firestore._collections["workspaces"]["later"] = {"userId": TEST_FIREBASE_UID}
+    policy.assert_workspace_owner(TEST_FIREBASE_UID, "later")
@@ -0,0 +1,215 @@
+"""Tests for RAG indexing and search."""
+
+import threading
+from unittest.mock import patch
+
+import pytest
+from qdrant_client import QdrantClient
+from qdrant_client.models import Distance, PayloadSchemaType, VectorParams
+
+from ai.indexing import IndexingPipeline, chunk_text
+from ai.rag import RagService
+from ai.sparse import encode_document, encode_query, tokenize
+from core.config import settings
+
+VECTOR_SIZE = 4
+
+# Local-mode Qdrant accepts but ignores the payload indexes RagService creates
+pytestmark = pytest.mark.filterwarnings("ignore:Payload indexes have no effect")
+
+
+class FakeEmbeddings:
+    """Deterministic vectors derived from the text."""
+
+    def __init__(self):
+        self.calls: list[list[str]] = []
+
+    def embed(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(t)), float(t.count(" ")), 1.0, 0.5] for t in texts]
+
+    async def aembed(self, texts):
+        return self.embed(texts)
+
+
+@pytest.fixture
+def qdrant():
+    client = QdrantClient(":memory:")
+    with patch("ai.rag.get_qdrant_client", return_value=client):
+        yield client
+    client.close()
+
+
+def _pipeline(embed, upsert=lambda points: None, **overrides):
+    options = dict(chunk_size=50, chunk_overlap=10, batch_size=2, concurrency=2, retry_backoff=0)
+    options.update(overrides)
+    return IndexingPipeline(embed=embed, upsert=upsert, **options)
+
+
+def test_chunk_text_overlaps_on_word_boundaries():
+    text = " ".join(f"word{i}" for i in range(40))
+    chunks = chunk_text(text, size=50, overlap=10)
+
+    assert len(chunks) > 1
+    assert all(len(c) <= 50 for c in chunks)
+    assert all(not c.startswith(" ") and not c.endswith(" ") for c in chunks)
+    # Every word survives and neighbouring chunks share some text
+    assert set(text.split()) == {w for c in chunks for w in c.split()}
+    assert chunks[0].split()[-1] in chunks[1]
+
+
+def test_chunk_text_short_and_empty():
+    assert chunk_text("short", size=50, overlap=10) == ["short"]
+    assert chunk_text("   ", size=50, overlap=10) == []
+
+
+def test_index_documents_reads_generator_once(qdrant, monkeypatch):
+    monkeypatch.setattr(settings, "rag_chunk_size", 40)
+    monkeypatch.setattr(settings, "rag_embed_batch_size", 3)
+    embeddings = FakeEmbeddings()
+    service = RagService(embeddings, VECTOR_SIZE)
+    documents = ((f"document number {i} " * 5, {"docId": f"d{i}"}) for i in range(5))
+
+    progress = service.index_documents("ws-1", documents)
+
+    assert progress.documents == 5
+    assert progress.chunks == progress.indexed > 5
+    assert qdrant.count("workspace_ws-1").count == progress.indexed
+    assert max(len(call) for call in embeddings.calls) <= 3
+
+
+def test_reindexing_overwrites_points(qdrant):
+    service = RagService(FakeEmbeddings(), VECTOR_SIZE)
+    docs = [("same text", {"docId": "d1"})]
+
+    service.index_documents("ws-1", docs)
+    service.index_documents("ws-1", docs)
+
+    assert qdrant.count("workspace_ws-1").count == 1
+
+
+def test_pipeline_reports_progress():
+    updates = []
+    pipeline = _pipeline(FakeEmbeddings().embed, on_progress=updates.append)
+
+    result = pipeline.run([("a", {}), ("b", {}), ("c", {})])
+
+    assert [u.indexed for u in updates] == [2, 3]
+    assert result.documents == 3 and result.indexed == 3
+
+
+def test_pipeline_bounds_batches_in_flight():
+    release = threading.Event()
+    produced = []
+
+    def slow_embed(texts):
+        release.wait(5)
+        return [[0.0] * VECTOR_SIZE for _ in texts]
+
+    def documents():
+        for i in range(100):
+            produced.append(i)
+            yield (f"doc {i}", {})
+
+    pipeline = _pipeline(slow_embed, batch_size=1, concurrency=2)
+    runner = threading.Thread(target=pipeline.run, args=(documents(),))
+    runner.start()
+    try:
+        # With embeds blocked, only max_in_flight batches (plus the one waiting) are read
+        for _ in range(50):
+            if len(produced) >= pipeline.max_in_flight + 1:
+                break
+            threading.Event().wait(0.01)
+        threading.Event().wait(0.05)
+        assert len(produced) <= pipeline.max_in_flight + 1
+    finally:
+        release.set()
+        runner.join(5)
+    assert len(produced) == 100
+
+
+def test_pipeline_retries_rate_limited_embeds():
+    class RateLimitError(Exception):
+        pass
+
+    embeddings = FakeEmbeddings()
+    failures = [RateLimitError("slow down")]
+
+    def embed(texts):
+        if failures:
+            raise failures.pop()
+        return embeddings.embed(texts)
+
+    result = _pipeline(embed).run([("a", {})])
+    assert result.indexed == 1
+
+
+def test_pipeline_raises_other_errors():
+    def embed(texts):
+        raise RuntimeError("provider down")
+
+    with pytest.raises(RuntimeError):
+        _pipeline(embed).run([("a", {})])
+
+
+def test_tokenize_keeps_identifiers_whole_and_split():
+    assert tokenize("The TASK-123 failed in user_service.py") == [
+        "task-123", "task", "123", "failed", "user_service.py", "user", "service", "py",
+    ]
+
+
+def test_sparse_document_weights_saturate():
+    once = encode_document("deploy")
+    repeated = encode_document("deploy " * 10)
+    assert once.indices == repeated.indices
+    assert once.values[0] < repeated.values[0] < 2.2  # bounded by k1 + 1
+    assert encode_query("deploy the deploy").values == [1.0]
+
+
+def test_hybrid_search_finds_exact_identifier(qdrant):
+    service = RagService(FakeEmbeddings(), VECTOR_SIZE)
+    docs = [(f"notes about release planning item {i}", {"docId": f"d{i}"}) for i in range(20)]
+    docs.append(("ERR_QUOTA_EXCEEDED raised by billing", {"docId": "target"}))
+    service.index_documents("ws-1", docs)
+
+    with patch.object(qdrant, "query_points", wraps=qdrant.query_points) as query:
+        results = service.search("ws-1", "ERR_QUOTA_EXCEEDED", limit=3)
+
+    assert results[0].payload["docId"] == "target"
+    query.assert_called_once()
+    assert len(query.call_args.kwargs["prefetch"]) == 2
+
+
+def test_search_without_sparse_vectors_is_dense_only(qdrant):
+    # A collection created before hybrid search keeps working, dense only
+    qdrant.create_collection("workspace_ws-1", vectors_config=VectorParams(size=VECTOR_SIZE, distance=Distance.COSINE))
+    service = RagService(FakeEmbeddings(), VECTOR_SIZE)
+    service.index_documents("ws-1", [("legacy text", {"docId": "d1"})])
+
+    with patch.object(qdrant, "query_points", wraps=qdrant.query_points) as query:
+        results = service.search("ws-1", "legacy text")
+
+    assert [r.payload["docId"] for r in results] == ["d1"]
+    assert "prefetch" not in query.call_args.kwargs
+
+
+def test_filtered_hybrid_search(qdrant):
+    service = RagService(FakeEmbeddings(), VECTOR_SIZE)
+    service.index_documents("ws-1", [
+        ("TASK-42 in pyramids", {"docId": "a", "appId": "pyramids"}),
+        ("TASK-42 in diagrams", {"docId": "b", "appId": "diagrams"}),
+    ])
+    results = service.search("ws-1", "TASK-42", workspace_filter={"appId": "diagrams"})
+    assert [r.payload["docId"] for r in results] == ["b"]
+
+
+def test_search_backfills_filterable_indexes(qdrant):
+    qdrant.create_collection("workspace_ws-1", vectors_config=VectorParams(size=VECTOR_SIZE, distance=Distance.COSINE))
+    service = RagService(FakeEmbeddings(), VECTOR_SIZE, filterable_fields={"appId": PayloadSchemaType.KEYWORD})
+
+    with patch.object(qdrant, "create_payload_index") as create:
+        service.search("ws-1", "anything", workspace_filter={"appId": "pyramids"})
+        service.search("ws-1", "anything", workspace_filter={"appId": "pyramids"})
+
+    create.assert_called_once()
+    assert create.call_args.kwargs["field_name"] == "appId"
@@ -1,6 +1,6 @@
 """Tests for the recommend endpoint."""
 
-from unittest.mock import patch, MagicMock
+from unittest.mock import AsyncMock, patch, MagicMock
 
 from tests.conftest import TEST_FIREBASE_UID
 
@@ -21,7 +21,7 @@ def test_recommend_success(client):
 
     with patch("services.chat_service.get_chat_model") as mock_get_model:
         mock_llm = MagicMock()
-        mock_llm.invoke.return_value = mock_response
+        mock_llm.ainvoke = AsyncMock(return_value=mock_response)
         mock_get_model.return_value = mock_llm
 
         resp = client.post("/recommend", json={
@@ -104,7 +104,7 @@ def test_recommend_missing_variables_uses_defaults(client):
 
     with patch("services.chat_service.get_chat_model") as mock_get_model:
         mock_llm = MagicMock()
-        mock_llm.invoke.return_value = mock_response
+        mock_llm.ainvoke = AsyncMock(return_value=mock_response)
         mock_get_model.return_value = mock_llm
 
         resp = client.post("/recommend", json={
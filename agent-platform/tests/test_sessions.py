@@ -1,6 +1,8 @@
 """Tests for session endpoints."""
 
-from unittest.mock import patch, MagicMock
+from unittest.mock import AsyncMock, patch, MagicMock
+
+import pytest
 
 
 def test_create_session(client, seeded_firestore):
@@ -93,6 +95,100 @@ def test_list_sessions_filter_by_status(client, seeded_firestore):
     assert len(resp.json()) == 1
 
 
+def test_list_sessions_paginated(client, seeded_firestore):
+    agent_id = client.post("/agents", json={"workspace_id": "test-workspace-id", "name": "A"}).json()["id"]
+    created = [
+        client.post("/sessions", json={"workspace_id": "test-workspace-id", "agent_id": agent_id}).json()["id"]
+        for _ in range(3)
+    ]
+
+    first = client.get("/sessions", params={"workspace_id": "test-workspace-id", "limit": 2})
+    token = first.headers["X-Next-Page-Token"]
+    second = client.get("/sessions", params={"workspace_id": "test-workspace-id", "limit": 2, "page_token": token})
+
+    # Newest first, no overlap, last page has no token
+    ids = [s["id"] for s in first.json()] + [s["id"] for s in second.json()]
+    assert ids == list(reversed(created))
+    assert "X-Next-Page-Token" not in second.headers
+
+
+def test_list_sessions_paginated_with_equal_updated_at(client, seeded_firestore):
+    """Sessions sharing the boundary timestamp are not skipped."""
+    agent_id = client.post("/agents", json={"workspace_id": "test-workspace-id", "name": "A"}).json()["id"]
+    created = [
+        client.post("/sessions", json={"workspace_id": "test-workspace-id", "agent_id": agent_id}).json()["id"]
+        for _ in range(3)
+    ]
+    same_time = seeded_firestore._collections["sessions"][created[0]]["updatedAt"]
+    for session_id in created:
+        seeded_firestore._collections["sessions"][session_id]["updatedAt"] = same_time
+
+    first = client.get("/sessions", params={"workspace_id": "test-workspace-id", "limit": 2})
+    token = first.headers["X-Next-Page-Token"]
+    second = client.get("/sessions", params={"workspace_id": "test-workspace-id", "limit": 2, "page_token": token})
+
+    ids = [s["id"] for s in first.json()] + [s["id"] for s in second.json()]
+    assert sorted(ids) == sorted(created)
+    assert len(ids) == 3
+
+
+def test_message_writes_maintain_summary_fields(seeded_firestore):
+    from services.session_service import SessionWriteBuffer, add_message, create_session
+
+    session = create_session(seeded_firestore, "test-workspace-id", "a", "test-user-uid-123")
+    add_message(seeded_firestore, session["id"], "user", "hello")
+    with SessionWriteBuffer(seeded_firestore, session["id"]) as writes:
+        writes.add_message("tool_call", "{}")
+        writes.add_message("assistant", "done")
+
+    stored = seeded_firestore._collections["sessions"][session["id"]]
+    assert stored["messageCount"] == 3
+    assert stored["lastMessagePreview"] == "done"
+    assert stored["lastMessageAt"] is not None
+
+
+def test_message_write_counts_unbackfilled_session(client, seeded_firestore):
+    """A session without messageCount gets its full count, not an Increment from 0."""
+    from services.session_service import add_message
+
+    seeded_firestore._collections["sessions"]["legacy"] = {
+        "workspaceId": "test-workspace-id",
+        "agentId": "a",
+        "userId": "test-user-uid-123",
+        "status": "active",
+        "messages": [
+            {"id": f"old-{i}", "role": "user", "content": f"old{i}", "timestamp": "", "metadata": {}}
+            for i in range(2)
+        ],
+        "metadata": {},
+    }
+    add_message(seeded_firestore, "legacy", "user", "new0")
+    add_message(seeded_firestore, "legacy", "assistant", "new1")
+
+    item = client.get("/sessions", params={"workspace_id": "test-workspace-id"}).json()[0]
+    assert item["message_count"] == 4
+    assert item["last_message_preview"] == "new1"
+
+
+def test_list_sessions_invalid_page_token(client, seeded_firestore):
+    resp = client.get("/sessions", params={"workspace_id": "test-workspace-id", "page_token": "not-a-token"})
+    assert resp.status_code == 400
+    assert resp.json()["error"]["code"] == "INVALID_PAGE_TOKEN"
+
+
+def test_list_sessions_summarises_messages(client, seeded_firestore):
+    from services.session_service import add_message
+
+    agent_id = client.post("/agents", json={"workspace_id": "test-workspace-id", "name": "A"}).json()["id"]
+    session_id = client.post("/sessions", json={"workspace_id": "test-workspace-id", "agent_id": agent_id}).json()["id"]
+    add_message(seeded_firestore, session_id, "user", "first")
+    add_message(seeded_firestore, session_id, "assistant", "latest reply")
+
+    item = client.get("/sessions", params={"workspace_id": "test-workspace-id"}).json()[0]
+    assert item["message_count"] == 2
+    assert item["last_message_preview"] == "latest reply"
+
+
 def test_get_session(client, seeded_firestore):
     agent_id = client.post("/agents", json={"workspace_id": "test-workspace-id", "name": "A"}).json()["id"]
     session_id = client.post("/sessions", json={
@@ -114,7 +210,7 @@ def test_get_session_not_found(client):
 @patch("api.sessions.ChatService")
 def test_send_message(mock_chat_cls, client, seeded_firestore):
     mock_chat = MagicMock()
-    mock_chat.chat.return_value = ("Hello! I can help with that.", "claude-3-5-sonnet")
+    mock_chat.achat = AsyncMock(return_value=("Hello! I can help with that.", "claude-3-5-sonnet"))
     mock_chat_cls.return_value = mock_chat
 
     agent_id = client.post("/agents", json={"workspace_id": "test-workspace-id", "name": "A"}).json()["id"]
@@ -137,7 +233,7 @@ def test_send_message(mock_chat_cls, client, seeded_firestore):
 @patch("api.sessions.ChatService")
 def test_send_message_generates_title(mock_chat_cls, client, seeded_firestore):
     mock_chat = MagicMock()
-    mock_chat.chat.return_value = ("Response", "model")
+    mock_chat.achat = AsyncMock(return_value=("Response", "model"))
     mock_chat_cls.return_value = mock_chat
 
     agent_id = client.post("/agents", json={"workspace_id": "test-workspace-id", "name": "A"}).json()["id"]
@@ -244,7 +340,7 @@ def test_create_session_default_not_chat_only(client, seeded_firestore):
 def test_send_message_chat_only_skips_tools(mock_get_tools, mock_chat_cls, client, seeded_firestore):
     """Even if agent has tools, chat_only session should use ChatService."""
     mock_chat = MagicMock()
-    mock_chat.chat.return_value = ("Just chatting!", "gpt-4o")
+    mock_chat.achat = AsyncMock(return_value=("Just chatting!", "gpt-4o"))
     mock_chat_cls.return_value = mock_chat
 
     # Return tools — normally this would trigger ExecutionService
@@ -263,4 +359,267 @@ def test_send_message_chat_only_skips_tools(mock_get_tools, mock_chat_cls, clien
     assert data["assistant_message"]["content"] == "Just chatting!"
     assert data["tool_calls"] == []
     # Verify ChatService was used (not ExecutionService)
-    mock_chat.chat.assert_called_once()
+    mock_chat.achat.assert_awaited_once()
+
+
+def _parse_sse(text: str) -> list[tuple[str, dict]]:
+    import json
+    events = []
+    for block in text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+@patch("api.sessions.ChatService")
+def test_stream_message(mock_chat_cls, client, seeded_firestore):
+    async def fake_stream(**kwargs):
+        yield {"type": "token", "content": "Hello"}
+        yield {"type": "token", "content": " there"}
+        yield {"type": "done", "response": "Hello there", "model": "claude-3-5-sonnet"}
+
+    mock_chat = MagicMock()
+    mock_chat.astream.side_effect = fake_stream
+    mock_chat_cls.return_value = mock_chat
+
+    agent_id = client.post("/agents", json={"workspace_id": "test-workspace-id", "name": "A"}).json()["id"]
+    session_id = client.post("/sessions", json={"workspace_id": "test-workspace-id", "agent_id": agent_id}).json()["id"]
+
+    resp = client.post(f"/sessions/{session_id}/messages/stream", json={"message": "Hi"})
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/event-stream")
+
+    events = _parse_sse(resp.text)
+    assert [e for e, _ in events] == ["user_message", "token", "token", "message"]
+    assert events[0][1]["content"] == "Hi"
+    assert events[1][1]["content"] == "Hello"
+    final = events[-1][1]
+    assert final["assistant_message"]["content"] == "Hello there"
+    assert final["model"] == "claude-3-5-sonnet"
+
+    session = client.get(f"/sessions/{session_id}").json()
+    assert [m["role"] for m in session["messages"]] == ["user", "assistant"]
+
+
+@patch("api.sessions.ChatService")
+def test_stream_message_llm_error(mock_chat_cls, client, seeded_firestore):
+    async def failing_stream(**kwargs):
+        yield {"type": "token", "content": "Partial"}
+        raise RuntimeError("provider down")
+
+    mock_chat = MagicMock()
+    mock_chat.astream.side_effect = failing_stream
+    mock_chat_cls.return_value = mock_chat
+
+    agent_id = client.post("/agents", json={"workspace_id": "test-workspace-id", "name": "A"}).json()["id"]
+    session_id = client.post("/sessions", json={"workspace_id": "test-workspace-id", "agent_id": agent_id}).json()["id"]
+
+    resp = client.post(f"/sessions/{session_id}/messages/stream", json={"message": "Hi"})
+    events = _parse_sse(resp.text)
+    assert events[-1][0] == "error"
+    assert events[-1][1]["code"] == "LLM_ERROR"
+
+    # Only the user message is persisted
+    session = client.get(f"/sessions/{session_id}").json()
+    assert [m["role"] for m in session["messages"]] == ["user"]
+
+
+def test_stream_message_paused_session(client, seeded_firestore):
+    agent_id = client.post("/agents", json={"workspace_id": "test-workspace-id", "name": "A"}).json()["id"]
+    session_id = client.post("/sessions", json={"workspace_id": "test-workspace-id", "agent_id": agent_id}).json()["id"]
+    client.patch(f"/sessions/{session_id}", json={"status": "paused"})
+
+    resp = client.post(f"/sessions/{session_id}/messages/stream", json={"message": "Hi"})
+    assert resp.status_code == 400
+    assert resp.json()["error"]["code"] == "SESSION_NOT_ACTIVE"
+
+
+@patch("api.sessions.ChatService")
+def test_messages_stored_in_subcollection(mock_chat_cls, client, seeded_firestore):
+    mock_chat = MagicMock()
+    mock_chat.achat = AsyncMock(return_value=("Hi!", "model"))
+    mock_chat_cls.return_value = mock_chat
+
+    agent_id = client.post("/agents", json={"workspace_id": "test-workspace-id", "name": "A"}).json()["id"]
+    session_id = client.post("/sessions", json={"workspace_id": "test-workspace-id", "agent_id": agent_id}).json()["id"]
+    client.post(f"/sessions/{session_id}/messages", json={"message": "Hello"})
+
+    assert "messages" not in seeded_firestore._collections["sessions"][session_id]
+    stored = seeded_firestore._collections[f"sessions/{session_id}/messages"]
+    assert sorted(m["role"] for m in stored.values()) == ["assistant", "user"]
+
+
+def test_list_messages_paginated(client, seeded_firestore):
+    from services.session_service import add_message
+
+    agent_id = client.post("/agents", json={"workspace_id": "test-workspace-id", "name": "A"}).json()["id"]
+    session_id = client.post("/sessions", json={"workspace_id": "test-workspace-id", "agent_id": agent_id}).json()["id"]
+    for i in range(5):
+        add_message(seeded_firestore, session_id, "user", f"m{i}")
+
+    first = client.get(f"/sessions/{session_id}/messages", params={"limit": 3}).json()
+    assert [m["content"] for m in first["messages"]] == ["m0", "m1", "m2"]
+    assert first["next_cursor"] is not None
+
+    second = client.get(
+        f"/sessions/{session_id}/messages",
+        params={"limit": 3, "after": first["next_cursor"]},
+    ).json()
+    assert [m["content"] for m in second["messages"]] == ["m3", "m4"]
+    assert second["next_cursor"] is None
+
+
+def test_legacy_inline_messages_are_read(client, seeded_firestore):
+    """Sessions not yet migrated still expose their inline messages array."""
+    from services.session_service import add_message
+
+    seeded_firestore._collections["sessions"]["legacy"] = {
+        "workspaceId": "test-workspace-id",
+        "agentId": "a",
+        "userId": "test-user-uid-123",
+        "status": "active",
+        "messages": [{"id": "old-1", "role": "user", "content": "old", "timestamp": "", "metadata": {}}],
+        "metadata": {},
+    }
+    add_message(seeded_firestore, "legacy", "assistant", "new")
+
+    session = client.get("/sessions/legacy").json()
+    assert [m["content"] for m in session["messages"]] == ["old", "new"]
+
+
+def test_list_messages_pages_through_legacy_messages(client, seeded_firestore):
+    """The inline array is paged first, with seq equal to its position."""
+    from services.session_service import add_message
+
+    seeded_firestore._collections["sessions"]["legacy"] = {
+        "workspaceId": "test-workspace-id",
+        "agentId": "a",
+        "userId": "test-user-uid-123",
+        "status": "active",
+        "messages": [
+            {"id": f"old-{i}", "role": "user", "content": f"old{i}", "timestamp": "", "metadata": {}}
+            for i in range(3)
+        ],
+        "metadata": {},
+    }
+    add_message(seeded_firestore, "legacy", "assistant", "new0")
+    add_message(seeded_firestore, "legacy", "assistant", "new1")
+
+    first = client.get("/sessions/legacy/messages", params={"limit": 2}).json()
+    assert [m["content"] for m in first["messages"]] == ["old0", "old1"]
+    assert first["next_cursor"] == 1
+
+    second = client.get("/sessions/legacy/messages", params={"limit": 2, "after": 1}).json()
+    assert [m["content"] for m in second["messages"]] == ["old2", "new0"]
+
+    third = client.get(
+        "/sessions/legacy/messages", params={"limit": 2, "after": second["next_cursor"]},
+    ).json()
+    assert [m["content"] for m in third["messages"]] == ["new1"]
+    assert third["next_cursor"] is None
+
+
+@patch("api.sessions.ChatService")
+def test_send_message_legacy_session_keeps_history(mock_chat_cls, client, seeded_firestore):
+    """An unmigrated session's inline messages reach the LLM as history."""
+    mock_chat = MagicMock()
+    mock_chat.achat = AsyncMock(return_value=("Still here", "model"))
+    mock_chat_cls.return_value = mock_chat
+
+    agent_id = client.post("/agents", json={"workspace_id": "test-workspace-id", "name": "A"}).json()["id"]
+    seeded_firestore._collections["sessions"]["legacy"] = {
+        "workspaceId": "test-workspace-id",
+        "agentId": agent_id,
+        "userId": "test-user-uid-123",
+        "title": "Old chat",
+        "status": "active",
+        "messages": [
+            {"id": "old-1", "role": "user", "content": "hi", "timestamp": "", "metadata": {}},
+            {"id": "old-2", "role": "assistant", "content": "hello", "timestamp": "", "metadata": {}},
+        ],
+        "metadata": {},
+    }
+
+    resp = client.post("/sessions/legacy/messages", json={"message": "remember me?"})
+    assert resp.status_code == 200
+    assert mock_chat.achat.call_args.kwargs["history"] == [
+        {"role": "user", "content": "hi"},
+        {"role": "assistant", "content": "hello"},
+    ]
+
+
+
+def test_delete_session_removes_messages(client, seeded_firestore):
+    from services.session_service import add_message
+
+    agent_id = client.post("/agents", json={"workspace_id": "test-workspace-id", "name": "A"}).json()["id"]
+    session_id = client.post("/sessions", json={"workspace_id": "test-workspace-id", "agent_id": agent_id}).json()["id"]
+    add_message(seeded_firestore, session_id, "user", "bye")
+
+    client.delete(f"/sessions/{session_id}")
+    assert seeded_firestore._collections[f"sessions/{session_id}/messages"] == {}
+
+
+@patch("api.sessions.ChatService")
+def test_send_message_commits_turn_in_two_batches(mock_chat_cls, client, seeded_firestore):
+    """User message + title in one commit, the reply in another."""
+    mock_chat = MagicMock()
+    mock_chat.achat = AsyncMock(return_value=("Hi!", "model"))
+    mock_chat_cls.return_value = mock_chat
+
+    agent_id = client.post("/agents", json={"workspace_id": "test-workspace-id", "name": "A"}).json()["id"]
+    session_id = client.post("/sessions", json={"workspace_id": "test-workspace-id", "agent_id": agent_id}).json()["id"]
+
+    before = seeded_firestore.batch_commits
+    client.post(f"/sessions/{session_id}/messages", json={"message": "Hello"})
+    assert seeded_firestore.batch_commits - before == 2
+
+
+def test_write_buffer_flushes_once(seeded_firestore):
+    from services.session_service import SessionWriteBuffer, create_session, get_session
+
+    session = create_session(seeded_firestore, "test-workspace-id", "a", "test-user-uid-123")
+    with SessionWriteBuffer(seeded_firestore, session["id"]) as writes:
+        writes.add_message("user", "one")
+        writes.add_message("assistant", "two")
+        writes.update({"title": "Buffered", "metadata.plan": {"status": "completed"}})
+        assert get_session(seeded_firestore, session["id"])["messages"] == []
+
+    assert seeded_firestore.batch_commits == 1
+    stored = get_session(seeded_firestore, session["id"])
+    assert [m["content"] for m in stored["messages"]] == ["one", "two"]
+    assert stored["title"] == "Buffered"
+    assert stored["metadata"]["plan"]["status"] == "completed"
+
+
+def test_write_buffer_flushes_on_error(seeded_firestore):
+    from services.session_service import SessionWriteBuffer, create_session, get_session
+
+    session = create_session(seeded_firestore, "test-workspace-id", "a", "test-user-uid-123")
+    with pytest.raises(RuntimeError):
+        with SessionWriteBuffer(seeded_firestore, session["id"]) as writes:
+            writes.add_message("tool_call", "{}")
+            raise RuntimeError("LLM died")
+
+    assert [m["role"] for m in get_session(seeded_firestore, session["id"])["messages"]] == ["tool_call"]
+
+
+def test_write_buffer_flush_every(seeded_firestore):
+    from services.session_service import SessionWriteBuffer, create_session
+
+    session = create_session(seeded_firestore, "test-workspace-id", "a", "test-user-uid-123")
+    writes = SessionWriteBuffer(seeded_firestore, session["id"], flush_every=2)
+    for i in range(5):
+        writes.add_message("user", f"m{i}")
+    assert seeded_firestore.batch_commits == 2
+    assert writes.pending == 1
+
+
+def test_write_buffer_missing_session(seeded_firestore):
+    from core.exceptions import NotFoundError
+    from services.session_service import SessionWriteBuffer
+
+    writes = SessionWriteBuffer(seeded_firestore, "missing")
+    writes.add_message("user", "lost")
+    with pytest.raises(NotFoundError):
+        writes.flush()
@@ -2,11 +2,16 @@
 
 import sys
 import os
+from datetime import datetime, timedelta, timezone
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
 from tests.conftest import MockFirestoreClient
-from tools.handlers import make_crud_handlers
+import pytest
+from google.api_core.datetime_helpers import DatetimeWithNanoseconds
+from google.cloud.firestore_v1 import GeoPoint
+
+from tools.handlers import LIST_SUMMARY_FIELDS, _make_json_safe, list_parameters, make_crud_handlers
 
 
 def _make_db():
@@ -90,6 +95,125 @@ def test_list_handler_empty():
     assert result["documents"] == []
 
 
+def _seed(db, count, workspace_id="ws-1", **extra):
+    base = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    for i in range(count):
+        db.collection("testCollection").document(f"doc-{i}").set({
+            "workspaceId": workspace_id,
+            "title": f"Doc {i}",
+            "body": "x" * 1000,
+            "createdAt": base + timedelta(minutes=i),
+            "updatedAt": base + timedelta(minutes=i),
+            **extra,
+        })
+
+
+def test_list_handler_returns_summary_fields_by_default():
+    db = _make_db()
+    _seed(db, 2)
+    handlers = make_crud_handlers("testCollection", "test_app")
+    result = handlers["list"](db, "ws-1", "user-1", {})
+    doc = result["documents"][0]
+    assert set(doc) == {"id", *LIST_SUMMARY_FIELDS}
+    assert "body" not in doc
+
+
+def test_list_handler_projects_requested_fields():
+    db = _make_db()
+    _seed(db, 1)
+    handlers = make_crud_handlers("testCollection", "test_app")
+    result = handlers["list"](db, "ws-1", "user-1", {"fields": ["body"]})
+    assert set(result["documents"][0]) == {"id", "body"}
+
+
+def test_list_handler_pages_with_cursor():
+    db = _make_db()
+    _seed(db, 5)
+    handlers = make_crud_handlers("testCollection", "test_app")
+
+    first = handlers["list"](db, "ws-1", "user-1", {"limit": 2})
+    assert [d["id"] for d in first["documents"]] == ["doc-0", "doc-1"]
+    assert first["next_cursor"] == "doc-1"
+
+    second = handlers["list"](db, "ws-1", "user-1", {"limit": 2, "cursor": first["next_cursor"]})
+    assert [d["id"] for d in second["documents"]] == ["doc-2", "doc-3"]
+
+    last = handlers["list"](db, "ws-1", "user-1", {"limit": 2, "cursor": second["next_cursor"]})
+    assert [d["id"] for d in last["documents"]] == ["doc-4"]
+    assert "next_cursor" not in last
+
+
+def test_list_handler_pages_by_field_with_cursor():
+    db = _make_db()
+    _seed(db, 3)
+    handlers = make_crud_handlers("testCollection", "test_app")
+
+    first = handlers["list"](db, "ws-1", "user-1", {"limit": 2, "order_by": "updatedAt"})
+    assert [d["id"] for d in first["documents"]] == ["doc-2", "doc-1"]
+
+    second = handlers["list"](
+        db, "ws-1", "user-1", {"limit": 2, "order_by": "updatedAt", "cursor": first["next_cursor"]},
+    )
+    assert [d["id"] for d in second["documents"]] == ["doc-0"]
+
+
+def test_list_handler_includes_app_created_documents():
+    """Documents written by the frontend carry lastModified, never updatedAt."""
+    db = _make_db()
+    _seed(db, 1)
+    db.collection("testCollection").document("from-app").set({
+        "workspaceId": "ws-1",
+        "userId": "user-1",
+        "title": "Frontend pyramid",
+        "createdAt": "2026-01-02T00:00:00.000Z",
+        "lastModified": "2026-01-02T00:00:00.000Z",
+    })
+    handlers = make_crud_handlers("testCollection", "test_app")
+    result = handlers["list"](db, "ws-1", "user-1", {})
+    assert result["count"] == 2
+    assert {d["id"] for d in result["documents"]} == {"doc-0", "from-app"}
+
+
+def test_list_handler_orders_ascending():
+    db = _make_db()
+    _seed(db, 3)
+    handlers = make_crud_handlers("testCollection", "test_app")
+    result = handlers["list"](db, "ws-1", "user-1", {"order_by": "createdAt", "order": "asc"})
+    assert [d["id"] for d in result["documents"]] == ["doc-0", "doc-1", "doc-2"]
+
+
+def test_list_handler_filters():
+    db = _make_db()
+    _seed(db, 2, status="done")
+    db.collection("testCollection").document("open").set({
+        "workspaceId": "ws-1", "title": "Open", "status": "todo",
+        "updatedAt": datetime(2026, 2, 1, tzinfo=timezone.utc),
+    })
+    handlers = make_crud_handlers("testCollection", "test_app", list_filters={"status"})
+    result = handlers["list"](db, "ws-1", "user-1", {"status": "todo"})
+    assert [d["id"] for d in result["documents"]] == ["open"]
+    assert result["documents"][0]["status"] == "todo"
+
+
+def test_list_handler_rejects_bad_params():
+    db = _make_db()
+    _seed(db, 1)
+    _seed(db, 1, workspace_id="ws-other")
+    handlers = make_crud_handlers("testCollection", "test_app")
+    assert handlers["list"](db, "ws-1", "user-1", {"limit": 1000})["success"] is False
+    assert handlers["list"](db, "ws-1", "user-1", {"order_by": "body"})["success"] is False
+    assert handlers["list"](db, "ws-1", "user-1", {"cursor": "missing"})["success"] is False
+    # A cursor from another workspace is not accepted
+    assert handlers["list"](db, "ws-1", "user-1", {"cursor": "doc-0"})["success"] is False
+
+
+def test_list_parameters_schema():
+    schema = list_parameters(["title", "blocks"], {"status": {"type": "string"}})
+    props = schema["properties"]
+    assert {"limit", "cursor", "fields", "order_by", "order", "status"} <= set(props)
+    assert "blocks" in props["fields"]["items"]["enum"]
+
+
 def test_create_with_defaults():
     db = _make_db()
     handlers = make_crud_handlers(
@@ -107,3 +231,64 @@ def test_missing_id_returns_error():
     assert handlers["read"](db, "ws-1", "user-1", {})["success"] is False
     assert handlers["update"](db, "ws-1", "user-1", {"title": "x"})["success"] is False
     assert handlers["delete"](db, "ws-1", "user-1", {})["success"] is False
+
+
+def test_make_json_safe_converts_firestore_values():
+    from google.cloud.firestore_v1.document import DocumentReference
+
+    ts = DatetimeWithNanoseconds(2026, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+    ref = DocumentReference("pyramids", "p1", client=object())
+    doc = {
+        "createdAt": ts,
+        "location": GeoPoint(51.5, -0.12),
+        "source": ref,
+        "blocks": {"b1": {"layer": 0, "tags": ("a", "b"), "at": datetime(2026, 1, 1)}},
+        "empty": None,
+    }
+    result = _make_json_safe(doc)
+    assert result == {
+        "createdAt": "2026-01-02T03:04:05+00:00",
+        "location": {"latitude": 51.5, "longitude": -0.12},
+        "source": "pyramids/p1",
+        "blocks": {"b1": {"layer": 0, "tags": ["a", "b"], "at": "2026-01-01T00:00:00"}},
+        "empty": None,
+    }
+    # The result is a copy, not a view of the source document
+    result["blocks"]["b1"]["layer"] = 1
+    assert doc["blocks"]["b1"]["layer"] == 0
+
+
+def test_make_json_safe_rejects_unknown_types():
+    with pytest.raises(TypeError):
+        _make_json_safe({"value": object()})
+
+
+def test_list_queries_have_composite_indexes():
+    """Every filter / order_by / order a *.list schema offers has an index in firestore.indexes.json."""
+    import json
+
+    from tools.registry import get_tool_registry
+
+    path = os.path.join(os.path.dirname(__file__), "..", "..", "firestore.indexes.json")
+    with open(path) as f:
+        indexes = {
+            (index["collectionGroup"], tuple((fl["fieldPath"], fl["order"]) for fl in index["fields"]))
+            for index in json.load(f)["indexes"]
+        }
+
+    registry = get_tool_registry()
+    control = {"limit", "cursor", "fields", "order_by", "order"}
+    for td in registry.list_tools():
+        if not td.tool_id.endswith(".list"):
+            continue
+        collection = registry.get_app(td.app_id).firestore_collection
+        properties = td.parameters["properties"]
+        filters = [name for name in properties if name not in control]
+        for field in properties["order_by"]["enum"]:
+            for direction in ("ASCENDING", "DESCENDING"):
+                for name in [None, *filters]:
+                    fields = (("workspaceId", "ASCENDING"),)
+                    if name:
+                        fields += ((name, "ASCENDING"),)
+                    fields += ((field, direction),)
+                    assert (collection, fields) in indexes, (td.tool_id, fields)
@@ -1,5 +1,7 @@
 """Tests for the tool registry."""
 
+from dataclasses import replace
+
 import pytest
 import tools.registry as registry_mod
 from tools.registry import get_tool_registry
@@ -105,3 +107,34 @@ def test_collection_name_mapping():
     for app_id, collection in expected.items():
         app = registry.get_app(app_id)
         assert app.firestore_collection == collection
+
+
+def test_compiled_tools_are_cached():
+    registry = get_tool_registry()
+    td = registry.get_tool("pyramids.list")
+    assert registry.compiled.get(td) is registry.compiled.get(td)
+
+
+def test_compiled_tool_rebuilt_when_schema_changes():
+    registry = get_tool_registry()
+    td = registry.get_tool("pyramids.list")
+    first = registry.compiled.get(td)
+    changed = replace(td, description="Different description")
+    assert changed.schema_key != td.schema_key
+    assert registry.compiled.get(changed) is not first
+
+
+def test_compiled_tool_is_schema_only():
+    registry = get_tool_registry()
+    tool = registry.compiled.get(registry.get_tool("pyramids.list"))
+    assert tool.name == "pyramids.list"
+    with pytest.raises(RuntimeError):
+        tool.func(limit=5)
+
+
+def test_list_tools_by_app_uses_index():
+    registry = get_tool_registry()
+    assert [t.tool_id for t in registry.list_tools(app_id="diagrams")] == [
+        t.tool_id for t in registry.list_tools() if t.app_id == "diagrams"
+    ]
+    assert registry.list_tools(app_id="unknown") == []
@@ -0,0 +1,233 @@
+"""Tests for the Qdrant vector store helpers."""
+
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from qdrant_client import QdrantClient
+from qdrant_client.models import PayloadSchemaType, PointStruct
+
+import ai.vector_store.qdrant_client as qdrant_mod
+
+
+@pytest.fixture(autouse=True)
+def reset_clients():
+    qdrant_mod._client = qdrant_mod._async_client = None
+    yield
+    qdrant_mod._client = qdrant_mod._async_client = None
+
+
+@patch("ai.vector_store.qdrant_client.QdrantClient")
+def test_qdrant_client_is_shared(mock_cls):
+    assert qdrant_mod.get_qdrant_client() is qdrant_mod.get_qdrant_client()
+    mock_cls.assert_called_once()
+    assert mock_cls.call_args.kwargs["limits"].max_connections == qdrant_mod.settings.qdrant_pool_size
+
+
+@patch("ai.vector_store.qdrant_client.AsyncQdrantClient")
+@patch("ai.vector_store.qdrant_client.QdrantClient")
+def test_close_qdrant_clients(mock_cls, mock_async_cls):
+    mock_async_cls.return_value.close = AsyncMock()
+    sync_client = qdrant_mod.get_qdrant_client()
+    async_client = qdrant_mod.get_async_qdrant_client()
+
+    asyncio.run(qdrant_mod.close_qdrant_clients())
+
+    sync_client.close.assert_called_once()
+    async_client.close.assert_awaited_once()
+    assert qdrant_mod._client is None and qdrant_mod._async_client is None
+
+
+@patch("ai.vector_store.qdrant_client.QdrantClient")
+def test_grpc_options(mock_cls):
+    with patch.object(qdrant_mod.settings, "qdrant_prefer_grpc", True):
+        qdrant_mod.get_qdrant_client()
+    kwargs = mock_cls.call_args.kwargs
+    assert kwargs["prefer_grpc"] is True
+    assert "limits" not in kwargs
+
+
+@pytest.fixture
+def memory_qdrant():
+    client = QdrantClient(":memory:")
+    yield client
+    client.close()
+
+
+@pytest.fixture
+def multitenant(monkeypatch):
+    monkeypatch.setattr(qdrant_mod.settings, "qdrant_multitenant", True)
+
+
+def _point(point_id, vector):
+    return PointStruct(id=point_id, vector=vector, payload={"text": "same"})
+
+
+def _ws_count(client, collection, workspace_id):
+    return client.count(
+        collection, count_filter=qdrant_mod._build_search_filter(None, workspace_id),
+    ).count
+
+
+def test_per_workspace_collections(memory_qdrant):
+    qdrant_mod.ensure_workspace_collection(memory_qdrant, "ws-1", 4)
+    qdrant_mod.upsert_workspace_points(memory_qdrant, "ws-1", [_point(1, [1, 0, 0, 0])])
+
+    assert memory_qdrant.count("workspace_ws-1").count == 1
+    qdrant_mod.delete_workspace_collection(memory_qdrant, "ws-1")
+    assert not memory_qdrant.collection_exists("workspace_ws-1")
+
+
+@pytest.mark.filterwarnings("ignore:Payload indexes have no effect")
+def test_shared_collection_partitions_by_workspace(memory_qdrant, multitenant):
+    with patch.object(memory_qdrant, "create_payload_index", wraps=memory_qdrant.create_payload_index) as index:
+        qdrant_mod.ensure_workspace_collection(memory_qdrant, "ws-1", 4)
+        qdrant_mod.ensure_workspace_collection(memory_qdrant, "ws-2", 4)
+
+    # One collection for every workspace, with a tenant index on workspace_id
+    assert [c.name for c in memory_qdrant.get_collections().collections] == ["workspaces"]
+    index.assert_called_once()
+    assert index.call_args.kwargs["field_schema"].is_tenant is True
+
+    # The same point id in two workspaces stays two points
+    qdrant_mod.upsert_workspace_points(memory_qdrant, "ws-1", [_point(1, [1, 0, 0, 0])])
+    qdrant_mod.upsert_workspace_points(memory_qdrant, "ws-2", [_point(1, [0, 1, 0, 0])])
+    assert _ws_count(memory_qdrant, "workspaces", "ws-1") == 1
+    assert _ws_count(memory_qdrant, "workspaces", "ws-2") == 1
+
+    qdrant_mod.delete_workspace_collection(memory_qdrant, "ws-1")
+    assert _ws_count(memory_qdrant, "workspaces", "ws-1") == 0
+    assert _ws_count(memory_qdrant, "workspaces", "ws-2") == 1
+
+
+def test_search_filter_scoped_to_tenant(multitenant):
+    search_filter = qdrant_mod._build_search_filter({"appId": "pyramids"}, "ws-1")
+    keys = [(c.key, c.match.value) for c in search_filter.must]
+    assert keys == [("workspace_id", "ws-1"), ("appId", "pyramids")]
+
+
+def test_search_filter_without_tenant_in_per_workspace_mode():
+    assert qdrant_mod._build_search_filter(None, "ws-1") is None
+
+
+def test_known_collection_skips_metadata_calls(mock_qdrant):
+    qdrant_mod.ensure_workspace_collection(mock_qdrant, "ws-1", 4)
+    with patch.object(mock_qdrant, "collection_exists") as exists, \
+            patch.object(mock_qdrant, "create_collection") as create:
+        qdrant_mod.ensure_workspace_collection(mock_qdrant, "ws-1", 4)
+    exists.assert_not_called()
+    create.assert_not_called()
+
+
+def test_existing_collection_is_not_recreated(mock_qdrant):
+    mock_qdrant.create_collection("workspace_ws-1")
+    with patch.object(mock_qdrant, "create_collection") as create:
+        qdrant_mod.ensure_workspace_collection(mock_qdrant, "ws-1", 4)
+    create.assert_not_called()
+
+
+def test_lost_create_race_counts_as_success(mock_qdrant):
+    def create_concurrently(collection_name, **kwargs):
+        mock_qdrant._collections[collection_name] = {}
+        raise RuntimeError("Collection `workspace_ws-1` already exists!")
+
+    with patch.object(mock_qdrant, "create_collection", side_effect=create_concurrently):
+        qdrant_mod.ensure_workspace_collection(mock_qdrant, "ws-1", 4)
+    assert qdrant_mod._known_state("workspace_ws-1") is not None
+
+
+def test_create_failure_is_raised(mock_qdrant):
+    with patch.object(mock_qdrant, "create_collection", side_effect=RuntimeError("boom")):
+        with pytest.raises(RuntimeError):
+            qdrant_mod.ensure_workspace_collection(mock_qdrant, "ws-1", 4)
+    assert qdrant_mod._known_state("workspace_ws-1") is None
+
+
+def test_deleted_collection_is_forgotten(mock_qdrant):
+    qdrant_mod.ensure_workspace_collection(mock_qdrant, "ws-1", 4)
+    qdrant_mod.delete_workspace_collection(mock_qdrant, "ws-1")
+    qdrant_mod.ensure_workspace_collection(mock_qdrant, "ws-1", 4)
+    assert mock_qdrant.collection_exists("workspace_ws-1")
+
+
+def test_default_collection_config(mock_qdrant):
+    with patch.object(mock_qdrant, "create_collection") as create:
+        qdrant_mod.ensure_workspace_collection(mock_qdrant, "ws-1", 4)
+    kwargs = create.call_args.kwargs
+    assert kwargs["vectors_config"].on_disk is None
+    assert kwargs["hnsw_config"] is None
+    assert kwargs["quantization_config"] is None
+    assert qdrant_mod._search_params() is None
+
+
+def test_quantized_on_disk_collection_config(mock_qdrant, monkeypatch):
+    for name, value in {
+        "qdrant_quantization": "scalar",
+        "qdrant_on_disk_vectors": True,
+        "qdrant_on_disk_payload": True,
+        "qdrant_hnsw_m": 32,
+        "qdrant_hnsw_ef_construct": 200,
+        "qdrant_search_ef": 128,
+    }.items():
+        monkeypatch.setattr(qdrant_mod.settings, name, value)
+    with patch.object(mock_qdrant, "create_collection") as create:
+        qdrant_mod.ensure_workspace_collection(mock_qdrant, "ws-1", 4)
+    kwargs = create.call_args.kwargs
+    assert kwargs["vectors_config"].on_disk is True
+    assert kwargs["on_disk_payload"] is True
+    assert (kwargs["hnsw_config"].m, kwargs["hnsw_config"].ef_construct) == (32, 200)
+    assert kwargs["quantization_config"].scalar.always_ram is True
+
+    params = qdrant_mod._search_params()
+    assert params.hnsw_ef == 128
+    assert params.quantization.rescore is True
+    assert params.quantization.oversampling == 2.0
+
+
+def test_binary_quantization_in_shared_collection(mock_qdrant, multitenant, monkeypatch):
+    monkeypatch.setattr(qdrant_mod.settings, "qdrant_quantization", "binary")
+    monkeypatch.setattr(qdrant_mod.settings, "qdrant_hnsw_m", 24)
+    with patch.object(mock_qdrant, "create_collection") as create:
+        qdrant_mod.ensure_workspace_collection(mock_qdrant, "ws-1", 4)
+    kwargs = create.call_args.kwargs
+    assert kwargs["quantization_config"].binary.always_ram is True
+    # The global graph stays disabled; m sizes the per-tenant graphs instead
+    assert (kwargs["hnsw_config"].m, kwargs["hnsw_config"].payload_m) == (0, 24)
+
+
+def test_async_search_passes_search_params(monkeypatch):
+    monkeypatch.setattr(qdrant_mod.settings, "qdrant_search_ef", 64)
+    client = AsyncMock()
+    asyncio.run(qdrant_mod.asearch_workspace_points(client, "ws-1", [1.0, 0.0]))
+    assert client.query_points.call_args.kwargs["search_params"].hnsw_ef == 64
+
+
+FIELDS = {"appId": PayloadSchemaType.KEYWORD, "chunk_index": PayloadSchemaType.INTEGER}
+
+
+def test_payload_indexes_created_with_collection(mock_qdrant):
+    qdrant_mod.ensure_workspace_collection(mock_qdrant, "ws-1", 4, FIELDS)
+    assert mock_qdrant.payload_indexes == [("workspace_ws-1", "appId"), ("workspace_ws-1", "chunk_index")]
+
+    with patch.object(mock_qdrant, "create_payload_index") as create, \
+            patch.object(mock_qdrant, "get_collection") as info:
+        qdrant_mod.ensure_workspace_collection(mock_qdrant, "ws-1", 4, FIELDS)
+    create.assert_not_called()
+    info.assert_not_called()
+
+
+def test_payload_indexes_backfilled_on_existing_collection(mock_qdrant):
+    mock_qdrant.create_collection("workspace_ws-1")
+    mock_qdrant.create_payload_index("workspace_ws-1", "appId")
+
+    qdrant_mod.ensure_workspace_collection(mock_qdrant, "ws-1", 4, FIELDS)
+    assert mock_qdrant.payload_indexes == [("workspace_ws-1", "appId"), ("workspace_ws-1", "chunk_index")]
+
+    # A field declared later is backfilled once, in the background
+    fields = {**FIELDS, "docId": PayloadSchemaType.KEYWORD}
+    with patch.object(mock_qdrant, "create_payload_index") as create:
+        qdrant_mod.ensure_payload_indexes(mock_qdrant, "ws-1", fields)
+        qdrant_mod.ensure_payload_indexes(mock_qdrant, "ws-1", fields)
+    create.assert_called_once()
+    assert create.call_args.kwargs["field_name"] == "docId"
+    assert create.call_args.kwargs["wait"] is False
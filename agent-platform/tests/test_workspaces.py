@@ -91,3 +91,24 @@ def test_setup_workspace_rollback_on_agent_failure(client, seeded_firestore, moc
     collections = mock_qdrant.get_collections()
     names = [c.name for c in collections.collections]
     assert "workspace_test-workspace-id" not in names
+
+
+def test_setup_and_teardown_with_shared_collection(client, seeded_firestore, mock_qdrant, monkeypatch):
+    """In multi-tenant mode workspaces share one collection and teardown deletes only their points."""
+    from core.config import settings
+
+    monkeypatch.setattr(settings, "qdrant_multitenant", True)
+    resp = client.post(
+        "/workspaces/setup",
+        json={"workspace_id": "test-workspace-id", "name": "Test Workspace"},
+    )
+    assert resp.status_code == 201
+    assert [c.name for c in mock_qdrant.get_collections().collections] == ["workspaces"]
+    assert mock_qdrant.payload_indexes == [("workspaces", "workspace_id")]
+
+    resp = client.delete("/workspaces/test-workspace-id/teardown")
+    assert resp.status_code == 204
+    assert [c.name for c in mock_qdrant.get_collections().collections] == ["workspaces"]
+    [(collection, selector)] = mock_qdrant.deleted_points
+    assert collection == "workspaces"
+    assert selector.filter.must[0].match.value == "test-workspace-id"
@@ -1,7 +1,7 @@
 """Context Documents app tool registration."""
 
 from tools.base import AppDefinition, ToolDefinition, ToolAction
-from tools.handlers import make_crud_handlers
+from tools.handlers import list_parameters, make_crud_handlers
 
 
 def register_context_documents(registry):
@@ -37,7 +37,7 @@ def register_context_documents(registry):
             ToolDefinition(tool_id="context_documents.read", app_id="context_documents", action=ToolAction.READ, name="Read Context Document", description="Reads a context document by ID", parameters={"type": "object", "properties": {"id": {"type": "string", "description": "Document ID"}}, "required": ["id"]}, handler=handlers["read"]),
             ToolDefinition(tool_id="context_documents.update", app_id="context_documents", action=ToolAction.UPDATE, name="Update Context Document", description="Updates a context document's title or content", parameters={"type": "object", "properties": {"id": {"type": "string", "description": "Document ID"}, "title": {"type": "string"}, "content": {"type": "string"}}, "required": ["id"]}, handler=handlers["update"]),
             ToolDefinition(tool_id="context_documents.delete", app_id="context_documents", action=ToolAction.DELETE, name="Delete Context Document", description="Deletes a context document", parameters={"type": "object", "properties": {"id": {"type": "string", "description": "Document ID"}}, "required": ["id"]}, handler=handlers["delete"]),
-            ToolDefinition(tool_id="context_documents.list", app_id="context_documents", action=ToolAction.LIST, name="List Context Documents", description="Lists all context documents in the workspace", parameters={"type": "object", "properties": {}}, handler=handlers["list"]),
+            ToolDefinition(tool_id="context_documents.list", app_id="context_documents", action=ToolAction.LIST, name="List Context Documents", description="Lists context documents in the workspace, one page at a time", parameters=list_parameters(["title", "content"]), handler=handlers["list"]),
         ],
     )
     registry.register_app(app_def)
@@ -1,7 +1,7 @@
 """Diagrams app tool registration."""
 
 from tools.base import AppDefinition, ToolDefinition, ToolAction
-from tools.handlers import make_crud_handlers
+from tools.handlers import list_parameters, make_crud_handlers
 
 
 def register_diagrams(registry):
@@ -10,6 +10,7 @@ def register_diagrams(registry):
         app_id="diagrams",
         create_defaults={"content": "", "diagramType": "mermaid", "contextSources": []},
         updatable_fields={"title", "content", "diagramType", "contextSources"},
+        list_filters={"diagramType"},
     )
 
     app_def = AppDefinition(
@@ -39,7 +40,7 @@ def register_diagrams(registry):
             ToolDefinition(tool_id="diagrams.read", app_id="diagrams", action=ToolAction.READ, name="Read Diagram", description="Reads a diagram by ID", parameters={"type": "object", "properties": {"id": {"type": "string", "description": "Diagram ID"}}, "required": ["id"]}, handler=handlers["read"]),
             ToolDefinition(tool_id="diagrams.update", app_id="diagrams", action=ToolAction.UPDATE, name="Update Diagram", description="Updates a diagram's title, content, or type", parameters={"type": "object", "properties": {"id": {"type": "string", "description": "Diagram ID"}, "title": {"type": "string"}, "content": {"type": "string"}, "diagramType": {"type": "string"}}, "required": ["id"]}, handler=handlers["update"]),
             ToolDefinition(tool_id="diagrams.delete", app_id="diagrams", action=ToolAction.DELETE, name="Delete Diagram", description="Deletes a diagram", parameters={"type": "object", "properties": {"id": {"type": "string", "description": "Diagram ID"}}, "required": ["id"]}, handler=handlers["delete"]),
-            ToolDefinition(tool_id="diagrams.list", app_id="diagrams", action=ToolAction.LIST, name="List Diagrams", description="Lists all diagrams in the workspace", parameters={"type": "object", "properties": {}}, handler=handlers["list"]),
+            ToolDefinition(tool_id="diagrams.list", app_id="diagrams", action=ToolAction.LIST, name="List Diagrams", description="Lists diagrams in the workspace, one page at a time", parameters=list_parameters(["title", "content", "diagramType", "contextSources"], {"diagramType": {"type": "string"}}), handler=handlers["list"]),
         ],
     )
     registry.register_app(app_def)
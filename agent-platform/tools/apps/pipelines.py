@@ -1,7 +1,7 @@
 """Pipelines app tool registration."""
 
 from tools.base import AppDefinition, ToolDefinition, ToolAction
-from tools.handlers import make_crud_handlers
+from tools.handlers import list_parameters, make_crud_handlers
 
 
 def register_pipelines(registry):
@@ -10,6 +10,7 @@ def register_pipelines(registry):
         app_id="pipelines",
         create_defaults={"stages": [], "status": "draft", "contextSources": []},
         updatable_fields={"title", "stages", "status", "contextSources"},
+        list_filters={"status"},
     )
 
     app_def = AppDefinition(
@@ -39,7 +40,7 @@ def register_pipelines(registry):
             ToolDefinition(tool_id="pipelines.read", app_id="pipelines", action=ToolAction.READ, name="Read Pipeline", description="Reads a pipeline by ID", parameters={"type": "object", "properties": {"id": {"type": "string", "description": "Pipeline ID"}}, "required": ["id"]}, handler=handlers["read"]),
             ToolDefinition(tool_id="pipelines.update", app_id="pipelines", action=ToolAction.UPDATE, name="Update Pipeline", description="Updates a pipeline's title, stages, or status", parameters={"type": "object", "properties": {"id": {"type": "string", "description": "Pipeline ID"}, "title": {"type": "string"}, "stages": {"type": "array"}, "status": {"type": "string"}}, "required": ["id"]}, handler=handlers["update"]),
             ToolDefinition(tool_id="pipelines.delete", app_id="pipelines", action=ToolAction.DELETE, name="Delete Pipeline", description="Deletes a pipeline", parameters={"type": "object", "properties": {"id": {"type": "string", "description": "Pipeline ID"}}, "required": ["id"]}, handler=handlers["delete"]),
-            ToolDefinition(tool_id="pipelines.list", app_id="pipelines", action=ToolAction.LIST, name="List Pipelines", description="Lists all pipelines in the workspace", parameters={"type": "object", "properties": {}}, handler=handlers["list"]),
+            ToolDefinition(tool_id="pipelines.list", app_id="pipelines", action=ToolAction.LIST, name="List Pipelines", description="Lists pipelines in the workspace, one page at a time", parameters=list_parameters(["title", "stages", "status", "contextSources"], {"status": {"type": "string", "enum": ["draft", "active", "archived"]}}), handler=handlers["list"]),
         ],
     )
     registry.register_app(app_def)
@@ -1,7 +1,7 @@
 """Product Definitions app tool registration."""
 
 from tools.base import AppDefinition, ToolDefinition, ToolAction
-from tools.handlers import make_crud_handlers
+from tools.handlers import list_parameters, make_crud_handlers
 
 
 def register_product_definitions(registry):
@@ -10,6 +10,7 @@ def register_product_definitions(registry):
         app_id="product_definitions",
         create_defaults={"data": {}, "linkedPyramidId": None, "contextSources": []},
         updatable_fields={"title", "data", "linkedPyramidId", "contextSources"},
+        list_filters={"linkedPyramidId"},
     )
 
     app_def = AppDefinition(
@@ -49,7 +50,7 @@ def register_product_definitions(registry):
             ToolDefinition(tool_id="product_definitions.read", app_id="product_definitions", action=ToolAction.READ, name="Read Product Definition", description="Reads a product definition by ID with full node tree", parameters={"type": "object", "properties": {"id": {"type": "string", "description": "Document ID"}}, "required": ["id"]}, handler=handlers["read"]),
             ToolDefinition(tool_id="product_definitions.update", app_id="product_definitions", action=ToolAction.UPDATE, name="Update Product Definition", description="Updates a product definition's title, data nodes, or linked pyramid", parameters={"type": "object", "properties": {"id": {"type": "string", "description": "Document ID"}, "title": {"type": "string"}, "data": {"type": "object"}, "linkedPyramidId": {"type": "string"}}, "required": ["id"]}, handler=handlers["update"]),
             ToolDefinition(tool_id="product_definitions.delete", app_id="product_definitions", action=ToolAction.DELETE, name="Delete Product Definition", description="Deletes a product definition by ID", parameters={"type": "object", "properties": {"id": {"type": "string", "description": "Document ID"}}, "required": ["id"]}, handler=handlers["delete"]),
-            ToolDefinition(tool_id="product_definitions.list", app_id="product_definitions", action=ToolAction.LIST, name="List Product Definitions", description="Lists all product definitions in the workspace", parameters={"type": "object", "properties": {}}, handler=handlers["list"]),
+            ToolDefinition(tool_id="product_definitions.list", app_id="product_definitions", action=ToolAction.LIST, name="List Product Definitions", description="Lists product definitions in the workspace, one page at a time", parameters=list_parameters(["title", "data", "linkedPyramidId", "contextSources"], {"linkedPyramidId": {"type": "string"}}), handler=handlers["list"]),
         ],
     )
     registry.register_app(app_def)
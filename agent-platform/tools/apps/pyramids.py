@@ -1,7 +1,7 @@
 """Pyramids app tool registration."""
 
 from tools.base import AppDefinition, ToolDefinition, ToolAction
-from tools.handlers import make_crud_handlers
+from tools.handlers import list_parameters, make_crud_handlers
 
 
 def register_pyramids(registry):
@@ -16,6 +16,7 @@ def register_pyramids(registry):
             "status": "active",
         },
         updatable_fields={"title", "context", "blocks", "connections", "contextSources", "status"},
+        list_filters={"status"},
     )
 
     app_def = AppDefinition(
@@ -93,8 +94,8 @@ def register_pyramids(registry):
             ToolDefinition(
                 tool_id="pyramids.list", app_id="pyramids", action=ToolAction.LIST,
                 name="List Pyramids",
-                description="Lists all pyramids in the workspace",
-                parameters={"type": "object", "properties": {}},
+                description="Lists pyramids in the workspace, one page at a time",
+                parameters=list_parameters(["title", "context", "blocks", "connections", "contextSources", "status"], {"status": {"type": "string"}}),
                 handler=handlers["list"],
             ),
         ],
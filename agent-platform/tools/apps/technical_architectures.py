@@ -1,7 +1,7 @@
 """Technical Architectures app tool registration."""
 
 from tools.base import AppDefinition, ToolDefinition, ToolAction
-from tools.handlers import make_crud_handlers
+from tools.handlers import list_parameters, make_crud_handlers
 
 
 def register_technical_architectures(registry):
@@ -38,7 +38,7 @@ def register_technical_architectures(registry):
             ToolDefinition(tool_id="technical_architectures.read", app_id="technical_architectures", action=ToolAction.READ, name="Read Technical Architecture", description="Reads a technical architecture document by ID", parameters={"type": "object", "properties": {"id": {"type": "string", "description": "Document ID"}}, "required": ["id"]}, handler=handlers["read"]),
             ToolDefinition(tool_id="technical_architectures.update", app_id="technical_architectures", action=ToolAction.UPDATE, name="Update Technical Architecture", description="Updates a technical architecture's title or content sections", parameters={"type": "object", "properties": {"id": {"type": "string", "description": "Document ID"}, "title": {"type": "string"}, "content": {"type": "object"}}, "required": ["id"]}, handler=handlers["update"]),
             ToolDefinition(tool_id="technical_architectures.delete", app_id="technical_architectures", action=ToolAction.DELETE, name="Delete Technical Architecture", description="Deletes a technical architecture document", parameters={"type": "object", "properties": {"id": {"type": "string", "description": "Document ID"}}, "required": ["id"]}, handler=handlers["delete"]),
-            ToolDefinition(tool_id="technical_architectures.list", app_id="technical_architectures", action=ToolAction.LIST, name="List Technical Architectures", description="Lists all technical architectures in the workspace", parameters={"type": "object", "properties": {}}, handler=handlers["list"]),
+            ToolDefinition(tool_id="technical_architectures.list", app_id="technical_architectures", action=ToolAction.LIST, name="List Technical Architectures", description="Lists technical architectures in the workspace, one page at a time", parameters=list_parameters(["title", "content", "contextSources"]), handler=handlers["list"]),
         ],
     )
     registry.register_app(app_def)
@@ -1,7 +1,7 @@
 """Technical Tasks app tool registration."""
 
 from tools.base import AppDefinition, ToolDefinition, ToolAction
-from tools.handlers import make_crud_handlers
+from tools.handlers import list_parameters, make_crud_handlers
 
 
 def register_technical_tasks(registry):
@@ -10,6 +10,7 @@ def register_technical_tasks(registry):
         app_id="technical_tasks",
         create_defaults={"description": "", "status": "todo", "priority": "medium", "assignee": None, "contextSources": []},
         updatable_fields={"title", "description", "status", "priority", "assignee", "contextSources"},
+        list_filters={"status", "priority", "assignee"},
     )
 
     app_def = AppDefinition(
@@ -41,7 +42,7 @@ def register_technical_tasks(registry):
             ToolDefinition(tool_id="technical_tasks.read", app_id="technical_tasks", action=ToolAction.READ, name="Read Technical Task", description="Reads a technical task by ID", parameters={"type": "object", "properties": {"id": {"type": "string", "description": "Task ID"}}, "required": ["id"]}, handler=handlers["read"]),
             ToolDefinition(tool_id="technical_tasks.update", app_id="technical_tasks", action=ToolAction.UPDATE, name="Update Technical Task", description="Updates a task's title, description, status, or priority", parameters={"type": "object", "properties": {"id": {"type": "string", "description": "Task ID"}, "title": {"type": "string"}, "description": {"type": "string"}, "status": {"type": "string"}, "priority": {"type": "string"}}, "required": ["id"]}, handler=handlers["update"]),
             ToolDefinition(tool_id="technical_tasks.delete", app_id="technical_tasks", action=ToolAction.DELETE, name="Delete Technical Task", description="Deletes a technical task", parameters={"type": "object", "properties": {"id": {"type": "string", "description": "Task ID"}}, "required": ["id"]}, handler=handlers["delete"]),
-            ToolDefinition(tool_id="technical_tasks.list", app_id="technical_tasks", action=ToolAction.LIST, name="List Technical Tasks", description="Lists all technical tasks in the workspace", parameters={"type": "object", "properties": {}}, handler=handlers["list"]),
+            ToolDefinition(tool_id="technical_tasks.list", app_id="technical_tasks", action=ToolAction.LIST, name="List Technical Tasks", description="Lists technical tasks in the workspace, one page at a time", parameters=list_parameters(["title", "description", "status", "priority", "assignee", "contextSources"], {"status": {"type": "string", "enum": ["todo", "in_progress", "done"]}, "priority": {"type": "string", "enum": ["low", "medium", "high"]}, "assignee": {"type": "string"}}), handler=handlers["list"]),
         ],
     )
     registry.register_app(app_def)
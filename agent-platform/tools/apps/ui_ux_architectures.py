@@ -1,7 +1,7 @@
 """UI/UX Architectures app tool registration."""
 
 from tools.base import AppDefinition, ToolDefinition, ToolAction
-from tools.handlers import make_crud_handlers
+from tools.handlers import list_parameters, make_crud_handlers
 
 
 def register_ui_ux_architectures(registry):
@@ -39,7 +39,7 @@ def register_ui_ux_architectures(registry):
             ToolDefinition(tool_id="ui_ux_architectures.read", app_id="ui_ux_architectures", action=ToolAction.READ, name="Read UI/UX Architecture", description="Reads a UI/UX architecture by ID", parameters={"type": "object", "properties": {"id": {"type": "string", "description": "Document ID"}}, "required": ["id"]}, handler=handlers["read"]),
             ToolDefinition(tool_id="ui_ux_architectures.update", app_id="ui_ux_architectures", action=ToolAction.UPDATE, name="Update UI/UX Architecture", description="Updates pages, themes, or components of a UI/UX architecture", parameters={"type": "object", "properties": {"id": {"type": "string", "description": "Document ID"}, "title": {"type": "string"}, "pages": {"type": "object"}, "themes": {"type": "object"}, "components": {"type": "object"}}, "required": ["id"]}, handler=handlers["update"]),
             ToolDefinition(tool_id="ui_ux_architectures.delete", app_id="ui_ux_architectures", action=ToolAction.DELETE, name="Delete UI/UX Architecture", description="Deletes a UI/UX architecture document", parameters={"type": "object", "properties": {"id": {"type": "string", "description": "Document ID"}}, "required": ["id"]}, handler=handlers["delete"]),
-            ToolDefinition(tool_id="ui_ux_architectures.list", app_id="ui_ux_architectures", action=ToolAction.LIST, name="List UI/UX Architectures", description="Lists all UI/UX architectures in the workspace", parameters={"type": "object", "properties": {}}, handler=handlers["list"]),
+            ToolDefinition(tool_id="ui_ux_architectures.list", app_id="ui_ux_architectures", action=ToolAction.LIST, name="List UI/UX Architectures", description="Lists UI/UX architectures in the workspace, one page at a time", parameters=list_parameters(["title", "pages", "themes", "components", "contextSources"]), handler=handlers["list"]),
         ],
     )
     registry.register_app(app_def)
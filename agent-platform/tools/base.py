@@ -1,7 +1,10 @@
 """Core abstractions for the tool system."""
 
+import hashlib
+import json
 from dataclasses import dataclass, field
 from enum import Enum
+from functools import cached_property
 from typing import Callable
 
 
@@ -23,6 +26,17 @@ class ToolDefinition:
     parameters: dict          # JSON Schema for input parameters
     handler: Callable         # fn(db, workspace_id, user_id, params) -> dict
 
+    @property
+    def parallel_safe(self) -> bool:
+        """Read-only tools can run concurrently with each other."""
+        return self.action in (ToolAction.READ, ToolAction.LIST)
+
+    @cached_property
+    def schema_key(self) -> str:
+        """Hash of what the LLM sees (id, description, parameters)."""
+        payload = json.dumps([self.tool_id, self.description, self.parameters], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
 
 @dataclass
 class AppDefinition:
@@ -0,0 +1,78 @@
+"""LangChain forms of ToolDefinitions, compiled once and shared across turns.
+
+A StructuredTool and its pydantic args model depend only on the tool
+definition, so they are cached per ``(tool_id, schema_key)``. They only
+describe tools to the LLM; ExecutionService runs the ToolDefinition's
+handler itself when a tool is called.
+"""
+
+import threading
+
+from langchain_core.tools import StructuredTool
+from pydantic import create_model
+
+from tools.base import ToolDefinition
+
+_TYPE_MAP = {
+    "string": str,
+    "integer": int,
+    "number": float,
+    "boolean": bool,
+    "object": dict,
+    "array": list,
+}
+
+
+def build_args_model(td: ToolDefinition):
+    """Build a Pydantic model from a ToolDefinition's JSON Schema parameters."""
+    fields = {}
+    props = td.parameters.get("properties", {})
+    required = set(td.parameters.get("required", []))
+
+    for name, schema in props.items():
+        py_type = _TYPE_MAP.get(schema.get("type", "string"), str)
+        if name in required:
+            fields[name] = (py_type, ...)
+        else:
+            fields[name] = (py_type | None, None)
+
+    # Create a unique model name to avoid conflicts
+    model_name = td.tool_id.replace(".", "_") + "_Args"
+    return create_model(model_name, **fields)
+
+
+def _not_invoked(**kwargs):
+    raise RuntimeError("Compiled tools are schema-only; call the ToolDefinition handler")
+
+
+def compile_tool(td: ToolDefinition) -> StructuredTool:
+    return StructuredTool(
+        name=td.tool_id,
+        description=td.description,
+        func=_not_invoked,
+        args_schema=build_args_model(td),
+    )
+
+
+class CompiledToolCache:
+    """Compiled StructuredTools keyed by tool id, rebuilt when the schema changes."""
+
+    def __init__(self):
+        self._tools: dict[str, tuple[str, StructuredTool]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, td: ToolDefinition) -> StructuredTool:
+        entry = self._tools.get(td.tool_id)
+        if entry is not None and entry[0] == td.schema_key:
+            return entry[1]
+        tool = compile_tool(td)
+        with self._lock:
+            self._tools[td.tool_id] = (td.schema_key, tool)
+        return tool
+
+    def get_many(self, tool_defs: list[ToolDefinition]) -> list[StructuredTool]:
+        return [self.get(td) for td in tool_defs]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tools.clear()
@@ -1,23 +1,111 @@
 """Generic CRUD handler factory for app tools."""
 
-import json
+from collections.abc import Mapping
 from datetime import datetime, timezone
-from typing import Callable
+from typing import Callable, Iterable
 
+from google.cloud.firestore_v1 import GeoPoint, Query
+from google.cloud.firestore_v1.base_document import BaseDocumentReference
 from google.cloud.firestore_v1.base_query import FieldFilter
 
+LIST_DEFAULT_LIMIT = 20
+LIST_MAX_LIMIT = 100
+LIST_ORDER_FIELDS = ("updatedAt", "createdAt", "title")
+# Returned by *.list when the caller does not ask for specific fields
+LIST_SUMMARY_FIELDS = ("title", "createdAt", "updatedAt")
 
-class _DateTimeEncoder(json.JSONEncoder):
-    """JSON encoder that handles datetime objects."""
-    def default(self, o):
-        if isinstance(o, datetime):
-            return o.isoformat()
-        return super().default(o)
+
+_SCALARS = frozenset({str, int, float, bool, type(None)})
 
 
 def _make_json_safe(obj):
-    """Convert an object to be JSON-serializable (datetimes → ISO strings)."""
-    return json.loads(json.dumps(obj, cls=_DateTimeEncoder))
+    """Copy *obj* into plain JSON types in a single pass.
+
+    Datetimes (including Firestore's DatetimeWithNanoseconds) become ISO
+    strings, GeoPoints ``{latitude, longitude}`` and document references
+    their path. Plain dicts, lists and scalars are dispatched on their exact
+    type first since they make up nearly all of a document.
+    """
+    kind = type(obj)
+    if kind is dict:
+        # Scalars are checked inline to skip a call per leaf value
+        return {
+            key if type(key) is str else str(key):
+                value if type(value) in _SCALARS else _make_json_safe(value)
+            for key, value in obj.items()
+        }
+    if kind is list or kind is tuple:
+        return [item if type(item) in _SCALARS else _make_json_safe(item) for item in obj]
+    if kind in _SCALARS:
+        return obj
+    return _convert_value(obj)
+
+
+def _convert_value(obj):
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    if isinstance(obj, GeoPoint):
+        return {"latitude": obj.latitude, "longitude": obj.longitude}
+    if isinstance(obj, BaseDocumentReference):
+        return obj.path
+    if isinstance(obj, Mapping):
+        return {str(key): _make_json_safe(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_make_json_safe(item) for item in obj]
+    # Subclasses such as str/int enums serialise as their underlying value
+    if isinstance(obj, bool):
+        return bool(obj)
+    if isinstance(obj, str):
+        return str.__str__(obj)
+    if isinstance(obj, int):
+        return int(obj)
+    if isinstance(obj, float):
+        return float(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def list_parameters(fields: Iterable[str], filters: dict[str, dict] | None = None) -> dict:
+    """JSON Schema for a ``*.list`` tool.
+
+    *fields* are the document fields a caller may project; *filters* maps
+    fields that can be matched exactly to their JSON Schema.
+    """
+    properties = {
+        "limit": {
+            "type": "integer",
+            "minimum": 1,
+            "maximum": LIST_MAX_LIMIT,
+            "description": f"Maximum documents to return (default {LIST_DEFAULT_LIMIT})",
+        },
+        "cursor": {
+            "type": "string",
+            "description": "next_cursor from a previous call, to fetch the following page",
+        },
+        "fields": {
+            "type": "array",
+            "items": {"type": "string", "enum": sorted(set(fields) | set(LIST_SUMMARY_FIELDS))},
+            "description": (
+                f"Fields to return besides id (default: {', '.join(LIST_SUMMARY_FIELDS)}). "
+                "Use the read tool for a single full document."
+            ),
+        },
+        "order_by": {
+            "type": "string",
+            "enum": list(LIST_ORDER_FIELDS),
+            "description": (
+                "Field to sort by. Documents without this field are left out; "
+                "omit it to page through every document in id order"
+            ),
+        },
+        "order": {
+            "type": "string",
+            "enum": ["asc", "desc"],
+            "description": "Sort direction for order_by (default desc)",
+        },
+    }
+    for name, schema in (filters or {}).items():
+        properties[name] = {**schema, "description": f"Only return documents whose {name} equals this value"}
+    return {"type": "object", "properties": properties}
 
 
 def make_crud_handlers(
@@ -25,11 +113,16 @@ def make_crud_handlers(
     app_id: str,
     create_defaults: dict | None = None,
     updatable_fields: set[str] | None = None,
+    list_filters: set[str] | None = None,
 ) -> dict[str, Callable]:
     """Generate standard CRUD handlers for a Firestore collection.
 
     Each handler: (db, workspace_id, user_id, params) -> dict
+
+    *list_filters* names the fields the list handler accepts as equality
+    filters; it should match the filters passed to ``list_parameters``.
     """
+    list_filters = list_filters or set()
 
     def create_handler(db, workspace_id, user_id, params):
         ref = db.collection(collection_name).document()
@@ -92,15 +185,46 @@ def make_crud_handlers(
         return {"success": True, "id": doc_id}
 
     def list_handler(db, workspace_id, user_id, params):
-        query = db.collection(collection_name).where(
-            filter=FieldFilter("workspaceId", "==", workspace_id)
-        )
+        limit = params.get("limit") or LIST_DEFAULT_LIMIT
+        if not isinstance(limit, int) or not 1 <= limit <= LIST_MAX_LIMIT:
+            return {"success": False, "error": f"limit must be between 1 and {LIST_MAX_LIMIT}"}
+        order_by = params.get("order_by")
+        if order_by is not None and order_by not in LIST_ORDER_FIELDS:
+            return {"success": False, "error": f"Cannot order by '{order_by}'"}
+        direction = Query.ASCENDING if params.get("order") == "asc" else Query.DESCENDING
+        fields = params.get("fields") or [*LIST_SUMMARY_FIELDS, *sorted(list_filters)]
+
+        collection = db.collection(collection_name)
+        query = collection.where(filter=FieldFilter("workspaceId", "==", workspace_id))
+        for name in sorted(list_filters):
+            if params.get(name) is not None:
+                query = query.where(filter=FieldFilter(name, "==", params[name]))
+        if order_by:
+            query = query.order_by(order_by, direction=direction)
+        else:
+            # Firestore's order_by skips documents missing the field, and
+            # documents written by the app carry lastModified, not updatedAt.
+            # Every document has an id, and the single-field indexes serve it.
+            query = query.order_by("__name__")
+
+        cursor = params.get("cursor")
+        if cursor:
+            snapshot = collection.document(cursor).get()
+            if not snapshot.exists or snapshot.to_dict().get("workspaceId") != workspace_id:
+                return {"success": False, "error": "Invalid cursor"}
+            query = query.start_after(snapshot)
+
+        # One extra document tells us whether another page exists
+        docs = list(query.select(fields).limit(limit + 1).stream())
         results = []
-        for doc in query.stream():
+        for doc in docs[:limit]:
             data = doc.to_dict()
             data["id"] = doc.id
             results.append(data)
-        return {"success": True, "count": len(results), "documents": _make_json_safe(results)}
+        response = {"success": True, "count": len(results), "documents": _make_json_safe(results)}
+        if len(docs) > limit:
+            response["next_cursor"] = results[-1]["id"]
+        return response
 
     return {
         "create": create_handler,
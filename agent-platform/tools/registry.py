@@ -1,6 +1,7 @@
 """Central tool registry — singleton that holds all app definitions and tools."""
 
 from tools.base import AppDefinition, ToolDefinition
+from tools.compiled import CompiledToolCache
 
 
 class ToolRegistry:
@@ -9,11 +10,19 @@ class ToolRegistry:
     def __init__(self):
         self._apps: dict[str, AppDefinition] = {}
         self._tools: dict[str, ToolDefinition] = {}
+        self._tools_by_app: dict[str, list[ToolDefinition]] = {}
+        self.compiled = CompiledToolCache()
+        # Bumped on every registration so derived indexes can tell they are stale
+        self.version = 0
 
     def register_app(self, app_def: AppDefinition) -> None:
         self._apps[app_def.app_id] = app_def
         for tool in app_def.tools:
             self._tools[tool.tool_id] = tool
+        self._tools_by_app[app_def.app_id] = [
+            t for t in self._tools.values() if t.app_id == app_def.app_id
+        ]
+        self.version += 1
 
     def get_app(self, app_id: str) -> AppDefinition | None:
         return self._apps.get(app_id)
@@ -26,11 +35,14 @@ class ToolRegistry:
 
     def list_tools(self, app_id: str | None = None) -> list[ToolDefinition]:
         if app_id:
-            return [t for t in self._tools.values() if t.app_id == app_id]
+            return list(self._tools_by_app.get(app_id, []))
         return list(self._tools.values())
 
     def get_tools_for_apps(self, app_ids: list[str]) -> list[ToolDefinition]:
-        return [t for t in self._tools.values() if t.app_id in app_ids]
+        tools = []
+        for app_id in dict.fromkeys(app_ids):
+            tools.extend(self._tools_by_app.get(app_id, []))
+        return tools
 
 
 _registry: ToolRegistry | None = None